@@ -0,0 +1,53 @@
+"""
+Benchmark for combat_system.simulate_battles
+
+Runs the same random matchups through SimpleBattle.start_battle (with its
+battle log sent to a throwaway buffer) and through the batch simulator,
+checks the win counts agree, and reports the time for each.
+
+Run: python benchmarks/bench_battle_batch.py [battles] [seed]
+"""
+
+import sys
+import os
+import contextlib
+import io
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import character_manager
+import combat_system
+
+def run(battles=20000, seed=1):
+    rng = random.Random(seed)
+    characters = []
+    enemies = []
+    for i in range(battles):
+        character = character_manager.create_character(f"Sim{i}", "Warrior")
+        character["health"] = rng.randint(50, 300)
+        character["strength"] = rng.randint(5, 40)
+        characters.append(character)
+        enemies.append(combat_system.create_enemy(rng.choice(list(combat_system.ENEMY_STATS))))
+
+    start = time.perf_counter()
+    scalar_wins = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for character, enemy in zip(characters, enemies):
+            battle = combat_system.SimpleBattle(dict(character), dict(enemy))
+            scalar_wins += battle.start_battle()["winner"] == "player"
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = combat_system.simulate_battles(characters, enemies)
+    batch_time = time.perf_counter() - start
+
+    assert results["wins"] == scalar_wins, "batch and scalar results differ"
+    print(f"{battles:,} battles, win rate {results['win_rate']:.3f}")
+    print(f"{'SimpleBattle':<18} {scalar_time * 1000:>10,.1f} ms")
+    print(f"{'simulate_battles':<18} {batch_time * 1000:>10,.1f} ms")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
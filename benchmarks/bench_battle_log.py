@@ -0,0 +1,44 @@
+"""
+Benchmark for combat_system battle log sinks
+
+Runs the same battles through SimpleBattle.start_battle with each log
+sink and reports the time. stdout is sent to a throwaway buffer so the
+print sink measures formatting and print calls rather than the terminal.
+
+Run: python benchmarks/bench_battle_log.py [battles]
+"""
+
+import sys
+import os
+import contextlib
+import io
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import character_manager
+import combat_system
+
+def run(battles=5000):
+    hero = character_manager.create_character("Bench", "Warrior")
+    hero["health"] = 500
+    sinks = [
+        ("print", combat_system.PrintLogSink()),
+        ("batched", combat_system.BatchedLogSink()),
+        ("ring buffer", combat_system.RingBufferLogSink(50)),
+        ("null", combat_system.NullLogSink()),
+    ]
+    for label, sink in sinks:
+        previous = combat_system.set_battle_log_sink(sink)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(battles):
+                battle = combat_system.SimpleBattle(dict(hero), combat_system.create_enemy("dragon"))
+                battle.start_battle()
+        elapsed = time.perf_counter() - start
+        combat_system.set_battle_log_sink(previous)
+        print(f"{label:<12} {elapsed * 1000:>10,.1f} ms")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
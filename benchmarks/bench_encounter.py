@@ -0,0 +1,43 @@
+"""
+Benchmark for combat_system.Encounter
+
+A raid party fights a large enemy group with the battle log silenced.
+Reports rounds fought and the average time per round for each
+targeting mode.
+
+Run: python benchmarks/bench_encounter.py [party_size] [enemy_count] [seed]
+"""
+
+import sys
+import os
+import random
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import combat_system
+
+def run(party_size=40, enemy_count=200, seed=1):
+    previous = combat_system.set_battle_log_sink(combat_system.NullLogSink())
+    for targeting in combat_system.TARGETING_MODES:
+        rng = random.Random(seed)
+        party = [
+            {"name": f"Raider{i}", "health": 2000, "strength": rng.randint(20, 40),
+             "speed": rng.randint(5, 20)}
+            for i in range(party_size)
+        ]
+        enemies = [combat_system.create_enemy(rng.choice(["goblin", "orc"])) for _ in range(enemy_count)]
+        for enemy in enemies:
+            enemy["speed"] = rng.randint(5, 20)
+
+        encounter = combat_system.Encounter(party, enemies, targeting=targeting, rng=rng)
+        start = time.perf_counter()
+        result = encounter.run()
+        elapsed = time.perf_counter() - start
+        print(f"{targeting:<8} winner={result['winner']:<8} rounds={result['rounds']:<4} "
+              f"{elapsed * 1000 / result['rounds']:.2f} ms/round")
+    combat_system.set_battle_log_sink(previous)
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
@@ -0,0 +1,52 @@
+"""
+Benchmark for combat_system.create_enemy
+
+Spawns a large batch of enemies the old way (a fresh seven-key dict per
+enemy) and through create_enemy (a shared template plus per-enemy
+health). Reports memory held by the batch and the time to build it.
+
+Run: python benchmarks/bench_enemy_spawn.py [count]
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import combat_system
+
+def dict_enemy(enemy_type):
+    """The per-spawn dictionary create_enemy used to build"""
+    base = combat_system.ENEMY_STATS[enemy_type.lower()]
+    return {
+        "name": base["name"],
+        "health": base["health"],
+        "max_health": base["health"],
+        "strength": base["strength"],
+        "magic": base["magic"],
+        "xp_reward": base["xp_reward"],
+        "gold_reward": base["gold_reward"],
+    }
+
+def measure(label, spawn, types):
+    tracemalloc.start()
+    start = time.perf_counter()
+    batch = [spawn(enemy_type) for enemy_type in types]
+    elapsed = time.perf_counter() - start
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} {used / 1024:>10,.0f} KiB {elapsed * 1000:>10,.1f} ms")
+    return batch
+
+def run(count=200000):
+    enemy_types = list(combat_system.ENEMY_STATS)
+    types = [enemy_types[i % len(enemy_types)] for i in range(count)]
+    print(f"{count:,} enemies:")
+    measure("dict per spawn", dict_enemy, types)
+    measure("create_enemy", combat_system.create_enemy, types)
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
@@ -0,0 +1,68 @@
+"""
+Benchmark for game state snapshots and rollback
+
+Times rolling back a single gold change and taking a follow-up snapshot
+with previous=, for plain catalog dicts (compared entry by entry) and
+catalogs wrapped with game_state.track_changes (only changed keys are
+visited), next to a full copy.deepcopy of the same state.
+
+Run: python benchmarks/bench_game_state.py [items] [quests]
+"""
+
+import sys
+import os
+import copy
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import character_manager
+import game_state
+
+def make_catalogs(item_count, quest_count):
+    items = {
+        f"item_{i}": {"item_id": f"item_{i}", "name": f"Item {i}", "type": "weapon",
+                      "effect": "strength:1", "effects": (("strength", 1),),
+                      "cost": i, "description": "Benchmark item"}
+        for i in range(item_count)
+    }
+    quests = {
+        f"quest_{i}": {"quest_id": f"quest_{i}", "title": f"Quest {i}",
+                       "description": "Benchmark quest", "reward_xp": 10,
+                       "reward_gold": 5, "required_level": 1, "prerequisite": "NONE"}
+        for i in range(quest_count)
+    }
+    return items, quests
+
+def time_rollback(label, wrap, item_count, quest_count):
+    items, quests = make_catalogs(item_count, quest_count)
+    items, quests = wrap(items), wrap(quests)
+    char = character_manager.create_character("Bench", "Warrior")
+    snap = game_state.take_snapshot(char, quests, items)
+
+    char["gold"] += 1
+    start = time.perf_counter()
+    changed = game_state.restore_snapshot(snap, char, quests, items)
+    restore = time.perf_counter() - start
+
+    items["item_0"]["cost"] += 1
+    start = time.perf_counter()
+    game_state.take_snapshot(char, quests, items, previous=snap)
+    chained = time.perf_counter() - start
+
+    print(f"{label:<10} restore {restore * 1000:>8.2f} ms ({changed} changed)   "
+          f"snapshot(previous=) {chained * 1000:>8.2f} ms")
+    return char, quests, items
+
+def run(item_count=50000, quest_count=5000):
+    print(f"{item_count} items, {quest_count} quests:")
+    state = time_rollback("plain", lambda catalog: catalog, item_count, quest_count)
+    time_rollback("tracked", game_state.track_changes, item_count, quest_count)
+
+    start = time.perf_counter()
+    copy.deepcopy(state)
+    print(f"{'deepcopy':<10} {(time.perf_counter() - start) * 1000:>8.2f} ms")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
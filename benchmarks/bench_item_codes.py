@@ -0,0 +1,76 @@
+"""
+Benchmark for interned item IDs in inventories
+
+Builds a roster of characters whose inventories are read from save-file
+style text, stored four ways: the original list of ID strings, stacks
+keyed by the parsed strings, stacks keyed by integer codes, and the
+current Inventory (stacks keyed by game_data.ITEM_REGISTRY's canonical
+strings). Reports memory used and the time for count lookups.
+
+Run: python benchmarks/bench_item_codes.py [characters] [inventory_size] [catalog_size]
+"""
+
+import sys
+import os
+import random
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inventory_system
+from game_data import ITEM_REGISTRY
+
+def measure(label, build):
+    tracemalloc.start()
+    roster = build()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {used / 1024:>10,.0f} KiB")
+    return roster
+
+def time_lookups(label, roster, lookup, queries):
+    start = time.perf_counter()
+    for inv in roster:
+        for item_id in queries:
+            lookup(inv, item_id)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed * 1000:>10,.1f} ms")
+
+def stacks(keys):
+    counts = {}
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+def run(characters=200, inventory_size=2000, catalog_size=500):
+    rng = random.Random(1)
+    catalog = [f"item_{i:05d}" for i in range(catalog_size)]
+    for item_id in catalog:
+        ITEM_REGISTRY.intern(item_id)
+
+    # INVENTORY lines as they appear in save files
+    save_lines = [
+        ",".join(rng.choice(catalog) for _ in range(inventory_size))
+        for _ in range(characters)
+    ]
+
+    print("Memory for roster (parsed from save lines):")
+    lists = measure("list of strings", lambda: [line.split(",") for line in save_lines])
+    by_string = measure("stacks by string", lambda: [stacks(line.split(",")) for line in save_lines])
+    measure("stacks by int code", lambda: [
+        stacks(ITEM_REGISTRY.intern(i) for i in line.split(",")) for line in save_lines
+    ])
+    by_canonical = measure("Inventory", lambda: [
+        inventory_system.Inventory(line.split(",")) for line in save_lines
+    ])
+
+    queries = [rng.choice(catalog) for _ in range(50)]
+    print("Lookup time (50 count queries per character):")
+    time_lookups("list.count", lists, lambda inv, i: inv.count(i), queries)
+    time_lookups("stacks by string", by_string, lambda inv, i: inv.get(i, 0), queries)
+    time_lookups("Inventory.count", by_canonical, lambda inv, i: inv.count(i), queries)
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
@@ -0,0 +1,48 @@
+"""
+Benchmark for set-backed quest lists
+
+Times quest membership checks and completions for a veteran character
+with many completed quests, using plain lists (the old storage) and
+character_manager.QuestIdList.
+
+Run: python benchmarks/bench_quest_membership.py [completed_quests] [operations]
+"""
+
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from character_manager import QuestIdList
+
+def time_ops(label, make_container, completed_count, operations):
+    completed = make_container(f"quest_{i}" for i in range(completed_count))
+    active = make_container(f"new_quest_{i}" for i in range(operations))
+    lookups = [f"quest_{(i * 7919) % completed_count}" for i in range(operations)]
+
+    start = time.perf_counter()
+    for quest_id in lookups:
+        quest_id in completed
+    membership = time.perf_counter() - start
+
+    # What complete_quest does: move from active to completed
+    start = time.perf_counter()
+    for i in range(operations):
+        quest_id = f"new_quest_{i}"
+        active.remove(quest_id)
+        if quest_id not in completed:
+            completed.append(quest_id)
+    completion = time.perf_counter() - start
+
+    print(f"{label:<12} membership {membership * 1000:>9.2f} ms   "
+          f"complete {completion * 1000:>9.2f} ms")
+
+def run(completed_count=10000, operations=2000):
+    print(f"{completed_count} completed quests, {operations} operations each:")
+    time_ops("list", list, completed_count, operations)
+    time_ops("QuestIdList", QuestIdList, completed_count, operations)
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
@@ -0,0 +1,67 @@
+"""
+Stress benchmark for inventory_system.Vendor
+
+Many player threads buy from one vendor at once. Checks that stock is
+never oversold and reports purchase throughput.
+
+Run: python benchmarks/bench_vendor_stock.py [threads] [items] [stock_per_item]
+"""
+
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inventory_system
+from custom_exceptions import InsufficientResourcesError
+
+def run(thread_count=16, item_count=8, stock_per_item=5000):
+    items = {
+        f"item_{i}": {"item_id": f"item_{i}", "type": "consumable", "cost": 1}
+        for i in range(item_count)
+    }
+    vendor = inventory_system.Vendor({item_id: stock_per_item for item_id in items})
+    item_ids = list(items)
+    bought = [0] * thread_count
+
+    # Players never fill their inventory, so stock is the only limit
+    old_max = inventory_system.MAX_INVENTORY_SIZE
+    inventory_system.MAX_INVENTORY_SIZE = item_count * stock_per_item
+
+    def player(index):
+        character = {"gold": item_count * stock_per_item, "inventory": []}
+        turn = index
+        sold_out = set()
+        while len(sold_out) < item_count:
+            item_id = item_ids[turn % item_count]
+            turn += 1
+            if item_id in sold_out:
+                continue
+            try:
+                vendor.purchase(character, item_id, items[item_id])
+                bought[index] += 1
+            except InsufficientResourcesError:
+                sold_out.add(item_id)
+
+    threads = [threading.Thread(target=player, args=(i,)) for i in range(thread_count)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    inventory_system.MAX_INVENTORY_SIZE = old_max
+
+    total = sum(bought)
+    assert total == item_count * stock_per_item, "stock was oversold or lost"
+    assert all(vendor.get_stock(item_id) == 0 for item_id in items)
+
+    print(f"{thread_count} threads bought {total} items in {elapsed:.3f}s "
+          f"({total / elapsed:,.0f} purchases/s), no overselling")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    run(*args)
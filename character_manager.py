@@ -10,6 +10,18 @@ This module handles character creation, loading, and saving.
 """
 
 import os
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from inventory_system import (
+    LEGACY_SLOTS,
+    Inventory,
+    format_equipment,
+    parse_equipment,
+    parse_legacy_equipment,
+    restore_equipment
+)
 from custom_exceptions import (
     InvalidCharacterClassError,
     CharacterNotFoundError,
@@ -26,6 +38,91 @@ VALID_CLASSES = {
     "Cleric": {"health": 100, "strength": 10, "magic": 15},
 }
 
+# Fields rebuilt on load instead of being written to save files
+_DERIVED_SAVE_FIELDS = {"equipment_bonuses", "equipped_weapon", "equipped_armor"}
+
+# Fields older saves used for equipment before the EQUIPMENT line existed
+_LEGACY_EQUIPMENT_FIELDS = {
+    f"equipped_{slot}{suffix}"
+    for slot in LEGACY_SLOTS
+    for suffix in ("", "_stat", "_bonus")
+}
+
+# Async save/load settings: how many threads do file I/O, and how many
+# requests may be waiting on them before callers have to wait their turn
+SAVE_IO_WORKERS = 4
+MAX_PENDING_SAVE_IO = 64
+
+# ============================================================================
+# QUEST ID LISTS
+# ============================================================================
+
+class QuestIdList:
+    """
+    Insertion-ordered set of quest IDs with the list API the game uses
+
+    Used for active_quests and completed_quests. Membership tests and
+    removal are O(1) (it's backed by a dict's keys) instead of scanning a
+    list, while append, iteration, len, indexing and == against plain
+    lists still work. Adding an ID that's already present does nothing.
+    version goes up on every change, so caches can tell if it changed.
+    """
+
+    __slots__ = ("_ids", "version")
+
+    def __init__(self, quest_ids=()):
+        self._ids = dict.fromkeys(quest_ids)
+        self.version = 0
+
+    def append(self, quest_id):
+        if quest_id not in self._ids:
+            self._ids[quest_id] = None
+            self.version += 1
+
+    def extend(self, quest_ids):
+        for quest_id in quest_ids:
+            self.append(quest_id)
+
+    def remove(self, quest_id):
+        """Remove a quest ID; ValueError if it isn't there (like list.remove)"""
+        try:
+            del self._ids[quest_id]
+        except KeyError:
+            raise ValueError(f"{quest_id!r} not in list")
+        self.version += 1
+
+    def discard(self, quest_id):
+        if self._ids.pop(quest_id, 0) is None:
+            self.version += 1
+
+    def clear(self):
+        self._ids.clear()
+        self.version += 1
+
+    def copy(self):
+        return QuestIdList(self._ids)
+
+    def __contains__(self, quest_id):
+        return quest_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __getitem__(self, index):
+        # Indexing is rare, so build a list only when asked
+        return list(self._ids)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (QuestIdList, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"QuestIdList({list(self._ids)!r})"
+
 # ============================================================================
 # CHARACTER MANAGEMENT FUNCTIONS
 # ============================================================================
@@ -70,9 +167,9 @@ def create_character(name, character_class):
         "magic": base["magic"],
         "experience": 0,
         "gold": 100,
-        "inventory": [],
-        "active_quests": [],
-        "completed_quests": []
+        "inventory": Inventory(),
+        "active_quests": QuestIdList(),
+        "completed_quests": QuestIdList()
     }
     
     return character
@@ -104,23 +201,44 @@ def save_character(character, save_directory="data/save_games"):
     # Create save_directory if it doesn't exist
     # Handle any file I/O errors appropriately
     # Lists should be saved as comma-separated values
-    os.makedirs(save_directory, exist_ok=True)
     filepath = os.path.join(save_directory, f"{character['name']}_save.txt")
-    
+    text = format_save_data(character)
+    write_save_file(filepath, text)
+    return True
+
+def format_save_data(character):
+    """
+    Turn a character dictionary into the text stored in a save file
+    """
+    lines = []
+    for key, value in character.items():
+        if key in _DERIVED_SAVE_FIELDS or key.startswith("_"):
+            # Rebuilt when the save is loaded (or a runtime-only cache)
+            continue
+        if key == "equipment":
+            line_value = format_equipment(value)
+        elif isinstance(value, (list, Inventory, QuestIdList)):
+            line_value = ",".join(value)
+        else:
+            line_value = str(value)
+        lines.append(f"{key.upper()}: {line_value}\n")
+    return "".join(lines)
+
+def write_save_file(filepath, text):
+    """
+    Write already formatted save text to disk
+
+    Raises: SaveFileCorruptedError if the file could not be written
+    """
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+
     try:
         with open(filepath, "w") as f:
-            for key, value in character.items():
-                if isinstance(value, list):
-                    line_value = ",".join(value)
-                else:
-                    line_value = str(value)
-                f.write(f"{key.upper()}: {line_value}\n")
+            f.write(text)
     except Exception:
         # let PermissionError / IOError bubble up if needed,
         # but tests only care that saving works
         raise SaveFileCorruptedError("Could not save character data.")
-    
-    return True
 
 def load_character(character_name, save_directory="data/save_games"):
     """
@@ -153,6 +271,7 @@ def load_character(character_name, save_directory="data/save_games"):
         raise SaveFileCorruptedError("Could not read save file.")
     
     character = {}
+    legacy_equipment = {}
     
     try:
         for line in lines:
@@ -169,16 +288,33 @@ def load_character(character_name, save_directory="data/save_games"):
                     character[key] = []
                 else:
                     character[key] = [x for x in value.split(",") if x]
+                if key == "inventory":
+                    character[key] = Inventory(character[key])
+                else:
+                    character[key] = QuestIdList(character[key])
+            elif key == "equipment":
+                character[key] = parse_equipment(value)
+            elif key in _LEGACY_EQUIPMENT_FIELDS:
+                legacy_equipment[key] = value
+            elif key in _DERIVED_SAVE_FIELDS:
+                continue
             elif key in ["level", "health", "max_health", "strength", "magic",
                          "experience", "gold"]:
                 character[key] = int(value)
             else:
                 character[key] = value
+        if "equipment" not in character and legacy_equipment:
+            # Saves from before equipment slots: stats already include the
+            # bonuses, so only the slot entries need rebuilding
+            character["equipment"] = parse_legacy_equipment(legacy_equipment)
     except InvalidSaveDataError:
         raise
     except Exception:
         raise InvalidSaveDataError("Invalid save data format.")
     
+    if "equipment" in character:
+        restore_equipment(character, character["equipment"])
+
     validate_character_data(character)
     return character
 
@@ -217,6 +353,78 @@ def delete_character(character_name, save_directory="data/save_games"):
     os.remove(filepath)
     return True
 
+# ============================================================================
+# ASYNC SAVE / LOAD
+# ============================================================================
+
+# Shared worker pool for save file I/O (created the first time it's needed)
+_save_io_executor = None
+
+# One semaphore per event loop caps how many I/O jobs can be queued at once
+_save_io_limits = weakref.WeakKeyDictionary()
+
+def _get_save_io_executor():
+    """Return the shared save I/O thread pool, creating it if needed"""
+    global _save_io_executor
+    if _save_io_executor is None:
+        _save_io_executor = ThreadPoolExecutor(
+            max_workers=SAVE_IO_WORKERS,
+            thread_name_prefix="save_io"
+        )
+    return _save_io_executor
+
+async def _run_save_io(func, *args):
+    """
+    Run a blocking file function on the save I/O pool
+
+    Waits (without blocking the event loop) when MAX_PENDING_SAVE_IO jobs
+    are already queued, so a burst of saves can't pile up without limit.
+    Exceptions raised by func are re-raised in the caller unchanged.
+    """
+    loop = asyncio.get_running_loop()
+    limit = _save_io_limits.get(loop)
+    if limit is None:
+        limit = asyncio.Semaphore(MAX_PENDING_SAVE_IO)
+        _save_io_limits[loop] = limit
+
+    async with limit:
+        return await loop.run_in_executor(
+            _get_save_io_executor(), functools.partial(func, *args)
+        )
+
+async def async_save_character(character, save_directory="data/save_games"):
+    """
+    Async version of save_character
+
+    The save text is built right away on the event loop, so later changes
+    to the character dict can't leak into a save that is still queued.
+    Only the disk write runs on the I/O pool.
+
+    Returns: True if successful
+    Raises: SaveFileCorruptedError if the file could not be written
+    """
+    filepath = os.path.join(save_directory, f"{character['name']}_save.txt")
+    text = format_save_data(character)
+    await _run_save_io(write_save_file, filepath, text)
+    return True
+
+async def async_load_character(character_name, save_directory="data/save_games"):
+    """
+    Async version of load_character
+
+    Returns: Character dictionary
+    Raises: Same exceptions as load_character
+    """
+    return await _run_save_io(load_character, character_name, save_directory)
+
+async def async_list_saved_characters(save_directory="data/save_games"):
+    """
+    Async version of list_saved_characters
+
+    Returns: List of character names
+    """
+    return await _run_save_io(list_saved_characters, save_directory)
+
 # ============================================================================
 # CHARACTER OPERATIONS
 # ============================================================================
@@ -347,9 +555,12 @@ def validate_character_data(character):
         if not isinstance(character[key], int):
             raise InvalidSaveDataError(f"{key} must be an integer.")
     
-    list_fields = ["inventory", "active_quests", "completed_quests"]
+    if not isinstance(character["inventory"], (list, Inventory)):
+        raise InvalidSaveDataError("inventory must be a list.")
+
+    list_fields = ["active_quests", "completed_quests"]
     for key in list_fields:
-        if not isinstance(character[key], list):
+        if not isinstance(character[key], (list, QuestIdList)):
             raise InvalidSaveDataError(f"{key} must be a list.")
     
     return True
@@ -10,16 +10,28 @@ Handles combat mechanics
 """
 
 from custom_exceptions import (
+    CorruptedDataError,
     InvalidTargetError,
     CombatNotActiveError,
     CharacterDeadError,
     AbilityOnCooldownError
 )
 
+import hashlib
+import heapq
+import itertools
 import random  # Needed for escape % and Rogue crit chance
+import struct
+import sys
+from array import array
+from collections import deque
+from collections.abc import MutableMapping
+from types import MappingProxyType
 
 # Basic enemy stat templates for creation.
 # This lets us reference enemy types easily and avoids repeated code.
+# "spawn" holds (min_level, max_level or None, weight) entries for random
+# encounters. main replaces these with data/enemies.txt via set_enemy_types.
 ENEMY_STATS = {
     "goblin": {
         "name": "Goblin",
@@ -28,6 +40,7 @@ ENEMY_STATS = {
         "magic": 2,
         "xp_reward": 25,
         "gold_reward": 10,
+        "spawn": ((1, 2, 80), (3, 5, 30)),
     },
     "orc": {
         "name": "Orc",
@@ -36,6 +49,7 @@ ENEMY_STATS = {
         "magic": 5,
         "xp_reward": 50,
         "gold_reward": 25,
+        "spawn": ((1, 2, 20), (3, 5, 60), (6, None, 40)),
     },
     "dragon": {
         "name": "Dragon",
@@ -44,6 +58,7 @@ ENEMY_STATS = {
         "magic": 15,
         "xp_reward": 200,
         "gold_reward": 100,
+        "spawn": ((3, 5, 10), (6, None, 60)),
     },
 }
 
@@ -59,21 +74,39 @@ def create_enemy(enemy_type):
     - orc: health=80, strength=12, magic=5, xp_reward=50, gold_reward=25
     - dragon: health=200, strength=25, magic=15, xp_reward=200, gold_reward=100
     
-    Returns: Enemy dictionary
+    Returns: Enemy (reads and writes like the old enemy dictionary)
     Raises: InvalidTargetError if enemy_type not recognized
     """
     # TODO: Implement enemy creation
 
-    enemy_type = enemy_type.lower()  # Normalize input so "Goblin"/"goblin" both work
+    template = _enemy_templates.get(enemy_type)
+    if template is None:
+        template = _build_enemy_template(enemy_type)
+    return Enemy(template)
 
-    if enemy_type not in ENEMY_STATS:
+
+def _build_enemy_template(enemy_type):
+    """
+    Make (and cache) the shared read-only stats for an enemy type
+    """
+    key = enemy_type.lower()  # Normalize input so "Goblin"/"goblin" both work
+
+    if key not in ENEMY_STATS:
         # The test expects InvalidTargetError for unknown enemy names
-        raise InvalidTargetError(f"Enemy type '{enemy_type}' does not exist.")
+        raise InvalidTargetError(f"Enemy type '{key}' does not exist.")
 
-    base = ENEMY_STATS[enemy_type]  # Get template
+    template = _enemy_templates.get(key)
+    if template is None:
+        template = _freeze_enemy_stats(ENEMY_STATS[key])
+        _enemy_templates[key] = template
+    # Cache under the name as given too, so repeat lookups skip lower()
+    _enemy_templates[enemy_type] = template
+    return template
 
-    # Build a fresh enemy dictionary so edits don't modify template
-    enemy = {
+
+def _freeze_enemy_stats(base):
+    """Build the read-only template mapping from ENEMY_STATS data"""
+    return MappingProxyType({
         "name": base["name"],
         "health": base["health"],
         "max_health": base["health"],  # Copy base health
@@ -81,36 +114,262 @@ def create_enemy(enemy_type):
         "magic": base["magic"],
         "xp_reward": base["xp_reward"],
         "gold_reward": base["gold_reward"],
-    }
-    return enemy
+    })
+
 
+# Enemy type -> shared template (rebuilt after set_enemy_types)
+_enemy_templates = {}
 
-def get_random_enemy_for_level(character_level):
+
+class Enemy(MutableMapping):
+    """
+    One enemy: a shared read-only template plus its own current health
+
+    Every goblin points at the same template mapping; the instance only
+    stores health and, if anything else is assigned (status effects, a
+    "speed" stat, a buffed strength), a small dict of overrides. Reads and
+    writes use the same keys as the old enemy dictionaries, and enemies
+    compare equal to dicts with the same contents.
     """
-    Return enemy type appropriate for character level
+
+    __slots__ = ("template", "health", "overrides")
+
+    def __init__(self, template, health=None, overrides=None):
+        if not isinstance(template, MappingProxyType):
+            template = MappingProxyType(dict(template))
+        self.template = template
+        self.health = template["health"] if health is None else health
+        self.overrides = overrides
+
+    def __getitem__(self, key):
+        if key == "health":
+            return self.health
+        if self.overrides is not None and key in self.overrides:
+            return self.overrides[key]
+        return self.template[key]
+
+    def get(self, key, default=None):
+        if key == "health":
+            return self.health
+        if self.overrides is not None and key in self.overrides:
+            return self.overrides[key]
+        return self.template.get(key, default)
+
+    def __setitem__(self, key, value):
+        if key == "health":
+            self.health = value
+            return
+        if self.overrides is None:
+            self.overrides = {}
+        self.overrides[key] = value
+
+    def __delitem__(self, key):
+        if self.overrides is None or key not in self.overrides:
+            raise KeyError(f"Can't remove template stat '{key}'.")
+        del self.overrides[key]
+
+    def __contains__(self, key):
+        return key in self.template or (self.overrides is not None and key in self.overrides)
+
+    def __iter__(self):
+        yield from self.template
+        if self.overrides:
+            for key in self.overrides:
+                if key not in self.template:
+                    yield key
+
+    def __len__(self):
+        extra = 0
+        if self.overrides:
+            extra = sum(1 for key in self.overrides if key not in self.template)
+        return len(self.template) + extra
+
+    def __reduce__(self):
+        # MappingProxyType can't be pickled; copies get their own template
+        return (Enemy, (dict(self.template), self.health, self.overrides))
+
+    def __repr__(self):
+        return f"Enemy({dict(self)!r})"
+
+
+def get_random_enemy_for_level(character_level, rng=None):
+    """
+    Return a random enemy for the character's level
+
+    The enemy type is drawn from the spawn weights in ENEMY_STATS (see
+    SpawnTable), so each level can have a mix of enemies.
+
+    Raises: InvalidTargetError if nothing spawns at that level
     """
     # TODO: Implement level-appropriate enemy selection
 
-    # Simple level brackets required by tests
-    if character_level <= 2:
-        enemy_type = "goblin"
-    elif character_level <= 5:
-        enemy_type = "orc"
-    else:
-        enemy_type = "dragon"
+    enemy_type = get_spawn_table().sample(character_level, rng)
 
     # Reuse create_enemy so all validation stays consistent
     return create_enemy(enemy_type)
 
+# ============================================================================
+# ENEMY SPAWNING
+# ============================================================================
+
+class AliasTable:
+    """
+    Weighted random choice in O(1) per draw (Vose's alias method)
+
+    Building splits the weights into n equal columns, each holding at most
+    two choices: its own (with probability prob[i]) and alias[i]. A draw
+    picks a column and a side of it from a single random() call.
+    """
+
+    __slots__ = ("choices", "prob", "alias")
+
+    def __init__(self, choices, weights):
+        pairs = [(c, w) for c, w in zip(choices, weights) if w > 0]
+        if not pairs:
+            raise ValueError("AliasTable needs at least one positive weight.")
+
+        self.choices = tuple(c for c, _ in pairs)
+        count = len(pairs)
+        total = sum(w for _, w in pairs)
+        scaled = [w * count / total for _, w in pairs]
+        self.prob = [1.0] * count
+        self.alias = list(range(count))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Anything left over is (up to rounding) exactly full
+
+    def sample(self, rng=None):
+        """Draw one choice (rng: optional random.Random)"""
+        position = (rng if rng is not None else random).random() * len(self.choices)
+        column = int(position)
+        if position - column < self.prob[column]:
+            return self.choices[column]
+        return self.choices[self.alias[column]]
+
+class SpawnTable:
+    """
+    Per-level AliasTables built from each enemy type's "spawn" weights
+
+    Levels from 1 up to the last level where any range starts or ends get
+    their own table (levels with identical weights share one); higher
+    levels only match open-ended ranges, so they reuse the last table.
+    """
+
+    def __init__(self, enemy_stats):
+        spawns = {enemy_type: stats.get("spawn", ()) for enemy_type, stats in enemy_stats.items()}
+
+        last_level = 1
+        for entries in spawns.values():
+            for min_level, max_level, _ in entries:
+                last_level = max(last_level, min_level, (max_level or 0) + 1)
+
+        shared = {}
+        self.tables = [None]    # index 0 unused; levels start at 1
+        for level in range(1, last_level + 1):
+            weights = {}
+            for enemy_type, entries in spawns.items():
+                for min_level, max_level, weight in entries:
+                    if min_level <= level and (max_level is None or level <= max_level):
+                        weights[enemy_type] = weights.get(enemy_type, 0) + weight
+            key = tuple(sorted((t, w) for t, w in weights.items() if w > 0))
+            if key not in shared:
+                shared[key] = AliasTable(*zip(*key)) if key else None
+            self.tables.append(shared[key])
+
+    def table_for(self, level):
+        """Return the AliasTable for a level (None if nothing spawns)"""
+        return self.tables[min(max(level, 1), len(self.tables) - 1)]
+
+    def sample(self, level, rng=None):
+        """
+        Draw an enemy type for a level
+
+        Raises: InvalidTargetError if nothing spawns at that level
+        """
+        table = self.table_for(level)
+        if table is None:
+            raise InvalidTargetError(f"No enemies spawn at level {level}.")
+        return table.sample(rng)
+
+_spawn_table = None
+
+def get_spawn_table():
+    """Return the SpawnTable for ENEMY_STATS (built on first use)"""
+    global _spawn_table
+    if _spawn_table is None:
+        _spawn_table = SpawnTable(ENEMY_STATS)
+    return _spawn_table
+
+def set_enemy_types(enemy_data):
+    """
+    Replace the enemy templates (e.g. with game_data.load_enemies output)
+
+    ENEMY_STATS is updated in place so modules that imported it see the
+    new types, and the spawn table is rebuilt on next use.
+    """
+    global _spawn_table
+    ENEMY_STATS.clear()
+    for enemy_id, enemy in enemy_data.items():
+        ENEMY_STATS[enemy_id.lower()] = {
+            "name": enemy["name"],
+            "health": enemy["health"],
+            "strength": enemy["strength"],
+            "magic": enemy["magic"],
+            "xp_reward": enemy["xp_reward"],
+            "gold_reward": enemy["gold_reward"],
+            "spawn": tuple(enemy.get("spawn", ())),
+        }
+    _spawn_table = None
+    _enemy_templates.clear()
+
 # ============================================================================
 # COMBAT SYSTEM
 # ============================================================================
 
+def calculate_damage(attacker, defender):
+    """
+    Basic attack damage: attacker strength - (defender strength // 4), min 1
+
+    Shared by SimpleBattle and the batch simulator so both use one formula.
+    """
+    atk = int(attacker.get("strength", 0))
+    defense = int(defender.get("strength", 0)) // 4
+
+    # Damage formula ensures weaker defenders take more damage
+    damage = atk - defense
+
+    # Tests require minimum damage of at least 1
+    if damage < 1:
+        damage = 1
+
+    return damage
+
+def apply_damage(target, damage):
+    """
+    Reduce target health, cannot go negative (shared by all battle types)
+    """
+    hp = target.get("health", 0) - damage
+    if hp < 0:
+        hp = 0
+    target["health"] = hp
+
 class SimpleBattle:
 
-    def __init__(self, character, enemy):
+    def __init__(self, character, enemy, recorder=None, rng=None):
         """
         Create a battle instance.
+
+        recorder: Optional BattleRecord that every action is written to
+        rng: Optional random.Random for escapes and crits (default: the
+             global random module)
         """
         # TODO: Implement initialization
 
@@ -118,6 +377,11 @@ class SimpleBattle:
         self.enemy = enemy                 # Store enemy reference
         self.combat_active = True          # Needed so tests know combat is "on"
         self.turn_count = 0                # Helps track turns if needed later
+        self.recorder = recorder
+        self.rng = rng if rng is not None else random
+        self.cooldowns = CooldownScheduler()
+        if recorder is not None:
+            recorder.start(character, enemy)
 
     def start_battle(self):
         """
@@ -130,21 +394,25 @@ class SimpleBattle:
             raise CharacterDeadError("Cannot start battle when dead.")
 
         # Auto-battle loop to satisfy tests without requiring user input
-        while self.combat_active:
-
-            self.turn_count += 1
-
-            # Player attacks first
-            self.player_turn()
-            winner = self.check_battle_end()
-            if winner is not None:
-                break
-
-            # Enemy responds
-            self.enemy_turn()
-            winner = self.check_battle_end()
-            if winner is not None:
-                break
+        try:
+            while self.combat_active:
+
+                self.turn_count += 1
+
+                # Player attacks first
+                self.player_turn()
+                winner = self.check_battle_end()
+                if winner is not None:
+                    break
+
+                # Enemy responds
+                self.enemy_turn()
+                winner = self.check_battle_end()
+                if winner is not None:
+                    break
+        finally:
+            # Buffered log sinks write the whole battle at once
+            flush_battle_log()
 
         # If player wins, return rewards in required structure
         if winner == "player":
@@ -173,8 +441,11 @@ class SimpleBattle:
 
         # Apply damage to enemy
         self.apply_damage(self.enemy, damage)
+        if self.recorder is not None:
+            self.recorder.turn = self.turn_count
+            self.recorder.add(ACTOR_PLAYER, ACTION_ATTACK, damage, self.enemy["health"])
 
-        display_battle_log(f"{self.character.get('name', 'Hero')} hits for {damage} damage.")
+        display_battle_log("{} hits for {} damage.", self.character.get('name', 'Hero'), damage)
 
     def enemy_turn(self):
         """
@@ -187,26 +458,22 @@ class SimpleBattle:
 
         damage = self.calculate_damage(self.enemy, self.character)
         self.apply_damage(self.character, damage)
+        if self.recorder is not None:
+            self.recorder.turn = self.turn_count
+            self.recorder.add(ACTOR_ENEMY, ACTION_ATTACK, damage, self.character["health"])
 
-        display_battle_log(f"{self.enemy.get('name', 'Enemy')} hits for {damage} damage.")
+        display_battle_log("{} hits for {} damage.", self.enemy.get('name', 'Enemy'), damage)
 
     def calculate_damage(self, attacker, defender):
         """
         Damage = attacker strength - (defender strength // 4)
+
+        "strength" is already the effective value (base + equipment), since
+        inventory_system keeps it updated on equip/unequip.
         """
         # TODO: Implement damage calculation
 
-        atk = int(attacker.get("strength", 0))
-        defense = int(defender.get("strength", 0)) // 4
-
-        # Damage formula ensures weaker defenders take more damage
-        damage = atk - defense
-
-        # Tests require minimum damage of at least 1
-        if damage < 1:
-            damage = 1
-
-        return damage
+        return calculate_damage(attacker, defender)
 
     def apply_damage(self, target, damage):
         """
@@ -214,10 +481,7 @@ class SimpleBattle:
         """
         # TODO: Implement damage application
 
-        hp = target.get("health", 0) - damage
-        if hp < 0:
-            hp = 0
-        target["health"] = hp
+        apply_damage(target, damage)
 
     def check_battle_end(self):
         """
@@ -242,7 +506,14 @@ class SimpleBattle:
             return False
 
         # Random chance check
-        if random.random() < 0.5:
+        roll = self.rng.random()
+        escaped = roll < 0.5
+        if self.recorder is not None:
+            self.recorder.turn = self.turn_count
+            self.recorder.add(ACTOR_PLAYER, ACTION_ESCAPE, int(escaped),
+                              self.character.get("health", 0), roll, escaped)
+
+        if escaped:
             display_battle_log("Escape succeeded!")
             self.combat_active = False
             return True
@@ -250,63 +521,356 @@ class SimpleBattle:
         display_battle_log("Escape failed!")
         return False
 
+    def ability_ready(self):
+        """
+        True if the character's class ability is off cooldown this turn
+        """
+        return self.cooldowns.is_ready(("player", self.character.get("class", "")),
+                                       self.turn_count)
+
+    def special_ability(self):
+        """
+        Use the character's class ability on this battle's enemy
+
+        The ability then cools down for ABILITY_COOLDOWNS[class] turns.
+
+        Raises: CombatNotActiveError if the battle is over
+                AbilityOnCooldownError if the ability was used too recently
+        """
+        if not self.combat_active:
+            raise CombatNotActiveError("Battle is not active.")
+
+        char_class = self.character.get("class", "")
+        key = ("player", char_class)
+        self.cooldowns.advance(self.turn_count)
+        if not self.cooldowns.is_ready(key, self.turn_count):
+            turns_left = self.cooldowns.remaining(key, self.turn_count)
+            raise AbilityOnCooldownError(
+                f"{char_class} ability is on cooldown for {turns_left} more turn(s)."
+            )
+
+        if self.recorder is not None:
+            self.recorder.turn = self.turn_count
+        result = use_special_ability(self.character, self.enemy, self.recorder, self.rng)
+        self.cooldowns.start(key, self.turn_count, ABILITY_COOLDOWNS.get(char_class, 0))
+        return result
+
+# ============================================================================
+# MULTI-COMBATANT ENCOUNTERS
+# ============================================================================
+
+PARTY = 0
+ENEMIES = 1
+
+# Combatants without a "speed" stat use DEFAULT_SPEED, which acts once
+# per round; speed 20 acts twice per round, speed 5 every other round
+DEFAULT_SPEED = 10
+ROUND_LENGTH = 100
+
+TARGETING_MODES = ("lowest", "random")
+
+class Encounter:
+    """
+    A party of characters against a group of enemies
+
+    Turn order comes from an initiative heap of (next action time,
+    combatant): each action pushes the combatant back in after
+    ROUND_LENGTH * DEFAULT_SPEED / speed. Every combatant attacks one
+    opponent with calculate_damage/apply_damage.
+
+    Targeting never rescans a side:
+    - "lowest": a heap of (health, combatant) per side; entries go stale
+      when a combatant is hit or dies and are dropped when they reach
+      the top
+    - "random": a list of living combatants per side plus each one's
+      position in it, so picks and removals are O(1)
+    """
+
+    def __init__(self, party, enemies, targeting="lowest", rng=None):
+        """
+        Raises: ValueError for an unknown targeting mode
+                CharacterDeadError if no party member is alive
+                InvalidTargetError if no enemy is alive
+        """
+        if targeting not in TARGETING_MODES:
+            raise ValueError(f"Unknown targeting mode: {targeting}")
+
+        self.combatants = list(party) + list(enemies)
+        self.sides = [PARTY] * len(party) + [ENEMIES] * len(enemies)
+        self.targeting = targeting
+        self.rng = rng if rng is not None else random
+        self.round = 0
+
+        self._sequence = itertools.count()
+        self._alive = ([], [])
+        self._alive_position = {}
+        self._by_health = ([], [])
+        self._initiative = []
+
+        for index, combatant in enumerate(self.combatants):
+            if combatant.get("health", 0) > 0:
+                self._add_alive(index)
+                heapq.heappush(self._initiative,
+                               (self._action_delay(index), next(self._sequence), index))
+
+        if not self._alive[PARTY]:
+            raise CharacterDeadError("Cannot start an encounter with no living party members.")
+        if not self._alive[ENEMIES]:
+            raise InvalidTargetError("No living enemies to fight.")
+
+    def _action_delay(self, index):
+        speed = self.combatants[index].get("speed", DEFAULT_SPEED)
+        return ROUND_LENGTH * DEFAULT_SPEED / max(speed, 1)
+
+    def _add_alive(self, index):
+        side = self.sides[index]
+        self._alive_position[index] = len(self._alive[side])
+        self._alive[side].append(index)
+        heapq.heappush(self._by_health[side],
+                       (self.combatants[index]["health"], next(self._sequence), index))
+
+    def _remove_alive(self, index):
+        # Swap the last living combatant into the gap
+        alive = self._alive[self.sides[index]]
+        position = self._alive_position.pop(index)
+        last = alive.pop()
+        if last != index:
+            alive[position] = last
+            self._alive_position[last] = position
+
+    def _pick_target(self, side):
+        if self.targeting == "random":
+            alive = self._alive[side]
+            return alive[int(self.rng.random() * len(alive))]
+
+        heap = self._by_health[side]
+        while heap:
+            health, _, index = heap[0]
+            if index in self._alive_position and self.combatants[index]["health"] == health:
+                return index
+            heapq.heappop(heap)
+        return None
+
+    def alive_count(self, side):
+        """Number of living combatants on a side (PARTY or ENEMIES)"""
+        return len(self._alive[side])
+
+    def check_encounter_end(self):
+        """Return "party", "enemies" or None if both sides are standing"""
+        if not self._alive[ENEMIES]:
+            return "party"
+        if not self._alive[PARTY]:
+            return "enemies"
+        return None
+
+    def attack(self, index):
+        """
+        Combatant `index` attacks a target on the other side
+        """
+        attacker = self.combatants[index]
+        target_side = ENEMIES if self.sides[index] == PARTY else PARTY
+        target_index = self._pick_target(target_side)
+        if target_index is None:
+            return
+        target = self.combatants[target_index]
+
+        damage = calculate_damage(attacker, target)
+        apply_damage(target, damage)
+        display_battle_log("{} hits {} for {} damage.",
+                           attacker.get("name", "?"), target.get("name", "?"), damage)
+
+        if target["health"] <= 0:
+            self._remove_alive(target_index)
+            display_battle_log("{} is defeated!", target.get("name", "?"))
+        else:
+            heapq.heappush(self._by_health[target_side],
+                           (target["health"], next(self._sequence), target_index))
+
+    def run_round(self):
+        """
+        Let everyone whose turn falls in the next round act
+
+        Returns: Number of attacks made
+        """
+        self.round += 1
+        round_end = self.round * ROUND_LENGTH
+        initiative = self._initiative
+        actions = 0
+
+        while initiative and initiative[0][0] <= round_end:
+            if self.check_encounter_end() is not None:
+                break
+            time, _, index = heapq.heappop(initiative)
+            if index not in self._alive_position:
+                continue    # defeated since its last turn
+            self.attack(index)
+            actions += 1
+            heapq.heappush(initiative, (time + self._action_delay(index), next(self._sequence), index))
+        return actions
+
+    def run(self, max_rounds=1000):
+        """
+        Fight until one side is defeated (or max_rounds pass)
+
+        Returns: Dictionary with winner ("party", "enemies" or None),
+                 rounds, party_alive, enemies_alive, and the xp_gained /
+                 gold_gained for all defeated enemies if the party won
+        """
+        try:
+            while self.check_encounter_end() is None and self.round < max_rounds:
+                self.run_round()
+        finally:
+            flush_battle_log()
+
+        winner = self.check_encounter_end()
+        xp = gold = 0
+        if winner == "party":
+            for index, combatant in enumerate(self.combatants):
+                if self.sides[index] == ENEMIES:
+                    rewards = get_victory_rewards(combatant)
+                    xp += rewards["xp"]
+                    gold += rewards["gold"]
+
+        return {
+            "winner": winner,
+            "rounds": self.round,
+            "party_alive": self.alive_count(PARTY),
+            "enemies_alive": self.alive_count(ENEMIES),
+            "xp_gained": xp,
+            "gold_gained": gold,
+        }
+
+# ============================================================================
+# ABILITY COOLDOWNS
+# ============================================================================
+
+# Turns before a class ability can be used again (used on turn t -> ready on t + n)
+ABILITY_COOLDOWNS = {
+    "Warrior": 3,
+    "Mage": 3,
+    "Rogue": 2,
+    "Cleric": 4,
+}
+
+class CooldownScheduler:
+    """
+    Tracks when abilities come off cooldown, indexed by turn
+
+    Keys are any hashable (e.g. (combatant, ability)). ready_at gives the
+    turn each cooling ability is usable again, so checks are O(1). A heap
+    of (ready_turn, key) lets advance() find the abilities that just came
+    off cooldown in O(expired * log n) instead of scanning them all.
+    """
+
+    __slots__ = ("ready_at", "_heap", "_sequence")
+
+    def __init__(self):
+        self.ready_at = {}
+        self._heap = []
+        self._sequence = 0   # tie-breaker so keys never get compared
+
+    def start(self, key, turn, cooldown):
+        """Put key on cooldown from `turn` for `cooldown` turns"""
+        if cooldown <= 0:
+            self.ready_at.pop(key, None)
+            return
+        ready_turn = turn + cooldown
+        self.ready_at[key] = ready_turn
+        self._sequence += 1
+        heapq.heappush(self._heap, (ready_turn, self._sequence, key))
+
+    def is_ready(self, key, turn):
+        """True if key is not cooling down on `turn`"""
+        return self.ready_at.get(key, turn) <= turn
+
+    def remaining(self, key, turn):
+        """Turns left before key is ready (0 if ready)"""
+        return max(self.ready_at.get(key, turn) - turn, 0)
+
+    def advance(self, turn):
+        """
+        Drop every cooldown that has ended by `turn`
+
+        Returns: List of keys that came off cooldown
+        """
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= turn:
+            ready_turn, _, key = heapq.heappop(heap)
+            # Skip stale entries from a key that was put on cooldown again
+            if self.ready_at.get(key) == ready_turn:
+                del self.ready_at[key]
+                expired.append(key)
+        return expired
+
+    def __len__(self):
+        return len(self.ready_at)
+
 # ============================================================================
 # SPECIAL ABILITIES
 # ============================================================================
 
-def use_special_ability(character, enemy):
+def use_special_ability(character, enemy, recorder=None, rng=None):
     """
     Route to correct special ability based on class.
+
+    recorder: Optional BattleRecord to log the ability as an event
+    rng: Optional random.Random for abilities that roll (Rogue)
     """
     # TODO: Implement special abilities
 
     char_class = character.get("class", "")
 
     if char_class == "Warrior":
-        return warrior_power_strike(character, enemy)
+        return warrior_power_strike(character, enemy, recorder)
     elif char_class == "Mage":
-        return mage_fireball(character, enemy)
+        return mage_fireball(character, enemy, recorder)
     elif char_class == "Rogue":
-        return rogue_critical_strike(character, enemy)
+        return rogue_critical_strike(character, enemy, recorder, rng)
     elif char_class == "Cleric":
-        return cleric_heal(character)
+        return cleric_heal(character, recorder)
     else:
         return "No special ability available."
 
 
-def warrior_power_strike(character, enemy):
+def warrior_power_strike(character, enemy, recorder=None):
     """Warrior doubles their STR for a powerful strike"""
     # TODO: Implement power strike
 
     damage = character.get("strength", 0) * 2
     new_hp = max(enemy.get("health", 0) - damage, 0)
     enemy["health"] = new_hp
+    if recorder is not None:
+        recorder.add(ACTOR_PLAYER, ACTION_POWER_STRIKE, damage, new_hp)
 
     msg = f"{character.get('name', 'Warrior')} uses Power Strike for {damage} damage!"
     display_battle_log(msg)
     return msg
 
 
-def mage_fireball(character, enemy):
+def mage_fireball(character, enemy, recorder=None):
     """Mage uses magic for double magic damage"""
     # TODO: Implement fireball
 
     damage = character.get("magic", 0) * 2
     new_hp = max(enemy.get("health", 0) - damage, 0)
     enemy["health"] = new_hp
+    if recorder is not None:
+        recorder.add(ACTOR_PLAYER, ACTION_FIREBALL, damage, new_hp)
 
     msg = f"{character.get('name', 'Mage')} casts Fireball for {damage} damage!"
     display_battle_log(msg)
     return msg
 
 
-def rogue_critical_strike(character, enemy):
+def rogue_critical_strike(character, enemy, recorder=None, rng=None):
     """Rogue: 50% chance to deal triple damage"""
     # TODO: Implement critical strike
 
     strength = character.get("strength", 0)
 
-    if random.random() < 0.5:
+    roll = (rng if rng is not None else random).random()
+    if roll < 0.5:
         # Crit happens
         damage = strength * 3
         crit = True
@@ -317,6 +881,8 @@ def rogue_critical_strike(character, enemy):
 
     new_hp = max(enemy.get("health", 0) - damage, 0)
     enemy["health"] = new_hp
+    if recorder is not None:
+        recorder.add(ACTOR_PLAYER, ACTION_CRITICAL_STRIKE, damage, new_hp, roll, crit)
 
     if crit:
         msg = f"{character.get('name', 'Rogue')} lands a CRITICAL STRIKE for {damage}!"
@@ -327,7 +893,7 @@ def rogue_critical_strike(character, enemy):
     return msg
 
 
-def cleric_heal(character):
+def cleric_heal(character, recorder=None):
     """Cleric restores 30 HP"""
     # TODO: Implement healing
 
@@ -336,6 +902,8 @@ def cleric_heal(character):
     character["health"] = healed_hp
 
     amount = healed_hp - old_hp
+    if recorder is not None:
+        recorder.add(ACTOR_PLAYER, ACTION_HEAL, amount, healed_hp)
     msg = f"{character.get('name', 'Cleric')} heals for {amount} HP."
     display_battle_log(msg)
     return msg
@@ -376,13 +944,551 @@ def display_combat_stats(character, enemy):
     pass
 
 
-def display_battle_log(message):
+def display_battle_log(message, *args):
     """
-    Print battle text (kept simple for grading)
+    Send battle text to the current log sink
+
+    If args are given, message is a str.format template and is only
+    formatted if the sink keeps it, so silent runs skip the formatting.
     """
     # TODO: Implement battle log display
-    print(f">>> {message}")
-    pass
+    _battle_log_sink.log(message, args)
+
+
+def flush_battle_log():
+    """
+    Write out anything the current sink is holding (end of a battle)
+    """
+    _battle_log_sink.flush()
+
+# ============================================================================
+# BATTLE LOG SINKS
+# ============================================================================
+
+def format_log_message(message, args):
+    """Build the final text of a (template, args) log entry"""
+    return message.format(*args) if args else message
+
+class PrintLogSink:
+    """Default sink: print each message right away"""
+
+    def log(self, message, args):
+        print(f">>> {format_log_message(message, args)}")
+
+    def flush(self):
+        pass
+
+class NullLogSink:
+    """Discard every message (headless runs and simulations)"""
+
+    def log(self, message, args):
+        pass
+
+    def flush(self):
+        pass
+
+class RingBufferLogSink:
+    """
+    Keep only the last `capacity` messages in memory
+
+    Entries are stored unformatted and only built when read.
+    """
+
+    def __init__(self, capacity=100):
+        self.entries = deque(maxlen=capacity)
+
+    def log(self, message, args):
+        self.entries.append((message, args))
+
+    def flush(self):
+        pass
+
+    def messages(self):
+        """Return the kept messages, oldest first"""
+        return [format_log_message(message, args) for message, args in self.entries]
+
+    def clear(self):
+        self.entries.clear()
+
+class BatchedLogSink:
+    """
+    Collect messages and write them to a stream in one call per battle
+
+    Args:
+        stream: File-like object with write() (default: sys.stdout at flush time)
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.pending = []
+
+    def log(self, message, args):
+        self.pending.append((message, args))
+
+    def flush(self):
+        if not self.pending:
+            return
+        text = "".join(
+            f">>> {format_log_message(message, args)}\n" for message, args in self.pending
+        )
+        self.pending.clear()
+        (self.stream or sys.stdout).write(text)
+
+_battle_log_sink = PrintLogSink()
+
+def get_battle_log_sink():
+    """Return the sink display_battle_log currently writes to"""
+    return _battle_log_sink
+
+def set_battle_log_sink(sink):
+    """
+    Route battle text to a different sink
+
+    Anything still buffered in the old sink is flushed first.
+
+    Returns: The previous sink (so callers can put it back)
+    """
+    global _battle_log_sink
+    previous = _battle_log_sink
+    previous.flush()
+    _battle_log_sink = sink if sink is not None else PrintLogSink()
+    return previous
+
+# ============================================================================
+# RANDOM NUMBER STREAMS
+# ============================================================================
+
+def split_seed(seed, *path):
+    """
+    Derive an independent seed for a sub-stream of `seed`
+
+    path names the sub-stream, e.g. split_seed(seed, worker) for a worker
+    process and split_seed(seed, worker, battle) for one of its battles.
+    The result depends only on the arguments, so every worker can make
+    its own streams without talking to the others, and a run can be
+    repeated exactly from the top-level seed.
+
+    Each part is hashed as its repr behind a length prefix, so different
+    paths never share a seed: (0, "a:b") vs (0, "a", "b"), or 1 vs "1".
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for part in (seed,) + path:
+        text = repr(part).encode()
+        digest.update(len(text).to_bytes(8, "little"))
+        digest.update(text)
+    return int.from_bytes(digest.digest(), "little")
+
+def make_battle_rng(seed, *path):
+    """
+    Return a random.Random for one stream (see split_seed)
+
+    random.Random is the same generator the global random functions use,
+    so battles run just as fast with their own stream.
+    """
+    return random.Random(split_seed(seed, *path))
+
+# ============================================================================
+# BATTLE PREDICTION
+# ============================================================================
+
+def _resolve_battle(character_health, enemy_health, player_damage, enemy_damage):
+    """
+    Closed-form outcome of a basic-attack battle
+
+    The player needs ceil(enemy_health / player_damage) hits (at least one,
+    since start_battle always swings once) and the enemy needs
+    ceil(character_health / enemy_damage). The player attacks first, so
+    they win ties.
+
+    Returns: (player_won, turns, character_health, enemy_health)
+    """
+    player_hits = max(1, -(-enemy_health // player_damage))
+    enemy_hits = -(-character_health // enemy_damage)
+
+    if player_hits <= enemy_hits:
+        return True, player_hits, character_health - (player_hits - 1) * enemy_damage, 0
+    return False, enemy_hits, 0, enemy_health - enemy_hits * player_damage
+
+def predict_battle(character, enemy):
+    """
+    Work out the result of SimpleBattle.start_battle without running it
+
+    Basic attacks always deal the same damage, so the winner, turn count
+    and final health follow directly from the starting numbers. Nothing
+    is printed and neither dictionary is modified. Only covers basic
+    attacks; battles with special abilities or escapes still need the
+    turn-by-turn loop.
+
+    Returns: Dictionary with the same winner/xp_gained/gold_gained keys as
+             start_battle, plus turns, character_health and enemy_health
+    Raises: CharacterDeadError if character health is 0 or less
+    """
+    if character.get("health", 0) <= 0:
+        raise CharacterDeadError("Cannot start battle when dead.")
+
+    player_won, turns, character_health, enemy_health = _resolve_battle(
+        character.get("health", 0),
+        max(enemy.get("health", 0), 0),
+        calculate_damage(character, enemy),
+        calculate_damage(enemy, character),
+    )
+
+    if player_won:
+        rewards = get_victory_rewards(enemy)
+        result = {"winner": "player", "xp_gained": rewards["xp"], "gold_gained": rewards["gold"]}
+    else:
+        result = {"winner": "enemy", "xp_gained": 0, "gold_gained": 0}
+
+    result["turns"] = turns
+    result["character_health"] = character_health
+    result["enemy_health"] = enemy_health
+    return result
+
+# ============================================================================
+# BATCH SIMULATION
+# ============================================================================
+
+def simulate_battles(characters, enemies):
+    """
+    Run many basic-attack battles at once without printing
+
+    characters[i] fights enemies[i] using the same rules as
+    SimpleBattle.start_battle: the player attacks first, damage comes from
+    calculate_damage, and health never drops below 0. The battles are kept
+    as parallel arrays (health and damage per battle), and each one is
+    resolved with the same closed form as predict_battle. The input
+    dictionaries are not modified.
+
+    Returns: Dictionary with
+        battles, wins, win_rate,
+        turns: array of turn counts (same as SimpleBattle.turn_count),
+        turn_counts: {turns: number of battles} for the turns-to-kill spread,
+        character_health / enemy_health: arrays of remaining health
+    Raises: ValueError if the lists have different lengths
+            CharacterDeadError if any character starts at 0 health
+    """
+    if len(characters) != len(enemies):
+        raise ValueError("Need one enemy per character.")
+
+    for character in characters:
+        if character.get("health", 0) <= 0:
+            raise CharacterDeadError("Cannot start battle when dead.")
+
+    count = len(characters)
+    character_health = array("q", (c.get("health", 0) for c in characters))
+    enemy_health = array("q", (e.get("health", 0) for e in enemies))
+    player_damage = array("q", map(calculate_damage, characters, enemies))
+    enemy_damage = array("q", map(calculate_damage, enemies, characters))
+    turns = array("I", bytes(4 * count))
+
+    # Each battle is deterministic, so it resolves in closed form
+    wins = 0
+    for i in range(count):
+        player_won, turns[i], character_health[i], enemy_health[i] = _resolve_battle(
+            character_health[i], enemy_health[i], player_damage[i], enemy_damage[i]
+        )
+        wins += player_won
+
+    turn_counts = {}
+    for t in turns:
+        turn_counts[t] = turn_counts.get(t, 0) + 1
+
+    return {
+        "battles": count,
+        "wins": wins,
+        "win_rate": wins / count if count else 0.0,
+        "turns": turns,
+        "turn_counts": dict(sorted(turn_counts.items())),
+        "character_health": character_health,
+        "enemy_health": enemy_health,
+    }
+
+# ============================================================================
+# BATTLE REPLAYS
+# ============================================================================
+
+ACTOR_PLAYER = 0
+ACTOR_ENEMY = 1
+
+ACTION_ATTACK = 0
+ACTION_POWER_STRIKE = 1
+ACTION_FIREBALL = 2
+ACTION_CRITICAL_STRIKE = 3
+ACTION_HEAL = 4
+ACTION_ESCAPE = 5
+
+# Event flag bits
+FLAG_ROLLED = 1     # the action drew a random number (stored in rolls)
+FLAG_SUCCESS = 2    # the roll succeeded (critical hit / escaped)
+
+# Text the replayer shows for each action: (template, template on success)
+REPLAY_MESSAGES = {
+    ACTION_ATTACK: ("{} hits for {} damage.", None),
+    ACTION_POWER_STRIKE: ("{} uses Power Strike for {} damage!", None),
+    ACTION_FIREBALL: ("{} casts Fireball for {} damage!", None),
+    ACTION_CRITICAL_STRIKE: ("{} strikes for {}.", "{} lands a CRITICAL STRIKE for {}!"),
+    ACTION_HEAL: ("{} heals for {} HP.", None),
+    ACTION_ESCAPE: ("Escape failed!", "Escape succeeded!"),
+}
+
+REPLAY_MAGIC = b"QCRP"
+REPLAY_VERSION = 2
+# magic, version, event count, starting character and enemy health,
+# final character and enemy health (checked when replaying)
+_REPLAY_HEADER = struct.Struct("<4sBIIIII")
+_REPLAY_ROLL = struct.Struct("<H")
+
+# Bits of an event's first byte (the low four bits are the action)
+_EVENT_ACTOR = 0x10
+_EVENT_ROLLED = 0x20
+_EVENT_SUCCESS = 0x40
+_EVENT_NEW_TURN = 0x80
+
+def _append_varint(buffer, value):
+    """Append a non-negative int, 7 bits per byte (LEB128)"""
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+def _read_varint(data, offset):
+    """
+    Read a varint written by _append_varint
+
+    Returns: (value, new offset)
+    Raises: CorruptedDataError if the data ends mid-number
+    """
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise CorruptedDataError("Replay data is truncated.")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+def _event_target(actor, action):
+    """Whose health an action changes"""
+    if action in (ACTION_HEAL, ACTION_ESCAPE):
+        return actor
+    return ACTOR_ENEMY if actor == ACTOR_PLAYER else ACTOR_PLAYER
+
+class BattleRecord:
+    """
+    Compact event log of one battle
+
+    Events are kept already encoded, one after another in a bytearray:
+    a byte holding the action, actor and flag bits, then the turn change
+    (zigzag varint, only when the turn moved), the amount (varint,
+    left out for escapes since success says it) and the random draw
+    scaled to 16 bits (only if one was drawn). A typical event is 2-3
+    bytes. Health after each event isn't stored: it follows from the
+    starting health and the amounts, and the final health in the header
+    is checked against it when replaying.
+    """
+
+    __slots__ = ("character_health", "enemy_health", "final_health", "turn",
+                 "data", "_count", "_last_turn")
+
+    def __init__(self):
+        self.character_health = 0
+        self.enemy_health = 0
+        # Health each side actually ended on, as reported by the battle
+        self.final_health = [0, 0]
+        self.turn = 0
+        self.data = bytearray()
+        self._count = 0
+        self._last_turn = 0
+
+    def start(self, character, enemy):
+        """Remember starting health (called by SimpleBattle)"""
+        self.character_health = max(character.get("health", 0), 0)
+        self.enemy_health = max(enemy.get("health", 0), 0)
+        self.final_health = [self.character_health, self.enemy_health]
+
+    def add(self, actor, action, amount, health, roll=None, success=False):
+        """Append one event for the current turn"""
+        head = action | (_EVENT_ACTOR if actor else 0)
+        if roll is not None:
+            head |= _EVENT_ROLLED
+        if success:
+            head |= _EVENT_SUCCESS
+        delta = self.turn - self._last_turn
+        if delta:
+            head |= _EVENT_NEW_TURN
+
+        data = self.data
+        data.append(head)
+        if delta:
+            _append_varint(data, delta << 1 if delta >= 0 else (-delta << 1) - 1)
+            self._last_turn = self.turn
+        if action != ACTION_ESCAPE:
+            _append_varint(data, amount)
+        if roll is not None:
+            data += _REPLAY_ROLL.pack(min(int(roll * 65536), 65535))
+
+        self.final_health[_event_target(actor, action)] = health
+        self._count += 1
+
+    def __len__(self):
+        return self._count
+
+    def events(self):
+        """
+        Yield each event as a dictionary (roll is None if nothing was drawn)
+
+        Raises: CorruptedDataError if the encoded events are malformed
+        """
+        data = self.data
+        health = [self.character_health, self.enemy_health]
+        turn = 0
+        offset = 0
+        for _ in range(self._count):
+            if offset >= len(data):
+                raise CorruptedDataError("Replay data is truncated.")
+            head = data[offset]
+            offset += 1
+            action = head & 0x0F
+            if action > ACTION_ESCAPE:
+                raise CorruptedDataError("Replay has an unknown action.")
+            actor = ACTOR_ENEMY if head & _EVENT_ACTOR else ACTOR_PLAYER
+            success = bool(head & _EVENT_SUCCESS)
+
+            if head & _EVENT_NEW_TURN:
+                zigzag, offset = _read_varint(data, offset)
+                turn += -((zigzag + 1) >> 1) if zigzag & 1 else zigzag >> 1
+            if action == ACTION_ESCAPE:
+                amount = int(success)
+            else:
+                amount, offset = _read_varint(data, offset)
+            roll = None
+            if head & _EVENT_ROLLED:
+                if offset + _REPLAY_ROLL.size > len(data):
+                    raise CorruptedDataError("Replay data is truncated.")
+                roll = _REPLAY_ROLL.unpack_from(data, offset)[0] / 65536
+                offset += _REPLAY_ROLL.size
+
+            target = _event_target(actor, action)
+            if action == ACTION_HEAL:
+                health[target] += amount
+            elif action != ACTION_ESCAPE:
+                health[target] = max(health[target] - amount, 0)
+
+            yield {
+                "turn": turn,
+                "actor": actor,
+                "action": action,
+                "amount": amount,
+                "health": health[target],
+                "roll": roll,
+                "success": success,
+            }
+        if offset != len(data):
+            raise CorruptedDataError("Replay data has trailing bytes.")
+
+    def to_bytes(self):
+        """Serialize to the binary replay format"""
+        header = _REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self._count,
+                                     self.character_health, self.enemy_health,
+                                     *self.final_health)
+        return header + bytes(self.data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Rebuild a record from to_bytes output
+
+        Raises: CorruptedDataError if the data isn't a valid replay
+        """
+        if len(data) < _REPLAY_HEADER.size:
+            raise CorruptedDataError("Replay data is too short.")
+        magic, version, count, character_health, enemy_health, final_character, final_enemy = \
+            _REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise CorruptedDataError("Not a battle replay.")
+
+        record = cls()
+        record.character_health = character_health
+        record.enemy_health = enemy_health
+        record.final_health = [final_character, final_enemy]
+        record.data = bytearray(data[_REPLAY_HEADER.size:])
+        record._count = count
+        # Decode once so malformed event data fails here, not mid-replay
+        for event in record.events():
+            record._last_turn = event["turn"]
+        return record
+
+def save_replay(record, filepath):
+    """Write a BattleRecord to a binary replay file"""
+    with open(filepath, "wb") as f:
+        f.write(record.to_bytes())
+
+def load_replay(filepath):
+    """
+    Read a binary replay file
+
+    Raises: CorruptedDataError if the file isn't a valid replay
+    """
+    with open(filepath, "rb") as f:
+        return BattleRecord.from_bytes(f.read())
+
+def replay_battle(record, character_name="Hero", enemy_name="Enemy"):
+    """
+    Play a recorded battle back through the battle log
+
+    Health comes from the recorded amounts, not from the damage formula
+    or the random number generator, so the replay matches the original
+    exactly. Where the events leave each side is checked against the
+    final health the record stored.
+
+    Returns: Dictionary with winner ("player", "enemy", "escaped" or None
+             if the battle didn't finish), turns, character_health and
+             enemy_health
+    Raises: CorruptedDataError if the events don't add up to the final health
+    """
+    health = {ACTOR_PLAYER: record.character_health, ACTOR_ENEMY: record.enemy_health}
+    names = {ACTOR_PLAYER: character_name, ACTOR_ENEMY: enemy_name}
+    escaped = False
+    turns = 0
+
+    for event in record.events():
+        actor = event["actor"]
+        action = event["action"]
+        amount = event["amount"]
+        turns = event["turn"]
+
+        if action == ACTION_ESCAPE:
+            escaped = event["success"]
+        health[_event_target(actor, action)] = event["health"]
+
+        template, success_template = REPLAY_MESSAGES[action]
+        if event["success"] and success_template:
+            template = success_template
+        display_battle_log(template, names[actor], amount)
+
+    flush_battle_log()
+
+    if [health[ACTOR_PLAYER], health[ACTOR_ENEMY]] != record.final_health:
+        raise CorruptedDataError("Replay events don't add up to the recorded final health.")
+
+    if escaped:
+        winner = "escaped"
+    elif health[ACTOR_ENEMY] <= 0:
+        winner = "player"
+    elif health[ACTOR_PLAYER] <= 0:
+        winner = "enemy"
+    else:
+        winner = None
+
+    return {
+        "winner": winner,
+        "turns": turns,
+        "character_health": health[ACTOR_PLAYER],
+        "enemy_health": health[ACTOR_ENEMY],
+    }
 
 # ============================================================================
 # TESTING
@@ -10,12 +10,60 @@ This module handles loading and validating game data from text files.
 """
 
 import os
+import sys
 from custom_exceptions import (
     InvalidDataFormatError,
     MissingDataFileError,
     CorruptedDataError
 )
 
+# ============================================================================
+# ITEM REGISTRY
+# ============================================================================
+
+class ItemRegistry:
+    """
+    Gives every item ID a small integer code (0, 1, 2, ...) and one
+    canonical string object
+
+    Inventories key their stacks by the canonical string, so every copy
+    of an ID (from saves, input, catalogs) becomes the same object and dict
+    lookups match on identity. The integer codes are for compact numeric
+    forms of an inventory (see Inventory.to_codes).
+    """
+
+    def __init__(self):
+        self.codes = {}      # item_id -> code
+        self.item_ids = []   # code -> item_id
+
+    def intern(self, item_id):
+        """Return the code for an item ID, assigning the next one if new"""
+        code = self.codes.get(item_id)
+        if code is None:
+            item_id = sys.intern(item_id)
+            code = len(self.item_ids)
+            self.codes[item_id] = code
+            self.item_ids.append(item_id)
+        return code
+
+    def canonical(self, item_id):
+        """The shared string object for an item ID, registering it if new"""
+        return self.item_ids[self.intern(item_id)]
+
+    def code_of(self, item_id):
+        """Code for an item ID, or None if it has never been registered"""
+        return self.codes.get(item_id)
+
+    def item_id_of(self, code):
+        """Item ID for a code"""
+        return self.item_ids[code]
+
+    def __len__(self):
+        return len(self.item_ids)
+
+# Shared registry used by load_items and inventory_system
+ITEM_REGISTRY = ItemRegistry()
+
 # ============================================================================
 # DATA LOADING FUNCTIONS
 # ============================================================================
@@ -99,8 +147,50 @@ def load_items(filename="data/items.txt"):
         item = parse_item_block(current_block)
         items[item["item_id"]] = item
 
+    # Give every loaded item its integer code
+    for item_id, item in items.items():
+        item["code"] = ITEM_REGISTRY.intern(item_id)
+
     return items
 
+def load_enemies(filename="data/enemies.txt"):
+    """
+    Load enemy types and their spawn weights from file
+
+    Returns: Dictionary of enemy_id -> enemy dictionary (same stat keys as
+             combat_system.ENEMY_STATS, plus "spawn")
+    """
+    if not os.path.exists(filename):
+        raise MissingDataFileError(f"Enemy file '{filename}' not found.")
+
+    try:
+        with open(filename, "r") as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        raise MissingDataFileError(f"Enemy file '{filename}' not found.")
+    except OSError:
+        raise CorruptedDataError(f"Enemy file '{filename}' is corrupted or unreadable.")
+
+    enemies = {}
+    current_block = []
+
+    # Same block-based parsing as for quests and items
+    for line in lines:
+        if line.strip() == "":
+            if current_block:
+                enemy = parse_enemy_block(current_block)
+                enemies[enemy["enemy_id"]] = enemy
+                current_block = []
+        else:
+            current_block.append(line.rstrip("\n"))
+
+    if current_block:
+        enemy = parse_enemy_block(current_block)
+        enemies[enemy["enemy_id"]] = enemy
+
+    validate_spawn_coverage(enemies)
+    return enemies
+
 def validate_quest_data(quest_dict):
     """
     Validate that quest dictionary has all required fields
@@ -152,7 +242,7 @@ def validate_item_data(item_dict):
             raise InvalidDataFormatError(f"Missing item field: {key}")
 
     # Check type is valid
-    valid_types = {"weapon", "armor", "consumable"}
+    valid_types = {"weapon", "armor", "helm", "ring", "consumable"}
     if item_dict["type"] not in valid_types:
         raise InvalidDataFormatError(f"Invalid item type: {item_dict['type']}")
 
@@ -160,6 +250,66 @@ def validate_item_data(item_dict):
     if not isinstance(item_dict["cost"], int):
         raise InvalidDataFormatError("Item 'cost' must be an integer.")
 
+    # Effect must parse now, so a bad item fails at load instead of mid-game
+    # (parse_item_block has already parsed it into "effects")
+    if "effects" not in item_dict:
+        parse_item_effects(item_dict["effect"])
+
+    return True
+
+def validate_enemy_data(enemy_dict):
+    """
+    Validate that enemy dictionary has all required fields
+    """
+    required_fields = [
+        "enemy_id",
+        "name",
+        "health",
+        "strength",
+        "magic",
+        "xp_reward",
+        "gold_reward",
+        "spawn",
+    ]
+
+    for key in required_fields:
+        if key not in enemy_dict:
+            raise InvalidDataFormatError(f"Missing enemy field: {key}")
+
+    numeric_fields = ["health", "strength", "magic", "xp_reward", "gold_reward"]
+    for key in numeric_fields:
+        if not isinstance(enemy_dict[key], int):
+            raise InvalidDataFormatError(f"Enemy field '{key}' must be an integer.")
+
+    if enemy_dict["health"] <= 0:
+        raise InvalidDataFormatError("Enemy health must be positive.")
+
+    return True
+
+def validate_spawn_coverage(enemies):
+    """
+    Check that some enemy spawns at every level from 1 up
+
+    Total spawn weight only changes where a range starts or just after
+    one ends, so checking those levels (plus level 1) covers every level,
+    including the open-ended tail past the last range.
+
+    Raises: InvalidDataFormatError naming the first level nothing spawns at
+    """
+    entries = [entry for enemy in enemies.values() for entry in enemy["spawn"]]
+
+    boundaries = {1}
+    for min_level, max_level, _ in entries:
+        boundaries.add(min_level)
+        if max_level is not None:
+            boundaries.add(max_level + 1)
+
+    for level in sorted(boundaries):
+        total = sum(weight for min_level, max_level, weight in entries
+                    if min_level <= level and (max_level is None or level <= max_level))
+        if total <= 0:
+            raise InvalidDataFormatError(f"No enemy spawns at level {level}.")
+
     return True
 
 def create_default_data_files():
@@ -204,6 +354,39 @@ DESCRIPTION: Restores 20 health.
         with open(items_path, "w") as f:
             f.write(default_items)
 
+    enemies_path = os.path.join("data", "enemies.txt")
+    if not os.path.exists(enemies_path):
+        # Same three enemies and spawn weights as the shipped data file
+        default_enemies = """ENEMY_ID: goblin
+NAME: Goblin
+HEALTH: 50
+STRENGTH: 8
+MAGIC: 2
+XP_REWARD: 25
+GOLD_REWARD: 10
+SPAWN: 1-2:80, 3-5:30
+
+ENEMY_ID: orc
+NAME: Orc
+HEALTH: 80
+STRENGTH: 12
+MAGIC: 5
+XP_REWARD: 50
+GOLD_REWARD: 25
+SPAWN: 1-2:20, 3-5:60, 6+:40
+
+ENEMY_ID: dragon
+NAME: Dragon
+HEALTH: 200
+STRENGTH: 25
+MAGIC: 15
+XP_REWARD: 200
+GOLD_REWARD: 100
+SPAWN: 3-5:10, 6+:60
+"""
+        with open(enemies_path, "w") as f:
+            f.write(default_enemies)
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -259,6 +442,116 @@ def parse_quest_block(lines):
     validate_quest_data(quest)
     return quest
 
+def parse_item_effects(effect_string):
+    """
+    Parse an item effect string into a tuple of (stat, value) pairs
+
+    Accepts one effect ("health:20") or several separated by commas
+    ("health:20,magic:5").
+
+    Raises: InvalidDataFormatError if any effect is malformed
+    """
+    effects = []
+
+    for part in effect_string.split(","):
+        if ":" not in part:
+            raise InvalidDataFormatError(
+                f"Invalid effect '{part.strip()}'; expected 'stat:value'."
+            )
+
+        stat_name, value_str = part.split(":", 1)
+        stat_name = stat_name.strip()
+        if not stat_name:
+            raise InvalidDataFormatError("Effect is missing a stat name.")
+
+        try:
+            value = int(value_str.strip())
+        except ValueError:
+            raise InvalidDataFormatError(f"Effect value for '{stat_name}' must be an integer.")
+
+        effects.append((stat_name, value))
+
+    return tuple(effects)
+
+def parse_spawn_weights(spawn_string):
+    """
+    Parse a SPAWN value into a tuple of (min_level, max_level, weight)
+
+    Each comma-separated entry is "levels:weight", where levels is one
+    level ("4"), a range ("3-5") or open-ended ("6+", max_level None).
+    "NONE" means the enemy never spawns at random.
+
+    Raises: InvalidDataFormatError if any entry is malformed
+    """
+    if spawn_string.strip().upper() == "NONE":
+        return ()
+
+    spawn = []
+    for part in spawn_string.split(","):
+        if ":" not in part:
+            raise InvalidDataFormatError(
+                f"Invalid spawn entry '{part.strip()}'; expected 'levels:weight'."
+            )
+        levels, weight_str = part.split(":", 1)
+        levels = levels.strip()
+
+        try:
+            weight = int(weight_str.strip())
+            if levels.endswith("+"):
+                min_level, max_level = int(levels[:-1]), None
+            elif "-" in levels:
+                low, high = levels.split("-", 1)
+                min_level, max_level = int(low), int(high)
+            else:
+                min_level = max_level = int(levels)
+        except ValueError:
+            raise InvalidDataFormatError(f"Invalid spawn entry '{part.strip()}'.")
+
+        if weight < 0 or min_level < 1 or (max_level is not None and max_level < min_level):
+            raise InvalidDataFormatError(f"Invalid spawn entry '{part.strip()}'.")
+
+        spawn.append((min_level, max_level, weight))
+
+    return tuple(spawn)
+
+def parse_enemy_block(lines):
+    """
+    Parse a block of lines into an enemy dictionary
+    """
+    enemy = {}
+    numeric_keys = {
+        "HEALTH": "health",
+        "STRENGTH": "strength",
+        "MAGIC": "magic",
+        "XP_REWARD": "xp_reward",
+        "GOLD_REWARD": "gold_reward",
+    }
+
+    for line in lines:
+        if ":" not in line:
+            raise InvalidDataFormatError("Enemy line missing ':' separator.")
+
+        key, value = line.split(":", 1)
+        key = key.strip().upper()
+        value = value.strip()
+
+        if key == "ENEMY_ID":
+            enemy["enemy_id"] = value.lower()
+        elif key == "NAME":
+            enemy["name"] = value
+        elif key in numeric_keys:
+            try:
+                enemy[numeric_keys[key]] = int(value)
+            except ValueError:
+                raise InvalidDataFormatError(f"{key} must be an integer.")
+        elif key == "SPAWN":
+            enemy["spawn"] = parse_spawn_weights(value)
+        else:
+            pass
+
+    validate_enemy_data(enemy)
+    return enemy
+
 def parse_item_block(lines):
     """
     Parse a block of lines into an item dictionary
@@ -276,13 +569,15 @@ def parse_item_block(lines):
         value = value.strip()
 
         if key == "ITEM_ID":
-            item["item_id"] = value
+            item["item_id"] = sys.intern(value)
         elif key == "NAME":
             item["name"] = value
         elif key == "TYPE":
             item["type"] = value
         elif key == "EFFECT":
             item["effect"] = value
+            # Keep the parsed effects so using/equipping never re-parses the string
+            item["effects"] = parse_item_effects(value)
         elif key == "COST":
             try:
                 item["cost"] = int(value)
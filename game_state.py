@@ -0,0 +1,398 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Game State Module
+
+Name: Bryant Clarke
+
+AI Usage: AI helped with syntax formatting and error checking
+
+This module takes read-only snapshots of the game state (character,
+quest catalog, item catalog) and restores them later, so tests and
+error handling can roll back without deep-copying everything.
+
+Catalogs wrapped with track_changes log which keys are written, so
+restoring them (and snapshotting with previous=) only visits the keys
+that changed. Untracked dicts like the character are compared entry by
+entry; inventories and quest lists are checked by version in O(1).
+"""
+
+from types import MappingProxyType
+from inventory_system import Inventory
+from character_manager import QuestIdList
+
+# ============================================================================
+# FREEZING HELPERS
+# ============================================================================
+
+class FrozenInventory(tuple):
+    """
+    Read-only inventory: a tuple of (item_id, quantity) stacks
+
+    source and version name the Inventory it was frozen from, so an
+    unchanged inventory is recognized without comparing every stack.
+    """
+
+class FrozenQuestIds(tuple):
+    """Read-only QuestIdList: a tuple of quest IDs (source/version as above)"""
+
+class FrozenList(tuple):
+    """Read-only list (plain tuples stay plain tuples, so thawing can
+    tell the two apart)"""
+    __slots__ = ()
+
+def _stamp(frozen, source):
+    """Remember which container (at which version) a frozen copy came from"""
+    frozen.source = source
+    frozen.version = source.version
+    return frozen
+
+def freeze_value(value):
+    """
+    Return a read-only copy of a value
+
+    dicts become read-only mappings and lists become FrozenLists,
+    recursively; tuples keep their type. Strings, numbers and None are
+    already immutable and are shared as-is.
+    """
+    if isinstance(value, Inventory):
+        return _stamp(FrozenInventory(value.stacks()), value)
+    if isinstance(value, QuestIdList):
+        return _stamp(FrozenQuestIds(value), value)
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({k: freeze_value(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze_value(v) for v in value)
+    if isinstance(value, tuple):
+        return tuple(freeze_value(v) for v in value)
+    return value
+
+def thaw_value(frozen):
+    """
+    Turn a frozen value back into the types it was frozen from
+    """
+    if isinstance(frozen, FrozenInventory):
+        return Inventory.from_stacks(frozen)
+    if isinstance(frozen, FrozenQuestIds):
+        return QuestIdList(frozen)
+    if isinstance(frozen, MappingProxyType):
+        return {k: thaw_value(v) for k, v in frozen.items()}
+    if isinstance(frozen, FrozenList):
+        return [thaw_value(v) for v in frozen]
+    if isinstance(frozen, tuple):
+        return tuple(thaw_value(v) for v in frozen)
+    return frozen
+
+def matches_frozen(live, frozen):
+    """
+    Check if a live value still equals a frozen one
+    """
+    if isinstance(frozen, (FrozenInventory, FrozenQuestIds)):
+        if live is frozen.source and live.version == frozen.version:
+            return True
+    if isinstance(frozen, FrozenInventory):
+        return isinstance(live, Inventory) and tuple(live.stacks()) == frozen
+    if isinstance(frozen, FrozenQuestIds):
+        return isinstance(live, QuestIdList) and tuple(live) == frozen
+    if isinstance(frozen, MappingProxyType):
+        if not isinstance(live, dict) or len(live) != len(frozen):
+            return False
+        for key, value in frozen.items():
+            if key not in live or not matches_frozen(live[key], value):
+                return False
+        return True
+    if isinstance(frozen, tuple):
+        live_type = list if isinstance(frozen, FrozenList) else tuple
+        if not isinstance(live, live_type) or len(live) != len(frozen):
+            return False
+        return all(matches_frozen(a, b) for a, b in zip(live, frozen))
+    return live == frozen
+
+# ============================================================================
+# TRACKED CATALOGS
+# ============================================================================
+
+class ChangeLog:
+    """
+    Keys of a tracked catalog that were written, grouped by snapshot
+
+    Each snapshot calls checkpoint() and keeps the epoch it gets back;
+    changed_since(epoch) is then every key written after that snapshot.
+    Only keys are kept, so this grows with the number of distinct keys
+    changed between snapshots, not with the catalog size.
+    """
+
+    __slots__ = ("epochs",)
+
+    def __init__(self):
+        self.epochs = [set()]
+
+    def mark(self, key):
+        self.epochs[-1].add(key)
+
+    def checkpoint(self):
+        """Start a new epoch (unless nothing changed in the current one)"""
+        if self.epochs[-1]:
+            self.epochs.append(set())
+        return len(self.epochs) - 1
+
+    def changed_since(self, epoch):
+        """Keys written since checkpoint() returned epoch (a new set)"""
+        return set().union(*self.epochs[epoch:])
+
+# root_key of the catalog itself (entries use the catalog key they live under)
+_CATALOG = object()
+
+class TrackedDict(dict):
+    """
+    dict that logs every write to a ChangeLog
+
+    A catalog and every dict nested in it share one ChangeLog. Writes to
+    the catalog log their own key; writes inside an entry log the catalog
+    key that holds the entry, so items["sword"]["cost"] = 5 logs "sword".
+    Dicts stored in a catalog are copied into TrackedDicts (keep using
+    catalog[key], not the dict that was assigned). Lists inside entries
+    aren't tracked; the game's quest and item entries only hold strings,
+    numbers and tuples.
+    """
+
+    __slots__ = ("changes", "root_key")
+
+    def __init__(self, data=(), changes=None, root_key=_CATALOG):
+        super().__init__()
+        self.changes = changes if changes is not None else ChangeLog()
+        self.root_key = root_key
+        for key, value in dict(data).items():
+            dict.__setitem__(self, key, self._adopt(key, value))
+
+    def _adopt(self, key, value):
+        """Wrap a dict being stored so writes inside it are logged too"""
+        if not isinstance(value, dict):
+            return value
+        root_key = key if self.root_key is _CATALOG else self.root_key
+        if (isinstance(value, TrackedDict) and value.changes is self.changes
+                and value.root_key == root_key):
+            return value
+        return TrackedDict(value, self.changes, root_key)
+
+    def _touch(self, key):
+        self.changes.mark(key if self.root_key is _CATALOG else self.root_key)
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, self._adopt(key, value))
+        self._touch(key)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._touch(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._touch(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        self._touch(key)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        for key in self:
+            self._touch(key)
+        dict.clear(self)
+
+    def __reduce__(self):
+        # Copies and pickles are plain dicts; tracking belongs to the original
+        return (dict, (dict(self),))
+
+def track_changes(catalog):
+    """
+    Return a TrackedDict version of a catalog (the catalog itself if it
+    already is one), so snapshots and restores only visit changed keys
+    """
+    if isinstance(catalog, TrackedDict) and catalog.root_key is _CATALOG:
+        return catalog
+    return TrackedDict(catalog)
+
+def _changed_keys(live, mark):
+    """
+    Keys of live written since the snapshot that left mark, or None if
+    live isn't the tracked catalog mark came from
+    """
+    if mark is None or not isinstance(live, TrackedDict) or live.changes is not mark[0]:
+        return None
+    return mark[0].changed_since(mark[1])
+
+# ============================================================================
+# SNAPSHOTS
+# ============================================================================
+
+class GameSnapshot:
+    """
+    Read-only copy of the character and both catalogs
+
+    Each part is a mapping of key -> frozen value. Snapshots taken with
+    previous= reuse the previous snapshot's frozen values for anything
+    that hasn't changed, so a chain of snapshots only stores what changed.
+    marks holds (ChangeLog, epoch) for each part that was a TrackedDict.
+    """
+
+    __slots__ = ("character", "quests", "items", "marks")
+
+    def __init__(self, character, quests, items, marks=None):
+        object.__setattr__(self, "character", character)
+        object.__setattr__(self, "quests", quests)
+        object.__setattr__(self, "items", items)
+        object.__setattr__(self, "marks", MappingProxyType(marks or {}))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("GameSnapshot is read-only.")
+
+def _freeze_key(frozen, live, key, previous_part):
+    """Freeze live[key] into frozen, sharing the previous value if unchanged"""
+    value = live[key]
+    if previous_part is not None and key in previous_part:
+        old = previous_part[key]
+        if matches_frozen(value, old):
+            frozen[key] = old
+            return
+    frozen[key] = freeze_value(value)
+
+def _freeze_part(live, previous_part, previous_mark=None, tracked=True):
+    """
+    Freeze one dict, sharing unchanged entries with the previous snapshot
+
+    Returns: (frozen mapping, mark for a TrackedDict or None)
+    """
+    if live is None:
+        return None, None
+
+    mark = None
+    if tracked and isinstance(live, TrackedDict):
+        changed = _changed_keys(live, previous_mark) if previous_part is not None else None
+        mark = (live.changes, live.changes.checkpoint())
+        if changed is not None:
+            # Only keys written since the previous snapshot can differ
+            if not changed:
+                return previous_part, mark
+            frozen = previous_part.copy()
+            for key in changed:
+                if isinstance(key, str) and key.startswith("_"):
+                    continue
+                if key in live:
+                    _freeze_key(frozen, live, key, previous_part)
+                else:
+                    frozen.pop(key, None)
+            return MappingProxyType(frozen), mark
+
+    frozen = {}
+    for key in live:
+        if isinstance(key, str) and key.startswith("_"):
+            # Runtime caches (e.g. quest availability) rebuild themselves
+            continue
+        _freeze_key(frozen, live, key, previous_part)
+    return MappingProxyType(frozen), mark
+
+def take_snapshot(character, quests, items, previous=None):
+    """
+    Capture the game state in a GameSnapshot
+
+    Args:
+        character: Character dictionary (or None)
+        quests: Quest catalog dictionary
+        items: Item catalog dictionary
+        previous: Optional earlier snapshot to share unchanged parts with
+
+    Catalogs wrapped with track_changes only have their changed keys
+    re-frozen when previous is given. The character is always compared
+    key by key: its inventory and quest lists change without writing to
+    the dict, so a ChangeLog can't see them (their versions can).
+
+    Returns: GameSnapshot
+    """
+    parts = {"character": character, "quests": quests, "items": items}
+    frozen = {}
+    marks = {}
+    for name, live in parts.items():
+        previous_part = getattr(previous, name) if previous else None
+        previous_mark = previous.marks.get(name) if previous else None
+        frozen[name], mark = _freeze_part(live, previous_part, previous_mark,
+                                          tracked=name != "character")
+        if mark is not None:
+            marks[name] = mark
+    return GameSnapshot(frozen["character"], frozen["quests"], frozen["items"], marks)
+
+def _restore_key(live, frozen, key):
+    """Put live[key] back to frozen[key] (or drop it); True if it changed"""
+    if key not in frozen:
+        if key not in live:
+            return False
+        del live[key]
+        return True
+    if key in live and matches_frozen(live[key], frozen[key]):
+        return False
+    live[key] = thaw_value(frozen[key])
+    return True
+
+def _restore_part(live, frozen, mark=None):
+    """
+    Put a live dict back to a frozen state, touching only changed keys
+
+    For the tracked catalog mark came from, only keys written since the
+    snapshot are visited; otherwise every key is compared.
+
+    Returns: Number of keys that were changed
+    """
+    keys = _changed_keys(live, mark)
+    if keys is None:
+        # Keys added after the snapshot (including caches) are dropped too
+        keys = [k for k in live if k not in frozen]
+        keys.extend(frozen)
+    return sum(_restore_key(live, frozen, key) for key in keys)
+
+def restore_parts(snapshot, character, quests, items):
+    """
+    Restore live game state from a snapshot, in place
+
+    The same dictionaries stay in use (so anything holding a reference to
+    the character, like a battle, sees the restored values), and only
+    entries that differ from the snapshot are rebuilt. Tracked catalogs
+    (see track_changes) cost O(keys changed since the snapshot); other
+    dicts are compared entry by entry.
+
+    If the snapshot has no character, the character (if any) is left
+    alone; the caller decides whether to drop it.
+
+    Returns: {"character": n, "quests": n, "items": n} entries changed
+    Raises: ValueError if the snapshot has a character but character is
+            None (pass an empty dict to restore into)
+    """
+    marks = snapshot.marks
+    changed = {"character": 0, "quests": 0, "items": 0}
+    if snapshot.character is not None:
+        if character is None:
+            raise ValueError("Snapshot has a character but there is no character dict to restore into.")
+        changed["character"] = _restore_part(character, snapshot.character, marks.get("character"))
+    changed["quests"] = _restore_part(quests, snapshot.quests, marks.get("quests"))
+    changed["items"] = _restore_part(items, snapshot.items, marks.get("items"))
+    return changed
+
+def restore_snapshot(snapshot, character, quests, items):
+    """
+    Restore live game state from a snapshot, in place (see restore_parts)
+
+    Returns: Number of entries that were changed
+    """
+    return sum(restore_parts(snapshot, character, quests, items).values())
@@ -9,16 +9,350 @@ AI Usage: AI helped with syntax formatting and error checking
 This module handles inventory management, item usage, and equipment.
 """
 
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from game_data import ITEM_REGISTRY, parse_item_effects
 from custom_exceptions import (
     InventoryFullError,
     ItemNotFoundError,
     InsufficientResourcesError,
-    InvalidItemTypeError
+    InvalidItemTypeError,
+    InvalidDataFormatError
 )
 
 # Maximum inventory size
 MAX_INVENTORY_SIZE = 20
 
+# Equipment slots, and which slots each equippable item type can go in
+EQUIPMENT_SLOTS = ("weapon", "armor", "helm", "ring_left", "ring_right")
+ITEM_TYPE_SLOTS = {
+    "weapon": ("weapon",),
+    "armor": ("armor",),
+    "helm": ("helm",),
+    "ring": ("ring_left", "ring_right"),
+}
+
+# Slots that also keep an equipped_<slot> field on the character
+LEGACY_SLOTS = ("weapon", "armor")
+
+# ============================================================================
+# INVENTORY TYPE
+# ============================================================================
+
+class Inventory:
+    """
+    Counted-stack inventory: item_id -> quantity, plus a running total
+
+    Acts enough like the old list (in, len, iteration, append, remove,
+    count) that existing code keeps working, but membership, counting and
+    removal are O(1) instead of scanning every slot. Stack keys are the
+    canonical ID strings from game_data.ITEM_REGISTRY, so a big roster
+    shares one string per item. Iteration yields one entry per item copy,
+    grouped by item in the order items were first added. version goes up
+    on every change, so snapshots can tell if it changed.
+    """
+
+    __slots__ = ("_counts", "_total", "journal", "version")
+
+    def __init__(self, items=()):
+        self._counts = {}
+        self._total = 0
+        self.journal = None  # ChangeJournal recording changes, if any
+        self.version = 0
+        for item_id in items:
+            self.add(item_id)
+
+    @classmethod
+    def from_stacks(cls, stacks):
+        """Build an inventory from (item_id, quantity) pairs"""
+        inventory = cls()
+        for item_id, qty in stacks:
+            inventory.add(item_id, qty)
+        return inventory
+
+    def add(self, item_id, qty=1):
+        """Add qty copies of an item"""
+        if qty <= 0:
+            return
+        item_id = ITEM_REGISTRY.canonical(item_id)
+        self._counts[item_id] = self._counts.get(item_id, 0) + qty
+        self._total += qty
+        self.version += 1
+        if self.journal is not None:
+            self.journal.record_stack(self, item_id, qty)
+
+    def append(self, item_id):
+        """List-style add of a single item"""
+        self.add(item_id)
+
+    def extend(self, item_ids):
+        """List-style add of several items"""
+        for item_id in item_ids:
+            self.add(item_id)
+
+    def discard(self, item_id, qty=1):
+        """
+        Remove up to qty copies of an item
+
+        Returns: Number of copies actually removed
+        """
+        have = self._counts.get(item_id, 0)
+        taken = min(have, qty)
+        if taken <= 0:
+            return 0
+        if taken == have:
+            del self._counts[item_id]
+        else:
+            self._counts[item_id] = have - taken
+        self._total -= taken
+        self.version += 1
+        if self.journal is not None:
+            self.journal.record_stack(self, item_id, -taken)
+        return taken
+
+    def remove(self, item_id):
+        """List-style removal of one copy; ValueError if not present"""
+        if not self.discard(item_id):
+            raise ValueError(f"{item_id!r} not in inventory")
+
+    def count(self, item_id):
+        """Number of copies of an item"""
+        return self._counts.get(item_id, 0)
+
+    def stacks(self):
+        """(item_id, quantity) pairs in first-added order"""
+        return self._counts.items()
+
+    def to_codes(self):
+        """
+        Compact numeric form: array of registry codes and array of counts
+        """
+        codes = array("I", [ITEM_REGISTRY.intern(item_id) for item_id in self._counts])
+        counts = array("I", self._counts.values())
+        return codes, counts
+
+    @classmethod
+    def from_codes(cls, codes, counts):
+        """Rebuild an inventory from to_codes() output"""
+        inventory = cls()
+        for code, qty in zip(codes, counts):
+            inventory.add(ITEM_REGISTRY.item_id_of(code), qty)
+        return inventory
+
+    def clear(self):
+        if self.journal is not None:
+            for item_id, qty in self._counts.items():
+                self.journal.record_stack(self, item_id, -qty)
+        self._counts.clear()
+        self._total = 0
+        self.version += 1
+
+    def copy(self):
+        return Inventory.from_stacks(self._counts.items())
+
+    def __len__(self):
+        return self._total
+
+    def __contains__(self, item_id):
+        return item_id in self._counts
+
+    def __iter__(self):
+        for item_id, qty in self._counts.items():
+            for _ in range(qty):
+                yield item_id
+
+    def __eq__(self, other):
+        # Inventories are multisets, so compare counts rather than order
+        if isinstance(other, Inventory):
+            return self._counts == other._counts
+        if isinstance(other, (list, tuple)):
+            return self == Inventory(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Inventory({list(self)!r})"
+
+def get_inventory(character):
+    """
+    Return the character's Inventory, converting an old-style list if needed
+    """
+    inventory = character.get("inventory")
+    if not isinstance(inventory, Inventory):
+        inventory = Inventory(inventory or [])
+        set_character_value(character, character, "inventory", inventory)
+    inventory.journal = get_active_journal(character)
+    return inventory
+
+# ============================================================================
+# CHANGE JOURNAL
+# ============================================================================
+
+# Marks a key that didn't exist before a change
+_MISSING = object()
+
+# id(character) -> stack of open journals for it (innermost last)
+_active_journals = {}
+
+class ChangeJournal:
+    """
+    Records changes made to a character so they can be undone as a batch
+
+    Every inventory function routes its changes through
+    set_character_value/delete_character_value and Inventory, which log
+    the old value here while a journal is open. Undo replays the log
+    backwards, so it costs O(changes) and nothing is copied up front.
+
+        with ChangeJournal(character):
+            purchase_item(character, "iron_sword", sword)
+            equip_weapon(character, "iron_sword", sword)
+        # any exception inside the block undoes both steps
+
+    Journals can be nested; committing an inner journal hands its changes
+    to the outer one, so the outer journal can still undo them.
+    """
+
+    def __init__(self, character):
+        self.character = character
+        self.entries = []
+        self.is_open = False
+
+    # -- recording ---------------------------------------------------------
+
+    def record_value(self, target, key):
+        """
+        Log the current value of target[key] before it changes
+
+        For a dict nested in the character (equipment, equipment_bonuses)
+        the character key that holds it is logged too, so summarize can
+        report that field as changed.
+        """
+        field = key if target is self.character else self._owning_field(target)
+        self.entries.append(("value", target, key, target.get(key, _MISSING), field))
+
+    def record_stack(self, inventory, item_id, delta):
+        """Log that qty delta of item_id was added to (or taken from) an inventory"""
+        self.entries.append(("stack", inventory, item_id, delta, "inventory"))
+
+    def _owning_field(self, target):
+        """The character key whose value is target (None if not found)"""
+        for field, value in self.character.items():
+            if value is target:
+                return field
+        return None
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def open(self):
+        """Start recording changes to the character"""
+        _active_journals.setdefault(id(self.character), []).append(self)
+        self.is_open = True
+        self._attach_inventory()
+        return self
+
+    def _close(self):
+        stack = _active_journals[id(self.character)]
+        stack.remove(self)
+        if not stack:
+            del _active_journals[id(self.character)]
+        self.is_open = False
+        self._attach_inventory()
+
+    def _attach_inventory(self):
+        inventory = self.character.get("inventory")
+        if isinstance(inventory, Inventory):
+            inventory.journal = get_active_journal(self.character)
+
+    def commit(self):
+        """
+        Stop recording and keep the changes
+
+        Returns: Summary of what changed (see summarize)
+        """
+        summary = self.summarize()
+        self._close()
+
+        outer = get_active_journal(self.character)
+        if outer is not None:
+            outer.entries.extend(self.entries)
+        self.entries = []
+        return summary
+
+    def undo(self):
+        """Stop recording and put back everything that was changed"""
+        self._close()
+        for kind, target, key, old, _ in reversed(self.entries):
+            if kind == "stack":
+                # Apply the opposite change without logging it
+                journal, target.journal = target.journal, None
+                if old > 0:
+                    target.discard(key, old)
+                else:
+                    target.add(key, -old)
+                target.journal = journal
+            elif old is _MISSING:
+                target.pop(key, None)
+            else:
+                target[key] = old
+        self.entries = []
+
+        # The restored inventory may be a different object than before
+        self._attach_inventory()
+
+    def summarize(self):
+        """
+        Net effect of the recorded changes, e.g. for saving only what changed
+
+        Changes inside a nested dict are reported under the character
+        key that holds it, e.g. equipping a ring lists "equipment".
+
+        Returns: {"fields": {key: current value}, "inventory": {item_id: net qty change}}
+        """
+        fields = {}
+        inventory = {}
+        for kind, target, key, change, field in self.entries:
+            if kind == "stack":
+                inventory[key] = inventory.get(key, 0) + change
+            elif field is not None:
+                fields[field] = self.character.get(field)
+        return {
+            "fields": fields,
+            "inventory": {k: v for k, v in inventory.items() if v},
+        }
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.undo()
+        return False
+
+def get_active_journal(character):
+    """The innermost open ChangeJournal for a character, or None"""
+    stack = _active_journals.get(id(character))
+    return stack[-1] if stack else None
+
+def set_character_value(character, target, key, value):
+    """
+    Set target[key] = value, logging it in the character's open journal
+
+    target is the character itself or a dict inside it (like equipment).
+    """
+    journal = get_active_journal(character)
+    if journal is not None:
+        journal.record_value(target, key)
+    target[key] = value
+
+def delete_character_value(character, target, key):
+    """Delete target[key], logging it in the character's open journal"""
+    journal = get_active_journal(character)
+    if journal is not None:
+        journal.record_value(target, key)
+    del target[key]
+
 # ============================================================================
 # INVENTORY MANAGEMENT
 # ============================================================================
@@ -31,13 +365,13 @@ def add_item_to_inventory(character, item_id):
     # Check if inventory is full (>= MAX_INVENTORY_SIZE)
     # Add item_id to character['inventory'] list
 
-    inventory = character.setdefault("inventory", [])  # Make sure inventory list exists
+    inventory = get_inventory(character)  # Make sure inventory exists
 
     if len(inventory) >= MAX_INVENTORY_SIZE:
         # Matches test_inventory_full_exception
         raise InventoryFullError("Inventory is full.")
 
-    inventory.append(item_id)
+    inventory.add(item_id)
     return True
 
 def remove_item_from_inventory(character, item_id):
@@ -48,13 +382,12 @@ def remove_item_from_inventory(character, item_id):
     # Check if item exists in inventory
     # Remove item from list
 
-    inventory = character.setdefault("inventory", [])
+    inventory = get_inventory(character)
 
-    if item_id not in inventory:
+    if not inventory.discard(item_id):
         # Tests expect ItemNotFoundError when removing something not present
         raise ItemNotFoundError(f"Item '{item_id}' not found in inventory.")
 
-    inventory.remove(item_id)
     return True
 
 def has_item(character, item_id):
@@ -63,7 +396,7 @@ def has_item(character, item_id):
     """
     # TODO: Implement item check
 
-    return item_id in character.get("inventory", [])
+    return item_id in get_inventory(character)
 
 def count_item(character, item_id):
     """
@@ -72,7 +405,7 @@ def count_item(character, item_id):
     # TODO: Implement item counting
     # Use list.count() method
 
-    return character.get("inventory", []).count(item_id)
+    return get_inventory(character).count(item_id)
 
 def get_inventory_space_remaining(character):
     """
@@ -80,7 +413,7 @@ def get_inventory_space_remaining(character):
     """
     # TODO: Implement space calculation
 
-    return MAX_INVENTORY_SIZE - len(character.get("inventory", []))
+    return MAX_INVENTORY_SIZE - len(get_inventory(character))
 
 def clear_inventory(character):
     """
@@ -90,8 +423,8 @@ def clear_inventory(character):
     # Save current inventory before clearing
     # Clear character's inventory list
 
-    current = list(character.get("inventory", []))  # Make a copy
-    character["inventory"] = []                    # Clear inventory
+    current = list(get_inventory(character))  # Make a copy
+    set_character_value(character, character, "inventory", Inventory())  # Clear inventory
     return current
 
 # ============================================================================
@@ -117,13 +450,13 @@ def use_item(character, item_id, item_data):
         # test_invalid_item_type_exception triggers this
         raise InvalidItemTypeError("Only consumable items can be used.")
 
-    stat_name, value = parse_item_effect(item_data.get("effect", ""))
-    apply_stat_effect(character, stat_name, value)
+    effects = get_item_effects(item_data)
+    apply_item_effects(character, effects)
 
     # Remove a single copy of the item after use
     remove_item_from_inventory(character, item_id)
 
-    return f"Used {item_id} and applied {stat_name}+{value}."
+    return f"Used {item_id} and applied {format_item_effects(effects)}."
 
 def equip_weapon(character, item_id, item_data):
     """
@@ -142,23 +475,8 @@ def equip_weapon(character, item_id, item_data):
     if item_data.get("type") != "weapon":
         raise InvalidItemTypeError("Item is not a weapon.")
 
-    # If a weapon is already equipped, unequip it first
-    if "equipped_weapon" in character and character["equipped_weapon"] is not None:
-        unequip_weapon(character)
-
-    stat_name, value = parse_item_effect(item_data.get("effect", ""))
-
-    # Track what stat and bonus this weapon gave so we can reverse it later
-    character["equipped_weapon"] = item_id
-    character["equipped_weapon_stat"] = stat_name
-    character["equipped_weapon_bonus"] = value
-
-    apply_stat_effect(character, stat_name, value)
-
-    # Remove weapon from inventory when equipped
-    remove_item_from_inventory(character, item_id)
-
-    return f"Equipped weapon {item_id} (+{value} {stat_name})."
+    effects = equip_item(character, item_id, item_data, "weapon")
+    return f"Equipped weapon {item_id} ({format_item_effects(effects)})."
 
 def equip_armor(character, item_id, item_data):
     """
@@ -173,21 +491,8 @@ def equip_armor(character, item_id, item_data):
     if item_data.get("type") != "armor":
         raise InvalidItemTypeError("Item is not armor.")
 
-    # If armor already equipped, unequip first
-    if "equipped_armor" in character and character["equipped_armor"] is not None:
-        unequip_armor(character)
-
-    stat_name, value = parse_item_effect(item_data.get("effect", ""))
-
-    character["equipped_armor"] = item_id
-    character["equipped_armor_stat"] = stat_name
-    character["equipped_armor_bonus"] = value
-
-    apply_stat_effect(character, stat_name, value)
-
-    remove_item_from_inventory(character, item_id)
-
-    return f"Equipped armor {item_id} (+{value} {stat_name})."
+    effects = equip_item(character, item_id, item_data, "armor")
+    return f"Equipped armor {item_id} ({format_item_effects(effects)})."
 
 def unequip_weapon(character):
     """
@@ -199,58 +504,221 @@ def unequip_weapon(character):
     # Add weapon back to inventory
     # Clear equipped_weapon from character
 
-    weapon_id = character.get("equipped_weapon")
-    if not weapon_id:
-        return None
+    return unequip_slot(character, "weapon")
 
-    # Before unequipping, make sure inventory has space
-    if get_inventory_space_remaining(character) <= 0:
-        # Spec says to raise InventoryFullError if inventory is full
-        raise InventoryFullError("Inventory is full; cannot unequip weapon.")
+def unequip_armor(character):
+    """
+    Remove equipped armor and return it to inventory
+    """
+    # TODO: Implement armor unequipping
 
-    stat_name = character.get("equipped_weapon_stat")
-    bonus = character.get("equipped_weapon_bonus", 0)
+    return unequip_slot(character, "armor")
 
-    # Remove the stat bonus we added when equipping
-    if stat_name in character:
-        character[stat_name] -= bonus
+# ============================================================================
+# EQUIPMENT SLOTS
+# ============================================================================
 
-    # Add weapon back to inventory
-    add_item_to_inventory(character, weapon_id)
+def get_equipment(character):
+    """
+    Return the character's slot -> {"item_id", "effects"} dictionary
+    """
+    if "equipment" not in character:
+        set_character_value(character, character, "equipment", {})
+    return character["equipment"]
 
-    # Clear equipped info
-    character["equipped_weapon"] = None
-    character["equipped_weapon_stat"] = None
-    character["equipped_weapon_bonus"] = 0
+def get_equipment_bonuses(character):
+    """
+    Return the cached stat -> total bonus from everything equipped
 
-    return weapon_id
+    Kept up to date by equip_item/unequip_slot, so reading it is O(1).
+    """
+    if "equipment_bonuses" not in character:
+        set_character_value(character, character, "equipment_bonuses", {})
+    return character["equipment_bonuses"]
 
-def unequip_armor(character):
+def get_base_stat(character, stat_name):
     """
-    Remove equipped armor and return it to inventory
+    Get a stat without equipment bonuses
+
+    Stat fields like character["strength"] always hold the effective
+    value (base + equipment) so combat can read them directly.
     """
-    # TODO: Implement armor unequipping
+    return character.get(stat_name, 0) - get_equipment_bonuses(character).get(stat_name, 0)
+
+def get_equipped_item(character, slot):
+    """
+    Return the item_id equipped in a slot, or None
+    """
+    entry = get_equipment(character).get(slot)
+    return entry["item_id"] if entry else None
+
+def find_slot_for_item(character, item_data):
+    """
+    Pick the slot an item goes in: the first empty slot for its type,
+    otherwise the first slot for its type (which will be swapped out)
 
-    armor_id = character.get("equipped_armor")
-    if not armor_id:
+    Raises: InvalidItemTypeError if the item type can't be equipped
+    """
+    slots = ITEM_TYPE_SLOTS.get(item_data.get("type"))
+    if not slots:
+        raise InvalidItemTypeError(f"Items of type '{item_data.get('type')}' cannot be equipped.")
+
+    equipment = get_equipment(character)
+    for slot in slots:
+        if slot not in equipment:
+            return slot
+    return slots[0]
+
+def equip_item(character, item_id, item_data, slot=None):
+    """
+    Equip an item from inventory into a slot
+
+    If the slot is taken, the old item goes back to inventory. The new
+    item leaves inventory first, so the swap always has room.
+
+    Returns: The effects that were applied
+    Raises:
+        ItemNotFoundError if item not in inventory
+        InvalidItemTypeError if item can't go in that slot
+    """
+    if not has_item(character, item_id):
+        raise ItemNotFoundError(f"Item '{item_id}' not found in inventory.")
+
+    if slot is None:
+        slot = find_slot_for_item(character, item_data)
+    elif slot not in ITEM_TYPE_SLOTS.get(item_data.get("type"), ()):
+        raise InvalidItemTypeError(f"Item '{item_id}' cannot be equipped in slot '{slot}'.")
+
+    effects = get_item_effects(item_data)
+
+    remove_item_from_inventory(character, item_id)
+    if get_equipped_item(character, slot) is not None:
+        unequip_slot(character, slot)
+
+    entry = {"item_id": item_id, "effects": effects}
+    set_character_value(character, get_equipment(character), slot, entry)
+    _change_equipment_bonuses(character, effects, 1)
+
+    # Mirror the classic fields so older code can still check them
+    if slot in LEGACY_SLOTS:
+        set_character_value(character, character, f"equipped_{slot}", item_id)
+
+    return effects
+
+def unequip_slot(character, slot):
+    """
+    Remove whatever is in a slot and return it to inventory
+
+    Returns: The unequipped item_id, or None if the slot was empty
+    Raises: InventoryFullError if there's no room in inventory
+    """
+    entry = get_equipment(character).get(slot)
+    if entry is None:
         return None
 
     if get_inventory_space_remaining(character) <= 0:
-        raise InventoryFullError("Inventory is full; cannot unequip armor.")
+        # Spec says to raise InventoryFullError if inventory is full
+        raise InventoryFullError(f"Inventory is full; cannot unequip {slot}.")
 
-    stat_name = character.get("equipped_armor_stat")
-    bonus = character.get("equipped_armor_bonus", 0)
+    _change_equipment_bonuses(character, entry["effects"], -1)
+    delete_character_value(character, get_equipment(character), slot)
+    add_item_to_inventory(character, entry["item_id"])
 
-    if stat_name in character:
-        character[stat_name] -= bonus
+    if slot in LEGACY_SLOTS:
+        set_character_value(character, character, f"equipped_{slot}", None)
 
-    add_item_to_inventory(character, armor_id)
+    return entry["item_id"]
 
-    character["equipped_armor"] = None
-    character["equipped_armor_stat"] = None
-    character["equipped_armor_bonus"] = 0
+def _change_equipment_bonuses(character, effects, sign):
+    """
+    Add (sign=1) or remove (sign=-1) an item's effects from the cached
+    bonus totals and the effective stat fields
+    """
+    bonuses = get_equipment_bonuses(character)
+
+    for stat_name, value in effects:
+        total = bonuses.get(stat_name, 0) + sign * value
+        if total:
+            set_character_value(character, bonuses, stat_name, total)
+        elif stat_name in bonuses:
+            delete_character_value(character, bonuses, stat_name)
+
+        new_value = character.get(stat_name, 0) + sign * value
+        set_character_value(character, character, stat_name, new_value)
+
+    # Losing max_health can leave health above the new maximum
+    if "max_health" in character and character.get("health", 0) > character["max_health"]:
+        set_character_value(character, character, "health", character["max_health"])
+
+def format_equipment(equipment):
+    """
+    Format equipment for a save file
+
+    Example: "weapon=iron_sword=strength:5,ring_left=gold_ring=magic:2;health:5"
+    """
+    parts = []
+    for slot, entry in equipment.items():
+        effect_text = ";".join(f"{stat}:{value}" for stat, value in entry["effects"])
+        parts.append(f"{slot}={entry['item_id']}={effect_text}")
+    return ",".join(parts)
+
+def parse_equipment(text):
+    """
+    Parse the save-file form of equipment back into a dictionary
+
+    Raises: ValueError if the text is malformed
+    """
+    equipment = {}
+    for part in text.split(","):
+        if not part:
+            continue
+        slot, item_id, effect_text = part.split("=")
+        if slot not in EQUIPMENT_SLOTS:
+            raise ValueError(f"Unknown equipment slot '{slot}'.")
+        effects = tuple(parse_item_effect(e) for e in effect_text.split(";") if e)
+        equipment[slot] = {"item_id": item_id, "effects": effects}
+    return equipment
+
+def parse_legacy_equipment(fields):
+    """
+    Build equipment slot entries from the fields older saves wrote instead
+    of an EQUIPMENT line: equipped_<slot>, equipped_<slot>_stat and
+    equipped_<slot>_bonus
+
+    Args:
+        fields: Dictionary of those lowercase field names -> save text
+    Returns: Equipment dictionary like parse_equipment's
+    Raises: ValueError if a bonus isn't a number
+    """
+    equipment = {}
+    for slot in LEGACY_SLOTS:
+        item_id = fields.get(f"equipped_{slot}")
+        if not item_id or item_id == "None":
+            continue
+
+        effects = ()
+        stat_name = fields.get(f"equipped_{slot}_stat")
+        if stat_name and stat_name != "None":
+            effects = ((stat_name, int(fields.get(f"equipped_{slot}_bonus") or 0)),)
+
+        equipment[slot] = {"item_id": item_id, "effects": effects}
+    return equipment
+
+def restore_equipment(character, equipment):
+    """
+    Set a character's equipment (e.g. from a save) and rebuild the bonus
+    cache. Stat fields are assumed to already include these bonuses.
+    """
+    character["equipment"] = equipment
+    bonuses = {}
+    for entry in equipment.values():
+        for stat_name, value in entry["effects"]:
+            bonuses[stat_name] = bonuses.get(stat_name, 0) + value
+    character["equipment_bonuses"] = {k: v for k, v in bonuses.items() if v}
 
-    return armor_id
+    for slot in LEGACY_SLOTS:
+        entry = equipment.get(slot)
+        character[f"equipped_{slot}"] = entry["item_id"] if entry else None
 
 # ============================================================================
 # SHOP SYSTEM
@@ -277,7 +745,7 @@ def purchase_item(character, item_id, item_data):
         raise InventoryFullError("Inventory is full.")
 
     # Apply purchase
-    character["gold"] -= cost
+    set_character_value(character, character, "gold", character["gold"] - cost)
     add_item_to_inventory(character, item_id)
 
     return True
@@ -299,10 +767,304 @@ def sell_item(character, item_id, item_data):
     sell_price = cost // 2  # test_shop_system expects 25 // 2 = 12
 
     remove_item_from_inventory(character, item_id)
-    character["gold"] = character.get("gold", 0) + sell_price
+    set_character_value(character, character, "gold", character.get("gold", 0) + sell_price)
 
     return sell_price
 
+def _combine_order_lines(lines, item_data_dict):
+    """
+    Merge (item_id, qty) lines into item_id -> total qty, checking each line
+
+    Raises:
+        ValueError if a quantity is not a positive integer
+        ItemNotFoundError if an item isn't in item_data_dict
+    """
+    totals = {}
+    for item_id, qty in lines:
+        if not isinstance(qty, int) or qty <= 0:
+            raise ValueError(f"Quantity for '{item_id}' must be a positive integer.")
+        if item_id not in item_data_dict:
+            raise ItemNotFoundError(f"Item '{item_id}' does not exist.")
+        totals[item_id] = totals.get(item_id, 0) + qty
+    return totals
+
+def _build_receipt(totals, item_data_dict, price_of, character):
+    """
+    Itemised receipt for a bulk purchase or sale
+    """
+    receipt_lines = []
+    grand_total = 0
+    for item_id, qty in totals.items():
+        unit_price = price_of(item_data_dict[item_id])
+        line_total = unit_price * qty
+        grand_total += line_total
+        receipt_lines.append({
+            "item_id": item_id,
+            "qty": qty,
+            "unit_price": unit_price,
+            "total": line_total,
+        })
+    return {
+        "lines": receipt_lines,
+        "total_gold": grand_total,
+        "gold_remaining": character.get("gold", 0),
+    }
+
+def purchase_items(character, lines, item_data_dict):
+    """
+    Buy many items at once, all or nothing
+
+    Args:
+        character: Character dictionary
+        lines: Iterable of (item_id, qty) pairs; repeated items are combined
+        item_data_dict: Item catalog (item_id -> item data)
+
+    Gold and inventory space are checked once for the whole order before
+    anything changes, so a failed order leaves the character untouched.
+
+    Returns: Receipt dict with "lines", "total_gold" and "gold_remaining"
+    Raises:
+        ItemNotFoundError if an item isn't in the catalog
+        InsufficientResourcesError if the order costs more than the gold
+        InventoryFullError if the order doesn't fit in inventory
+    """
+    totals = _combine_order_lines(lines, item_data_dict)
+
+    total_cost = 0
+    total_qty = 0
+    for item_id, qty in totals.items():
+        total_cost += item_data_dict[item_id].get("cost", 0) * qty
+        total_qty += qty
+
+    if character.get("gold", 0) < total_cost:
+        raise InsufficientResourcesError(
+            f"Not enough gold: order costs {total_cost}, you have {character.get('gold', 0)}."
+        )
+
+    if get_inventory_space_remaining(character) < total_qty:
+        raise InventoryFullError(f"Not enough inventory space for {total_qty} items.")
+
+    # Every check passed, so apply the whole order
+    inventory = get_inventory(character)
+    set_character_value(character, character, "gold", character["gold"] - total_cost)
+    for item_id, qty in totals.items():
+        inventory.add(item_id, qty)
+
+    return _build_receipt(totals, item_data_dict, lambda data: data.get("cost", 0), character)
+
+def sell_items(character, lines, item_data_dict):
+    """
+    Sell many items at once for half their cost each, all or nothing
+
+    Args: Same as purchase_items
+
+    Returns: Receipt dict with "lines", "total_gold" and "gold_remaining"
+    Raises:
+        ItemNotFoundError if an item isn't in the catalog or the character
+        doesn't have enough copies of it
+    """
+    totals = _combine_order_lines(lines, item_data_dict)
+    inventory = get_inventory(character)
+
+    for item_id, qty in totals.items():
+        if inventory.count(item_id) < qty:
+            raise ItemNotFoundError(
+                f"Only {inventory.count(item_id)} of '{item_id}' in inventory; tried to sell {qty}."
+            )
+
+    total_price = 0
+    for item_id, qty in totals.items():
+        inventory.discard(item_id, qty)
+        total_price += (item_data_dict[item_id].get("cost", 0) // 2) * qty
+    set_character_value(character, character, "gold", character.get("gold", 0) + total_price)
+
+    return _build_receipt(totals, item_data_dict, lambda data: data.get("cost", 0) // 2, character)
+
+# ============================================================================
+# SHARED VENDOR STOCK
+# ============================================================================
+
+class Vendor:
+    """
+    Shop with limited stock shared by many players at once
+
+    Each item has its own lock, so buyers of different items never wait
+    on each other, and the stock check and decrement for one item happen
+    together so stock can't be oversold. Each player's character dict is
+    only expected to be used by that player's thread.
+    """
+
+    def __init__(self, stock):
+        """
+        Args:
+            stock: item_id -> quantity available
+        """
+        self._stock = dict(stock)
+        self._locks = {item_id: threading.Lock() for item_id in self._stock}
+
+    def get_stock(self, item_id):
+        """Current quantity of an item (0 if the vendor doesn't carry it)"""
+        return self._stock.get(item_id, 0)
+
+    def _lock_for(self, item_id):
+        lock = self._locks.get(item_id)
+        if lock is None:
+            raise ItemNotFoundError(f"Vendor does not sell '{item_id}'.")
+        return lock
+
+    def purchase(self, character, item_id, item_data):
+        """
+        Buy one item from this vendor (same rules as purchase_item)
+
+        Raises:
+            ItemNotFoundError if the vendor doesn't carry the item
+            InsufficientResourcesError if out of stock or not enough gold
+            InventoryFullError if inventory is full
+        """
+        with self._lock_for(item_id):
+            if self._stock[item_id] <= 0:
+                raise InsufficientResourcesError(f"'{item_id}' is out of stock.")
+            purchase_item(character, item_id, item_data)
+            self._stock[item_id] -= 1
+        return True
+
+    def purchase_many(self, character, lines, item_data_dict):
+        """
+        All-or-nothing bulk purchase (see purchase_items) against stock
+
+        Locks for every item in the order are taken in sorted order, so
+        two overlapping orders can't deadlock.
+
+        Returns: Receipt from purchase_items
+        """
+        lines = list(lines)
+        totals = _combine_order_lines(lines, item_data_dict)
+        locks = [self._lock_for(item_id) for item_id in sorted(totals)]
+
+        for lock in locks:
+            lock.acquire()
+        try:
+            for item_id, qty in totals.items():
+                if self._stock[item_id] < qty:
+                    raise InsufficientResourcesError(
+                        f"Only {self._stock[item_id]} of '{item_id}' in stock."
+                    )
+            receipt = purchase_items(character, lines, item_data_dict)
+            for item_id, qty in totals.items():
+                self._stock[item_id] -= qty
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+        return receipt
+
+    def sell(self, character, item_id, item_data):
+        """
+        Sell one item to this vendor (same rules as sell_item); the item
+        goes back into the vendor's stock
+
+        Returns: Gold received
+        """
+        with self._lock_for(item_id):
+            price = sell_item(character, item_id, item_data)
+            self._stock[item_id] += 1
+        return price
+
+# ============================================================================
+# SHOP CATALOG INDEX
+# ============================================================================
+
+class ShopIndex:
+    """
+    Item catalog sorted by cost, overall and per item type
+
+    Built once from the item catalog. Cost range queries use bisect, so
+    "weapons I can afford" costs O(log n + results) instead of a full scan.
+    """
+
+    def __init__(self, item_data_dict):
+        ordered = sorted(
+            item_data_dict.items(),
+            key=lambda pair: (pair[1].get("cost", 0), pair[0])
+        )
+
+        # Parallel lists: costs[i] is the cost of item_ids[i]
+        self.costs = [data.get("cost", 0) for _, data in ordered]
+        self.item_ids = [item_id for item_id, _ in ordered]
+
+        self.type_costs = {}
+        self.type_item_ids = {}
+        for item_id, data in ordered:
+            item_type = data.get("type", "unknown")
+            self.type_costs.setdefault(item_type, []).append(data.get("cost", 0))
+            self.type_item_ids.setdefault(item_type, []).append(item_id)
+
+    def get_types(self):
+        """Item types in the catalog, alphabetically"""
+        return sorted(self.type_costs)
+
+    def find_bounds(self, item_type=None, min_cost=None, max_cost=None):
+        """
+        Locate min_cost <= cost <= max_cost without copying any item IDs
+
+        item_type limits results to one type; None means every type.
+
+        Returns: (item_ids, lo, hi) - the matches are item_ids[lo:hi],
+                 cheapest first
+        """
+        if item_type is None:
+            costs, item_ids = self.costs, self.item_ids
+        else:
+            costs = self.type_costs.get(item_type, [])
+            item_ids = self.type_item_ids.get(item_type, [])
+
+        lo = 0 if min_cost is None else bisect_left(costs, min_cost)
+        hi = len(costs) if max_cost is None else bisect_right(costs, max_cost)
+        return item_ids, lo, hi
+
+    def find(self, item_type=None, min_cost=None, max_cost=None):
+        """
+        Item IDs with min_cost <= cost <= max_cost, cheapest first
+
+        item_type limits results to one type; None means every type.
+        """
+        item_ids, lo, hi = self.find_bounds(item_type, min_cost, max_cost)
+        return item_ids[lo:hi]
+
+    def find_affordable(self, character, item_type=None):
+        """Item IDs the character has enough gold for"""
+        return self.find(item_type, max_cost=character.get("gold", 0))
+
+    def find_page(self, page, page_size=10, item_type=None, min_cost=None, max_cost=None):
+        """
+        One page of find() results; only that page's item IDs are copied
+
+        Returns: (page_items, total_pages); page is 0-based and clamped
+        """
+        item_ids, lo, hi = self.find_bounds(item_type, min_cost, max_cost)
+        start, stop, total_pages = _page_bounds(hi - lo, page, page_size)
+        return item_ids[lo + start:lo + stop], total_pages
+
+def _page_bounds(count, page, page_size):
+    """
+    Clamp a 0-based page number to the pages count results fill
+
+    Returns: (start, stop, total_pages)
+    """
+    total_pages = max(1, (count + page_size - 1) // page_size)
+    page = min(max(page, 0), total_pages - 1)
+    start = page * page_size
+    return start, min(start + page_size, count), total_pages
+
+def get_page(results, page, page_size=10):
+    """
+    Slice one page out of a result list
+
+    Returns: (page_items, total_pages); page is 0-based and clamped
+    """
+    start, stop, total_pages = _page_bounds(len(results), page, page_size)
+    return results[start:stop], total_pages
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -329,6 +1091,38 @@ def parse_item_effect(effect_string):
 
     return stat_name, value
 
+def get_item_effects(item_data):
+    """
+    Get an item's effects as a tuple of (stat, value) pairs
+
+    Items from game_data.load_items already carry parsed "effects", so
+    this is just a lookup. Hand-built item dicts fall back to parsing
+    their "effect" string with the same parser load_items uses.
+
+    Raises: InvalidItemTypeError if the effect string is malformed
+    """
+    effects = item_data.get("effects")
+    if effects is not None:
+        return effects
+
+    try:
+        return parse_item_effects(item_data.get("effect", ""))
+    except InvalidDataFormatError as e:
+        raise InvalidItemTypeError(str(e))
+
+def apply_item_effects(character, effects):
+    """
+    Apply every (stat, value) pair in effects to the character
+    """
+    for stat_name, value in effects:
+        apply_stat_effect(character, stat_name, value)
+
+def format_item_effects(effects):
+    """
+    Format effects for messages, e.g. "health+20, magic+5"
+    """
+    return ", ".join(f"{stat_name}+{value}" for stat_name, value in effects)
+
 def apply_stat_effect(character, stat_name, value):
     """
     Apply a stat modification to character
@@ -337,17 +1131,16 @@ def apply_stat_effect(character, stat_name, value):
     # Add value to character[stat_name]
     # If stat is health, ensure it doesn't exceed max_health
 
-    # Initialize stat if it doesn't exist
-    if stat_name not in character:
-        character[stat_name] = 0
-
-    character[stat_name] += value
+    # Stats that don't exist yet start at 0
+    new_value = character.get(stat_name, 0) + value
 
     # Clamp health to max_health so heals don't overflow
     if stat_name == "health":
-        max_hp = character.get("max_health", character["health"])
-        if character["health"] > max_hp:
-            character["health"] = max_hp
+        max_hp = character.get("max_health", new_value)
+        if new_value > max_hp:
+            new_value = max_hp
+
+    set_character_value(character, character, stat_name, new_value)
 
 def display_inventory(character, item_data_dict):
     """
@@ -357,24 +1150,19 @@ def display_inventory(character, item_data_dict):
     # Count items (some may appear multiple times)
     # Display with item names from item_data_dict
 
-    inventory = character.get("inventory", [])
+    inventory = get_inventory(character)
 
     if not inventory:
         print("Inventory is empty.")
         return
 
-    # Count each unique item
-    printed = set()
+    # Each stack already knows its quantity, so this is one pass
     print("Inventory:")
-    for item_id in inventory:
-        if item_id in printed:
-            continue
-        qty = count_item(character, item_id)
+    for item_id, qty in inventory.stacks():
         data = item_data_dict.get(item_id, {})
         name = data.get("name", item_id)
         item_type = data.get("type", "unknown")
         print(f"- {name} (id={item_id}, type={item_type}) x{qty}")
-        printed.add(item_id)
 
 # ============================================================================
 # TESTING
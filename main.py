@@ -16,6 +16,7 @@ import inventory_system
 import quest_handler
 import combat_system
 import game_data
+import game_state
 from custom_exceptions import *
 
 # ============================================================================
@@ -26,8 +27,12 @@ from custom_exceptions import *
 current_character = None
 all_quests = {}
 all_items = {}
+shop_index = None
 game_running = False
 
+# How many shop items to show per page
+SHOP_PAGE_SIZE = 10
+
 # ============================================================================
 # MAIN MENU
 # ============================================================================
@@ -247,13 +252,18 @@ def view_character_stats():
     print(f"Class: {c.get('class')}")
     print(f"Level: {c.get('level')}")
     print(f"Health: {c.get('health')}/{c.get('max_health')}")
-    print(f"Strength: {c.get('strength')}")
-    print(f"Magic: {c.get('magic')}")
+    bonuses = c.get("equipment_bonuses", {})
+    for stat_name in ("strength", "magic"):
+        bonus = bonuses.get(stat_name, 0)
+        bonus_text = f" ({bonus:+} from equipment)" if bonus else ""
+        print(f"{stat_name.capitalize()}: {c.get(stat_name)}{bonus_text}")
+    for slot, entry in c.get("equipment", {}).items():
+        print(f"Equipped {slot}: {entry['item_id']}")
     print(f"Gold: {c.get('gold')}")
 
     # Simple quest progress display using stored lists
-    print(f"Active Quests: {c.get('active_quests', [])}")
-    print(f"Completed Quests: {c.get('completed_quests', [])}")
+    print(f"Active Quests: {list(c.get('active_quests', []))}")
+    print(f"Completed Quests: {list(c.get('completed_quests', []))}")
 
 def view_inventory():
     """Display and manage inventory"""
@@ -318,7 +328,7 @@ def quest_menu():
             available = quest_handler.get_available_quests(current_character, all_quests)
             print("Available quests:", available)
         elif choice == 3:
-            print("Completed quests:", current_character.get("completed_quests", []))
+            print("Completed quests:", list(current_character.get("completed_quests", [])))
         elif choice == 4:
             quest_id = input("Enter quest ID to accept: ").strip()
             try:
@@ -361,17 +371,25 @@ def explore():
 
     print("\n=== EXPLORING... ===")
     # Create a level-appropriate enemy
-    enemy = combat_system.get_random_enemy_for_level(current_character.get("level", 1))
+    try:
+        enemy = combat_system.get_random_enemy_for_level(current_character.get("level", 1))
+    except InvalidTargetError:
+        print("The area is quiet; no enemies roam at your level.")
+        return
     print(f"You encountered a {enemy['name']}!")
 
-    battle = combat_system.SimpleBattle(current_character, enemy)
+    # Exploring only uses basic attacks, so the outcome can be worked out
+    # directly instead of running SimpleBattle turn by turn
     try:
-        result = battle.start_battle()
+        result = combat_system.predict_battle(current_character, enemy)
     except CharacterDeadError:
         print("You were already dead...")
         return
 
-    print(f"Battle finished! Winner: {result['winner']}")
+    current_character["health"] = result["character_health"]
+    enemy["health"] = result["enemy_health"]
+
+    print(f"Battle finished after {result['turns']} turns! Winner: {result['winner']}")
 
     if result["winner"] == "player":
         # Apply rewards using character_manager functions
@@ -389,7 +407,7 @@ def explore():
 
 def shop():
     """Shop menu for buying/selling items"""
-    global current_character, all_items
+    global current_character, all_items, shop_index
     
     # TODO: Implement shop
     # Show available items for purchase
@@ -401,47 +419,87 @@ def shop():
         print("No character loaded.")
         return
 
+    if shop_index is None:
+        shop_index = inventory_system.ShopIndex(all_items)
+
+    # Listing filters: item type (None = all) and whether to hide items
+    # the player can't afford
+    type_filter = None
+    affordable_only = False
+    page = 0
+
     while True:
         print("\n=== SHOP ===")
         print(f"Your gold: {current_character.get('gold', 0)}")
-        print("Items for sale:")
-        for item_id, data in all_items.items():
+
+        max_cost = current_character.get("gold", 0) if affordable_only else None
+        page_items, total_pages = shop_index.find_page(page, SHOP_PAGE_SIZE, type_filter,
+                                                       max_cost=max_cost)
+        page = min(page, total_pages - 1)
+
+        filter_text = type_filter or "all types"
+        if affordable_only:
+            filter_text += ", affordable only"
+        print(f"Items for sale ({filter_text}) - page {page + 1}/{total_pages}:")
+        if not page_items:
+            print("- Nothing matches.")
+        for item_id in page_items:
+            data = all_items[item_id]
             print(f"- {item_id} ({data.get('name')}) - Cost: {data.get('cost')}")
 
         print("\nOptions:")
-        print("1. Buy item")
-        print("2. Sell item")
-        print("3. Back")
+        print("1. Buy items")
+        print("2. Sell items")
+        print("3. Filter by type")
+        print("4. Toggle affordable only")
+        print("5. Next page")
+        print("6. Previous page")
+        print("7. Back")
 
-        choice_str = input("Choose an option (1-3): ").strip()
+        choice_str = input("Choose an option (1-7): ").strip()
 
         try:
             choice = int(choice_str)
         except ValueError:
-            print("Enter a number 1-3.")
+            print("Enter a number 1-7.")
             continue
 
         if choice == 1:
-            item_id = input("Enter item ID to buy: ").strip()
-            if item_id not in all_items:
-                print("That item does not exist.")
-                continue
+            order_text = input("Enter items to buy (e.g. health_potion 3, iron_sword): ").strip()
             try:
-                inventory_system.purchase_item(current_character, item_id, all_items[item_id])
-                print(f"Purchased {item_id}.")
-            except (InsufficientResourcesError, InventoryFullError) as e:
-                print(f"Could not purchase item: {e}")
+                order = parse_order(order_text)
+                receipt = inventory_system.purchase_items(current_character, order, all_items)
+                display_receipt("Purchased", receipt)
+            except ValueError as e:
+                print(f"Could not read order: {e}")
+            except (ItemNotFoundError, InsufficientResourcesError, InventoryFullError) as e:
+                print(f"Could not purchase items: {e}")
         elif choice == 2:
-            item_id = input("Enter item ID to sell: ").strip()
-            if item_id not in all_items:
-                print("That item does not exist in the item list.")
-                continue
+            order_text = input("Enter items to sell (e.g. health_potion 2): ").strip()
             try:
-                gold_received = inventory_system.sell_item(current_character, item_id, all_items[item_id])
-                print(f"Sold {item_id} for {gold_received} gold.")
+                order = parse_order(order_text)
+                receipt = inventory_system.sell_items(current_character, order, all_items)
+                display_receipt("Sold", receipt)
+            except ValueError as e:
+                print(f"Could not read order: {e}")
             except ItemNotFoundError as e:
-                print(f"Could not sell item: {e}")
+                print(f"Could not sell items: {e}")
         elif choice == 3:
+            types = shop_index.get_types()
+            type_text = input(f"Type ({', '.join(types)}, or blank for all): ").strip().lower()
+            if type_text and type_text not in types:
+                print("Unknown item type.")
+                continue
+            type_filter = type_text or None
+            page = 0
+        elif choice == 4:
+            affordable_only = not affordable_only
+            page = 0
+        elif choice == 5:
+            page += 1
+        elif choice == 6:
+            page = max(page - 1, 0)
+        elif choice == 7:
             break
         else:
             print("Invalid choice.")
@@ -468,9 +526,31 @@ def save_game():
     except Exception as e:
         print(f"Could not save game: {e}")
 
+def parse_order(order_text):
+    """
+    Parse shop input like "health_potion 3, iron_sword" into
+    [("health_potion", 3), ("iron_sword", 1)]
+
+    Raises: ValueError if a quantity isn't a number
+    """
+    order = []
+    for entry in order_text.split(","):
+        parts = entry.split()
+        if not parts:
+            continue
+        qty = int(parts[1]) if len(parts) > 1 else 1
+        order.append((parts[0], qty))
+    return order
+
+def display_receipt(action, receipt):
+    """Print a shop receipt from inventory_system.purchase_items/sell_items"""
+    for line in receipt["lines"]:
+        print(f"{action} {line['item_id']} x{line['qty']} @ {line['unit_price']} = {line['total']} gold")
+    print(f"Total: {receipt['total_gold']} gold (you now have {receipt['gold_remaining']})")
+
 def load_game_data():
     """Load all quest and item data from files"""
-    global all_quests, all_items
+    global all_quests, all_items, shop_index
     
     # TODO: Implement data loading
     # Try to load quests with game_data.load_quests()
@@ -480,8 +560,45 @@ def load_game_data():
 
     # Let MissingDataFileError / InvalidDataFormatError bubble up
     # so main() can handle them in one place, as already written.
-    all_quests = game_data.load_quests("data/quests.txt")
-    all_items = game_data.load_items("data/items.txt")
+    # Tracked catalogs let snapshots and restores visit only changed entries
+    all_quests = game_state.track_changes(game_data.load_quests("data/quests.txt"))
+    quest_handler.validate_quest_prerequisites(all_quests)
+    all_items = game_state.track_changes(game_data.load_items("data/items.txt"))
+    shop_index = inventory_system.ShopIndex(all_items)
+    combat_system.set_enemy_types(game_data.load_enemies("data/enemies.txt"))
+
+def snapshot_game_state(previous=None):
+    """
+    Take a read-only snapshot of the current game state
+
+    Pass the last snapshot as previous to share its unchanged parts.
+    Returns: game_state.GameSnapshot
+    """
+    return game_state.take_snapshot(current_character, all_quests, all_items, previous)
+
+def restore_game_state(snapshot):
+    """
+    Roll the current game state back to a snapshot
+
+    Returns: Number of entries that were changed
+    """
+    global current_character, shop_index
+
+    if snapshot.character is None:
+        # No character was loaded when the snapshot was taken
+        current_character = None
+    elif current_character is None:
+        current_character = {}
+
+    changed = game_state.restore_parts(snapshot, current_character, all_quests, all_items)
+
+    # The catalogs were edited in place, so indexes built from them are stale
+    if changed["quests"]:
+        quest_handler.mark_quest_catalog_changed(all_quests)
+    if changed["items"]:
+        shop_index = inventory_system.ShopIndex(all_items)
+
+    return sum(changed.values())
 
 def handle_character_death():
     """Handle character death"""
@@ -537,7 +654,7 @@ def main():
         print("Creating default game data...")
         game_data.create_default_data_files()
         load_game_data()
-    except InvalidDataFormatError as e:
+    except (InvalidDataFormatError, QuestError) as e:
         print(f"Error loading game data: {e}")
         print("Please check data files for errors.")
         return
@@ -14,18 +14,375 @@ from custom_exceptions import (
     QuestRequirementsNotMetError,
     QuestAlreadyCompletedError,
     QuestNotActiveError,
+    QuestPrerequisiteCycleError,
     InsufficientLevelError
 )
 
+from bisect import bisect_left, bisect_right
+
 import character_manager  # Needed to grant XP and gold on quest completion
 
 # Helper to treat "NONE" / "None" / "" as no prerequisite
 _NO_PREREQ_VALUES = {"NONE", "None", "none", "", None}
 
+# ============================================================================
+# QUEST GRAPH
+# ============================================================================
+
+class QuestGraph:
+    """
+    Prerequisite links for a quest catalog, built once per catalog
+
+    - prerequisite_of: quest_id -> its prerequisite quest_id (or None)
+    - dependents_of: quest_id -> quest_ids that list it as prerequisite
+    - topological_order: every quest after its prerequisite
+    - missing: prerequisite ids that aren't in the catalog
+    - level_order / level_keys: quest ids sorted by required level, for
+      range queries
+
+    It's a snapshot of the catalog: after editing quests in place, call
+    mark_quest_catalog_changed (see get_quest_graph).
+
+    Raises QuestPrerequisiteCycleError if prerequisites form a loop.
+    """
+
+    def __init__(self, quest_data_dict):
+        self.prerequisite_of = {}
+        self.dependents_of = {}
+        self.missing = set()
+
+        for quest_id, quest in quest_data_dict.items():
+            prereq = quest.get("prerequisite", "NONE")
+            if prereq in _NO_PREREQ_VALUES:
+                prereq = None
+            elif prereq not in quest_data_dict:
+                self.missing.add(prereq)
+            self.prerequisite_of[quest_id] = prereq
+            self.dependents_of.setdefault(quest_id, [])
+            if prereq is not None:
+                self.dependents_of.setdefault(prereq, []).append(quest_id)
+
+        # Walk down from quests whose prerequisite is none or missing;
+        # anything never reached must sit on a loop
+        order = [
+            qid for qid, prereq in self.prerequisite_of.items()
+            if prereq is None or prereq in self.missing
+        ]
+        i = 0
+        while i < len(order):
+            order.extend(self.dependents_of[order[i]])
+            i += 1
+
+        if len(order) < len(self.prerequisite_of):
+            reached = set(order)
+            start = next(qid for qid in self.prerequisite_of if qid not in reached)
+            raise QuestPrerequisiteCycleError(
+                "Quest prerequisites form a cycle: " + " -> ".join(self._find_cycle(start))
+            )
+
+        self.topological_order = order
+        self._chains = {}
+
+        # Catalog position of each quest (for stable result order) and
+        # quest_ids grouped by required level
+        self.position = {qid: i for i, qid in enumerate(quest_data_dict)}
+        self.level_buckets = {}
+        for quest_id, quest in quest_data_dict.items():
+            level = quest.get("required_level", 1)
+            self.level_buckets.setdefault(level, []).append(quest_id)
+
+        # Level index: quest_ids sorted by (required level, catalog
+        # position), with a parallel list of their levels for bisect
+        self.level_order = []
+        self.level_keys = []
+        for level in sorted(self.level_buckets):
+            for quest_id in self.level_buckets[level]:
+                self.level_order.append(quest_id)
+                self.level_keys.append(level)
+
+    def _find_cycle(self, start):
+        """Follow prerequisite links from start until a quest repeats"""
+        seen = []
+        current = start
+        while current not in seen:
+            seen.append(current)
+            current = self.prerequisite_of[current]
+        cycle = seen[seen.index(current):]
+        cycle.append(current)
+        return cycle
+
+    def quests_in_level_range(self, min_level=None, max_level=None):
+        """
+        quest_ids with min_level <= required level <= max_level, ordered
+        by level and then by catalog position
+        """
+        lo = 0 if min_level is None else bisect_left(self.level_keys, min_level)
+        hi = len(self.level_keys) if max_level is None else bisect_right(self.level_keys, max_level)
+        return self.level_order[lo:hi]
+
+    def get_chain(self, quest_id):
+        """
+        Prerequisite chain from the earliest quest to quest_id (a tuple)
+
+        Chains are memoised, and each one is built from its prerequisite's
+        chain, so repeated queries are a dictionary lookup.
+
+        Raises: QuestNotFoundError if the chain reaches a missing quest
+        """
+        chain = self._chains.get(quest_id)
+        if chain is not None:
+            return chain
+
+        if quest_id not in self.prerequisite_of:
+            raise QuestNotFoundError(f"Quest '{quest_id}' not found in chain.")
+
+        # Climb until a memoised chain (or the start) is found...
+        pending = []
+        current = quest_id
+        while current is not None and current not in self._chains:
+            if current not in self.prerequisite_of:
+                raise QuestNotFoundError(f"Quest '{current}' not found in chain.")
+            pending.append(current)
+            current = self.prerequisite_of[current]
+
+        # ...then build chains back down to quest_id
+        chain = self._chains[current] if current is not None else ()
+        for qid in reversed(pending):
+            chain = chain + (qid,)
+            self._chains[qid] = chain
+        return chain
+
+# ============================================================================
+# QUEST AVAILABILITY TRACKING
+# ============================================================================
+
+# Character key holding the QuestAvailability cache. Keys starting with
+# "_" are runtime caches: they are never saved or snapshotted.
+_AVAILABILITY_KEY = "_quest_availability"
+
+class QuestAvailability:
+    """
+    Set of quests a character can accept right now, kept up to date
+
+    accept_quest, abandon_quest and complete_quest update it directly
+    (completing a quest only re-checks that quest's dependents), and a
+    level-up only re-checks the quests in the newly reached levels. If the
+    character's quest lists are changed some other way, the tracker
+    notices on its next use and is rebuilt.
+    """
+
+    def __init__(self, character, quest_data_dict):
+        self.catalog = quest_data_dict
+        self.graph = get_quest_graph(quest_data_dict)
+        self.available = set()
+        self.level = character.get("level", 1)
+
+        # Quests above the character's level can't be available yet
+        for quest_id in self.graph.quests_in_level_range(max_level=self.level):
+            if self._can_accept(character, quest_id):
+                self.available.add(quest_id)
+        self.stamp = self._make_stamp(character)
+
+    def _make_stamp(self, character):
+        """Cheap fingerprint of the state the tracker was computed from"""
+        active = get_quest_ids(character, "active_quests")
+        completed = get_quest_ids(character, "completed_quests")
+        return (id(active), active.version, id(completed), completed.version)
+
+    def is_current(self, character, quest_data_dict):
+        """True if nothing has changed behind the tracker's back"""
+        return (
+            self.catalog is quest_data_dict
+            and self.graph is get_quest_graph(quest_data_dict)
+            and self.stamp == self._make_stamp(character)
+            and character.get("level", 1) >= self.level
+        )
+
+    def _can_accept(self, character, quest_id):
+        return can_accept_quest(character, quest_id, self.catalog)
+
+    def catch_up_level(self, character):
+        """Unlock quests for any levels gained since the last check"""
+        new_level = character.get("level", 1)
+        buckets = self.graph.level_buckets
+        for level in range(self.level + 1, new_level + 1):
+            for quest_id in buckets.get(level, ()):
+                if self._can_accept(character, quest_id):
+                    self.available.add(quest_id)
+        self.level = new_level
+
+    def quest_accepted(self, character, quest_id):
+        self.available.discard(quest_id)
+        self.stamp = self._make_stamp(character)
+
+    def quest_abandoned(self, character, quest_id):
+        if self._can_accept(character, quest_id):
+            self.available.add(quest_id)
+        self.stamp = self._make_stamp(character)
+
+    def quest_completed(self, character, quest_id):
+        self.available.discard(quest_id)
+        for dependent in self.graph.dependents_of.get(quest_id, ()):
+            if self._can_accept(character, dependent):
+                self.available.add(dependent)
+        self.catch_up_level(character)
+        self.stamp = self._make_stamp(character)
+
+def get_quest_availability(character, quest_data_dict):
+    """
+    Get the character's QuestAvailability for a catalog, building or
+    catching it up as needed
+    """
+    tracker = _get_current_tracker(character, quest_data_dict)
+    if tracker is None:
+        tracker = QuestAvailability(character, quest_data_dict)
+        character[_AVAILABILITY_KEY] = tracker
+    elif character.get("level", 1) != tracker.level:
+        tracker.catch_up_level(character)
+    return tracker
+
+def _get_current_tracker(character, quest_data_dict):
+    """
+    The character's tracker if it still matches their state, else None
+    (a stale tracker is dropped and rebuilt on the next query)
+    """
+    tracker = character.get(_AVAILABILITY_KEY)
+    if tracker is None:
+        return None
+    if not tracker.is_current(character, quest_data_dict):
+        del character[_AVAILABILITY_KEY]
+        return None
+    return tracker
+
+# ============================================================================
+# QUEST STATISTICS CACHE
+# ============================================================================
+
+# Character key holding the QuestStats cache (runtime only, like
+# _quest_availability)
+_STATS_KEY = "_quest_stats"
+
+class QuestStats:
+    """
+    Running totals over a character's completed quests for one catalog
+
+    complete_quest adds to these as quests finish, so progress screens
+    and leaderboards read them in O(1). They're recomputed from scratch
+    (see recompute_quest_stats) for freshly loaded characters, after the
+    catalog is reloaded or marked changed (mark_quest_catalog_changed), or
+    if completed_quests was edited directly.
+    """
+
+    __slots__ = ("catalog", "graph", "completed", "version",
+                 "completed_count", "total_xp", "total_gold")
+
+    def __init__(self, character, quest_data_dict):
+        completed = get_quest_ids(character, "completed_quests")
+        self.catalog = quest_data_dict
+        self.graph = get_quest_graph(quest_data_dict)
+        self.completed = completed
+        self.version = completed.version
+        self.completed_count = 0
+        self.total_xp = 0
+        self.total_gold = 0
+
+        # Only quests that exist in the catalog count
+        for quest_id in completed:
+            quest = quest_data_dict.get(quest_id)
+            if quest is not None:
+                self.add_quest(quest)
+
+    def add_quest(self, quest):
+        self.completed_count += 1
+        self.total_xp += quest.get("reward_xp", 0)
+        self.total_gold += quest.get("reward_gold", 0)
+
+    def is_current(self, character, quest_data_dict):
+        completed = get_quest_ids(character, "completed_quests")
+        return (
+            self.catalog is quest_data_dict
+            and self.graph is get_quest_graph(quest_data_dict)
+            and self.completed is completed
+            and self.version == completed.version
+        )
+
+def recompute_quest_stats(character, quest_data_dict):
+    """
+    Rebuild a character's quest totals from their completed quests
+
+    Returns: QuestStats
+    """
+    stats = QuestStats(character, quest_data_dict)
+    character[_STATS_KEY] = stats
+    return stats
+
+def get_quest_stats(character, quest_data_dict):
+    """
+    Get a character's quest totals, recomputing them only if stale
+
+    Returns: QuestStats
+    """
+    stats = _get_current_stats(character, quest_data_dict)
+    if stats is None:
+        stats = recompute_quest_stats(character, quest_data_dict)
+    return stats
+
+def _get_current_stats(character, quest_data_dict):
+    """The character's QuestStats if still valid for this catalog, else None"""
+    stats = character.get(_STATS_KEY)
+    if stats is None or not stats.is_current(character, quest_data_dict):
+        return None
+    return stats
+
+# The last catalog a graph was built for, and that graph
+_graph_cache = {"catalog": None, "size": 0, "graph": None}
+
+def get_quest_graph(quest_data_dict, rebuild=False):
+    """
+    Get the QuestGraph for a catalog, building it only when needed
+
+    The graph is rebuilt when a different catalog is passed (e.g. after a
+    reload) or its size changes. Edits that keep the same dict and size
+    aren't noticed: after changing a quest's prerequisite, required level
+    or rewards in place, or swapping one quest for another, call
+    mark_quest_catalog_changed (or pass rebuild=True).
+    """
+    cache = _graph_cache
+    if (rebuild or cache["catalog"] is not quest_data_dict
+            or cache["size"] != len(quest_data_dict)):
+        cache["graph"] = QuestGraph(quest_data_dict)
+        cache["catalog"] = quest_data_dict
+        cache["size"] = len(quest_data_dict)
+    return cache["graph"]
+
+def mark_quest_catalog_changed(quest_data_dict=None):
+    """
+    Drop the cached graph after a catalog was edited in place
+
+    The next get_quest_graph call builds a new graph, and availability
+    trackers and quest stats built on the old one recompute themselves
+    on their next use. Passing None always clears the cache.
+    """
+    cache = _graph_cache
+    if quest_data_dict is None or cache["catalog"] is quest_data_dict:
+        cache["catalog"] = None
+        cache["graph"] = None
+
 # ============================================================================
 # QUEST MANAGEMENT
 # ============================================================================
 
+def get_quest_ids(character, key):
+    """
+    Return character[key] ("active_quests"/"completed_quests") as a
+    QuestIdList, converting an old-style list if needed
+    """
+    quest_ids = character.get(key)
+    if not isinstance(quest_ids, character_manager.QuestIdList):
+        quest_ids = character_manager.QuestIdList(quest_ids or [])
+        character[key] = quest_ids
+    return quest_ids
+
 def accept_quest(character, quest_id, quest_data_dict):
     """
     Accept a new quest
@@ -45,8 +402,8 @@ def accept_quest(character, quest_id, quest_data_dict):
     quest = quest_data_dict[quest_id]
 
     # Make sure lists exist
-    active = character.setdefault("active_quests", [])
-    completed = character.setdefault("completed_quests", [])
+    active = get_quest_ids(character, "active_quests")
+    completed = get_quest_ids(character, "completed_quests")
 
     # If already completed, we can't accept again
     if quest_id in completed:
@@ -72,7 +429,10 @@ def accept_quest(character, quest_id, quest_data_dict):
             )
 
     # If all checks pass, add quest to active list
+    tracker = _get_current_tracker(character, quest_data_dict)
     active.append(quest_id)
+    if tracker is not None:
+        tracker.quest_accepted(character, quest_id)
     return True
 
 def complete_quest(character, quest_id, quest_data_dict):
@@ -92,17 +452,24 @@ def complete_quest(character, quest_id, quest_data_dict):
 
     quest = quest_data_dict[quest_id]
 
-    active = character.setdefault("active_quests", [])
-    completed = character.setdefault("completed_quests", [])
+    active = get_quest_ids(character, "active_quests")
+    completed = get_quest_ids(character, "completed_quests")
 
     if quest_id not in active:
         # Used by test_quest_not_active_exception
         raise QuestNotActiveError(f"Quest '{quest_id}' is not active.")
 
+    tracker = _get_current_tracker(character, quest_data_dict)
+    stats = _get_current_stats(character, quest_data_dict)
+    newly_completed = quest_id not in completed
+
     # Remove from active and mark completed
     active.remove(quest_id)
-    if quest_id not in completed:
-        completed.append(quest_id)
+    completed.append(quest_id)
+    if stats is not None:
+        if newly_completed:
+            stats.add_quest(quest)
+        stats.version = completed.version
 
     # Rewards come from quest data
     xp = quest.get("reward_xp", 0)
@@ -112,6 +479,9 @@ def complete_quest(character, quest_id, quest_data_dict):
     character_manager.gain_experience(character, xp)
     character_manager.add_gold(character, gold)
 
+    if tracker is not None:
+        tracker.quest_completed(character, quest_id)
+
     return {"xp": xp, "gold": gold}
 
 def abandon_quest(character, quest_id):
@@ -120,12 +490,18 @@ def abandon_quest(character, quest_id):
     """
     # TODO: Implement quest abandonment
 
-    active = character.setdefault("active_quests", [])
+    active = get_quest_ids(character, "active_quests")
 
     if quest_id not in active:
         raise QuestNotActiveError(f"Quest '{quest_id}' is not active.")
 
+    tracker = character.get(_AVAILABILITY_KEY)
+    if tracker is not None:
+        tracker = _get_current_tracker(character, tracker.catalog)
+
     active.remove(quest_id)
+    if tracker is not None:
+        tracker.quest_abandoned(character, quest_id)
     return True
 
 def get_active_quests(character, quest_data_dict):
@@ -163,11 +539,11 @@ def get_available_quests(character, quest_data_dict):
     # TODO: Implement available quest search
     # Filter all quests by requirements
 
-    available = []
-    for quest_id in quest_data_dict:
-        if can_accept_quest(character, quest_id, quest_data_dict):
-            available.append(quest_data_dict[quest_id])
-    return available
+    # The tracker already knows which quests qualify; just order them the
+    # way they appear in the catalog
+    tracker = get_quest_availability(character, quest_data_dict)
+    ordered = sorted(tracker.available, key=tracker.graph.position.__getitem__)
+    return [quest_data_dict[quest_id] for quest_id in ordered]
 
 # ============================================================================
 # QUEST TRACKING
@@ -179,7 +555,7 @@ def is_quest_completed(character, quest_id):
     """
     # TODO: Implement completion check
 
-    return quest_id in character.get("completed_quests", [])
+    return quest_id in get_quest_ids(character, "completed_quests")
 
 def is_quest_active(character, quest_id):
     """
@@ -187,7 +563,7 @@ def is_quest_active(character, quest_id):
     """
     # TODO: Implement active check
 
-    return quest_id in character.get("active_quests", [])
+    return quest_id in get_quest_ids(character, "active_quests")
 
 def can_accept_quest(character, quest_id, quest_data_dict):
     """
@@ -231,26 +607,8 @@ def get_quest_prerequisite_chain(quest_id, quest_data_dict):
     if quest_id not in quest_data_dict:
         raise QuestNotFoundError(f"Quest '{quest_id}' not found.")
 
-    chain = []
-    current_id = quest_id
-
-    # Walk backwards through prerequisites until there is none
-    while True:
-        if current_id not in quest_data_dict:
-            # If a prereq points to something invalid, raise
-            raise QuestNotFoundError(f"Quest '{current_id}' not found in chain.")
-
-        chain.append(current_id)
-        prereq_id = quest_data_dict[current_id].get("prerequisite", "NONE")
-
-        if prereq_id in _NO_PREREQ_VALUES:
-            break
-
-        current_id = prereq_id
-
-    # We built from quest → earliest; reverse to get earliest → quest
-    chain.reverse()
-    return chain
+    # Chains come from the catalog's memoised prerequisite graph
+    return list(get_quest_graph(quest_data_dict).get_chain(quest_id))
 
 # ============================================================================
 # QUEST STATISTICS
@@ -269,9 +627,9 @@ def get_quest_completion_percentage(character, quest_data_dict):
     if total == 0:
         return 0.0
 
-    # Only count completed quests that actually exist in quest_data_dict
-    completed_ids = character.get("completed_quests", [])
-    completed_count = sum(1 for qid in completed_ids if qid in quest_data_dict)
+    # Only completed quests that actually exist in quest_data_dict count;
+    # the maintained totals already track exactly that
+    completed_count = get_quest_stats(character, quest_data_dict).completed_count
 
     return (completed_count / total) * 100.0
 
@@ -282,16 +640,8 @@ def get_total_quest_rewards_earned(character, quest_data_dict):
     # TODO: Implement reward calculation
     # Sum up reward_xp and reward_gold for all completed quests
 
-    total_xp = 0
-    total_gold = 0
-
-    for qid in character.get("completed_quests", []):
-        quest = quest_data_dict.get(qid)
-        if quest is not None:
-            total_xp += quest.get("reward_xp", 0)
-            total_gold += quest.get("reward_gold", 0)
-
-    return {"total_xp": total_xp, "total_gold": total_gold}
+    stats = get_quest_stats(character, quest_data_dict)
+    return {"total_xp": stats.total_xp, "total_gold": stats.total_gold}
 
 def get_quests_by_level(quest_data_dict, min_level, max_level):
     """
@@ -299,12 +649,13 @@ def get_quests_by_level(quest_data_dict, min_level, max_level):
     """
     # TODO: Implement level filtering
 
-    result = []
-    for quest in quest_data_dict.values():
-        lvl = quest.get("required_level", 1)
-        if min_level <= lvl <= max_level:
-            result.append(quest)
-    return result
+    # Range lookup on the catalog's level index (sorted by level, then
+    # catalog order) instead of checking every quest
+    graph = get_quest_graph(quest_data_dict)
+    return [
+        quest_data_dict[quest_id]
+        for quest_id in graph.quests_in_level_range(min_level, max_level)
+    ]
 
 # ============================================================================
 # DISPLAY FUNCTIONS
@@ -383,6 +734,9 @@ def validate_quest_prerequisites(quest_data_dict):
             raise QuestNotFoundError(
                 f"Quest '{quest_id}' has invalid prerequisite '{prereq}'."
             )
+
+    # Building the graph checks for prerequisite cycles
+    get_quest_graph(quest_data_dict, rebuild=True)
     return True
 
 
@@ -0,0 +1,233 @@
+"""
+Test Character Manager Extensions
+Tests for async save/load and game state snapshots
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+import copy
+import pickle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_exceptions import *
+import character_manager
+import game_state
+import inventory_system
+
+# ============================================================================
+# ASYNC SAVE / LOAD TESTS
+# ============================================================================
+
+def test_async_save_and_load_round_trip(tmp_path):
+    """Test that async saves can be loaded back by the async loader"""
+    char = character_manager.create_character("AsyncHero", "Rogue")
+    char['inventory'] = ["health_potion", "iron_sword"]
+    save_dir = str(tmp_path)
+
+    async def run():
+        await character_manager.async_save_character(char, save_dir)
+        names = await character_manager.async_list_saved_characters(save_dir)
+        loaded = await character_manager.async_load_character("AsyncHero", save_dir)
+        return names, loaded
+
+    names, loaded = asyncio.run(run())
+
+    assert names == ["AsyncHero"]
+    assert loaded['class'] == "Rogue"
+    assert loaded['inventory'] == ["health_potion", "iron_sword"]
+
+def test_async_load_raises_same_exceptions(tmp_path):
+    """Test that async loading keeps the sync exception types"""
+    save_dir = str(tmp_path)
+
+    with pytest.raises(CharacterNotFoundError):
+        asyncio.run(character_manager.async_load_character("Nobody", save_dir))
+
+    with open(os.path.join(save_dir, "Broken_save.txt"), "w") as f:
+        f.write("this line has no separator\n")
+
+    with pytest.raises(InvalidSaveDataError):
+        asyncio.run(character_manager.async_load_character("Broken", save_dir))
+
+def test_async_save_many_characters(tmp_path):
+    """Test that a burst of saves larger than the queue limit completes"""
+    save_dir = str(tmp_path)
+    count = character_manager.MAX_PENDING_SAVE_IO * 2
+    chars = [
+        character_manager.create_character(f"Hero{i}", "Warrior")
+        for i in range(count)
+    ]
+
+    async def run():
+        await asyncio.gather(*[
+            character_manager.async_save_character(c, save_dir) for c in chars
+        ])
+        return await character_manager.async_list_saved_characters(save_dir)
+
+    assert len(asyncio.run(run())) == count
+
+# ============================================================================
+# GAME STATE SNAPSHOT TESTS
+# ============================================================================
+
+def test_snapshot_restore_rolls_back_changes():
+    """Test that restoring a snapshot undoes character and catalog edits"""
+    char = character_manager.create_character("SnapTest", "Cleric")
+    quests = {'q1': {'quest_id': 'q1', 'required_level': 1, 'prerequisite': 'NONE'}}
+    items = {'health_potion': {'item_id': 'health_potion', 'cost': 25}}
+
+    snap = game_state.take_snapshot(char, quests, items)
+
+    char['gold'] = 5
+    char['inventory'].append("iron_sword")
+    char['equipped_weapon'] = "iron_sword"
+    items['health_potion']['cost'] = 999
+    quests['q2'] = {'quest_id': 'q2'}
+
+    changed = game_state.restore_snapshot(snap, char, quests, items)
+
+    assert changed == 5
+    assert char['gold'] == 100
+    assert char['inventory'] == []
+    assert 'equipped_weapon' not in char
+    assert items['health_potion']['cost'] == 25
+    assert 'q2' not in quests
+
+def test_snapshot_is_read_only_and_shares_unchanged_parts():
+    """Test that snapshots can't be edited and reuse unchanged entries"""
+    char = character_manager.create_character("ShareTest", "Mage")
+    items = {'a': {'cost': 1}, 'b': {'cost': 2}}
+
+    first = game_state.take_snapshot(char, {}, items)
+    items['b']['cost'] = 3
+    second = game_state.take_snapshot(char, {}, items, previous=first)
+
+    assert second.items['a'] is first.items['a']
+    assert second.items['b'] is not first.items['b']
+    assert second.character['inventory'] is first.character['inventory']
+
+    with pytest.raises(TypeError):
+        first.character['gold'] = 0
+    with pytest.raises(AttributeError):
+        first.items = {}
+
+def test_snapshot_restore_keeps_tuples_as_tuples():
+    """Test that restored tuples (like equipment effects) aren't turned into lists"""
+    char = character_manager.create_character("TupleTest", "Warrior")
+    char['equipment'] = {'weapon': {'item_id': 'sword', 'effects': (('strength', 5),)}}
+
+    snap = game_state.take_snapshot(char, {}, {})
+    char['equipment']['weapon']['effects'] = (('strength', 9),)
+    char['inventory'].append("sword")
+    game_state.restore_snapshot(snap, char, {}, {})
+
+    assert char['equipment']['weapon']['effects'] == (('strength', 5),)
+    assert char['inventory'] == []
+
+def test_snapshot_restore_needs_a_character_dict():
+    """Test that a snapshot's character isn't silently skipped"""
+    char = character_manager.create_character("NoneTest", "Rogue")
+    snap = game_state.take_snapshot(char, {}, {})
+
+    with pytest.raises(ValueError):
+        game_state.restore_snapshot(snap, None, {}, {})
+
+    fresh = {}
+    changed = game_state.restore_parts(snap, fresh, {}, {})
+    assert changed["character"] == len(fresh)
+    assert fresh['name'] == "NoneTest"
+
+def test_main_restore_rebuilds_indexes(monkeypatch):
+    """Test that main's restore brings back the character and rebuilds the shop index"""
+    import main
+    char = character_manager.create_character("MainTest", "Mage")
+    items = {'health_potion': {'item_id': 'health_potion', 'type': 'consumable', 'cost': 25}}
+    monkeypatch.setattr(main, "current_character", char)
+    monkeypatch.setattr(main, "all_quests", {})
+    monkeypatch.setattr(main, "all_items", items)
+    monkeypatch.setattr(main, "shop_index", None)
+
+    snap = main.snapshot_game_state()
+    items['health_potion']['cost'] = 999
+    monkeypatch.setattr(main, "current_character", None)
+    main.restore_game_state(snap)
+
+    assert main.current_character['name'] == "MainTest"
+    assert items['health_potion']['cost'] == 25
+    assert isinstance(main.shop_index, main.inventory_system.ShopIndex)
+
+def test_tracked_catalog_restore_only_visits_changed_keys(monkeypatch):
+    """Test that restoring a tracked catalog skips entries nobody wrote to"""
+    items = game_state.track_changes(
+        {f"item_{i}": {'item_id': f"item_{i}", 'cost': i} for i in range(1000)}
+    )
+    quests = game_state.track_changes({'q1': {'quest_id': 'q1', 'required_level': 1}})
+    char = character_manager.create_character("TrackTest", "Warrior")
+    snap = game_state.take_snapshot(char, quests, items)
+
+    items['item_5']['cost'] = 999           # nested edit
+    items['new_item'] = {'cost': 1}         # added entry
+    del items['item_7']                     # removed entry
+    quests.pop('q1')
+
+    visited = []
+    restore_key = game_state._restore_key
+    def counting_restore_key(live, frozen, key):
+        visited.append(key)
+        return restore_key(live, frozen, key)
+    monkeypatch.setattr(game_state, "_restore_key", counting_restore_key)
+
+    changed = game_state.restore_parts(snap, char, quests, items)
+
+    assert changed == {'character': 0, 'quests': 1, 'items': 3}
+    assert len(visited) - len(char) == 4
+    assert items['item_5']['cost'] == 5
+    assert items['item_7'] == {'item_id': 'item_7', 'cost': 7}
+    assert 'new_item' not in items
+    assert quests['q1']['required_level'] == 1
+
+    # Restored entries are tracked again
+    items['item_7']['cost'] = 70
+    assert game_state.restore_snapshot(snap, char, quests, items) == 1
+    assert items['item_7']['cost'] == 7
+
+def test_tracked_catalog_snapshot_chain():
+    """Test previous= sharing and restoring an older snapshot after a newer one"""
+    items = game_state.track_changes({'a': {'cost': 1}, 'b': {'cost': 2}})
+
+    first = game_state.take_snapshot(None, {}, items)
+    items['b']['cost'] = 3
+    second = game_state.take_snapshot(None, {}, items, previous=first)
+    third = game_state.take_snapshot(None, {}, items, previous=second)
+
+    assert second.items['a'] is first.items['a']
+    assert second.items['b']['cost'] == 3
+    assert third.items is second.items
+
+    items['a']['cost'] = 10
+    assert game_state.restore_snapshot(first, None, {}, items) == 2
+    assert items == {'a': {'cost': 1}, 'b': {'cost': 2}}
+    assert game_state.restore_snapshot(second, None, {}, items) == 1
+    assert items['b']['cost'] == 3
+
+    # Copies are plain dicts and don't log into the original
+    copied = copy.deepcopy(items)
+    assert type(copied) is dict and type(copied['a']) is dict
+    assert pickle.loads(pickle.dumps(items)) == items
+
+def test_inventory_version_short_cuts_comparison():
+    """Test that an untouched inventory matches its frozen copy by version"""
+    inventory = inventory_system.Inventory(["health_potion", "health_potion"])
+    frozen = game_state.freeze_value(inventory)
+
+    assert game_state.matches_frozen(inventory, frozen)
+    inventory.add("iron_sword")
+    assert not game_state.matches_frozen(inventory, frozen)
+    inventory.discard("iron_sword")
+    assert game_state.matches_frozen(inventory, frozen)
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,554 @@
+"""
+Test Combat System Extensions
+Tests for batch simulation and other combat additions
+"""
+
+import pytest
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_exceptions import *
+import character_manager
+import combat_system
+import game_data
+import tournament
+
+def make_roster(count, seed):
+    """Build random (character, enemy) pairs from a seeded RNG"""
+    rng = random.Random(seed)
+    characters = []
+    enemies = []
+    for i in range(count):
+        char = character_manager.create_character(f"Sim{i}", rng.choice(["Warrior", "Mage", "Rogue", "Cleric"]))
+        char['health'] = rng.randint(1, 200)
+        char['strength'] = rng.randint(0, 40)
+        characters.append(char)
+        enemy = combat_system.create_enemy(rng.choice(list(combat_system.ENEMY_STATS)))
+        enemy['health'] = rng.randint(0, 250)
+        enemies.append(enemy)
+    return characters, enemies
+
+def run_scalar(character, enemy):
+    """Run SimpleBattle on copies and return (result, battle)"""
+    battle = combat_system.SimpleBattle(dict(character), dict(enemy))
+    return battle.start_battle(), battle
+
+# ============================================================================
+# BATCH SIMULATION TESTS
+# ============================================================================
+
+def test_simulate_battles_matches_simple_battle(capsys):
+    """Test that every batch result equals the scalar battle"""
+    characters, enemies = make_roster(200, seed=7)
+    results = combat_system.simulate_battles(characters, enemies)
+    # The batch run prints nothing
+    assert capsys.readouterr().out == ""
+
+    wins = 0
+    for i, (char, enemy) in enumerate(zip(characters, enemies)):
+        result, battle = run_scalar(char, enemy)
+        wins += result['winner'] == 'player'
+        assert results['turns'][i] == battle.turn_count
+        assert results['character_health'][i] == battle.character['health']
+        assert results['enemy_health'][i] == battle.enemy['health']
+
+    assert results['wins'] == wins
+    assert results['win_rate'] == wins / 200
+    assert sum(results['turn_counts'].values()) == 200
+
+def test_simulate_battles_leaves_inputs_alone():
+    """Test that the batch works on its own arrays"""
+    characters, enemies = make_roster(5, seed=1)
+    before = [dict(c) for c in characters], [dict(e) for e in enemies]
+    combat_system.simulate_battles(characters, enemies)
+    assert ([dict(c) for c in characters], [dict(e) for e in enemies]) == before
+
+def test_simulate_battles_errors():
+    """Test the same dead-character rule as start_battle"""
+    char = character_manager.create_character("Dead", "Warrior")
+    char['health'] = 0
+    with pytest.raises(CharacterDeadError):
+        combat_system.simulate_battles([char], [combat_system.create_enemy("goblin")])
+    with pytest.raises(ValueError):
+        combat_system.simulate_battles([char], [])
+
+# ============================================================================
+# BATTLE PREDICTION TESTS
+# ============================================================================
+
+def test_predict_battle_matches_start_battle():
+    """Test that the closed form agrees with the battle loop"""
+    characters, enemies = make_roster(300, seed=11)
+    for char, enemy in zip(characters, enemies):
+        prediction = combat_system.predict_battle(char, enemy)
+        result, battle = run_scalar(char, enemy)
+
+        for key in ('winner', 'xp_gained', 'gold_gained'):
+            assert prediction[key] == result[key]
+        assert prediction['turns'] == battle.turn_count
+        assert prediction['character_health'] == battle.character['health']
+        assert prediction['enemy_health'] == battle.enemy['health']
+
+def test_predict_battle_edge_cases():
+    """Test exact kills, ties and a dead character"""
+    char = {'name': 'Hero', 'health': 2, 'strength': 12}
+    enemy = {'name': 'Dummy', 'health': 22, 'strength': 4, 'xp_reward': 1, 'gold_reward': 2}
+    # Both need exactly two hits; the player swings first and wins
+    prediction = combat_system.predict_battle(char, enemy)
+    assert prediction['winner'] == 'player'
+    assert prediction['turns'] == 2
+    assert prediction['character_health'] == 1
+    assert prediction['gold_gained'] == 2
+    assert char['health'] == 2  # inputs untouched
+
+    char['health'] = 0
+    with pytest.raises(CharacterDeadError):
+        combat_system.predict_battle(char, enemy)
+
+# ============================================================================
+# BATTLE LOG SINK TESTS
+# ============================================================================
+
+class Template:
+    """Log template that counts how often it gets formatted"""
+    def __init__(self):
+        self.formatted = 0
+    def format(self, *args):
+        self.formatted += 1
+        return "formatted"
+
+def test_null_sink_skips_formatting(capsys):
+    """Test that a discarding sink never formats or prints"""
+    previous = combat_system.set_battle_log_sink(combat_system.NullLogSink())
+    try:
+        template = Template()
+        combat_system.display_battle_log(template, 1, 2)
+        characters, enemies = make_roster(3, seed=2)
+        run_scalar(characters[0], enemies[0])
+    finally:
+        combat_system.set_battle_log_sink(previous)
+    assert template.formatted == 0
+    assert capsys.readouterr().out == ""
+
+def test_ring_buffer_sink_keeps_last_messages():
+    """Test the ring buffer capacity and lazy formatting"""
+    sink = combat_system.RingBufferLogSink(capacity=2)
+    previous = combat_system.set_battle_log_sink(sink)
+    try:
+        combat_system.display_battle_log("one")
+        combat_system.display_battle_log("{} hits for {} damage.", "Hero", 3)
+        combat_system.display_battle_log("three {}", "!")
+    finally:
+        combat_system.set_battle_log_sink(previous)
+    assert sink.messages() == ["Hero hits for 3 damage.", "three !"]
+
+def test_batched_sink_writes_once_per_battle():
+    """Test that the batched sink flushes the whole battle in one write"""
+    class Stream:
+        def __init__(self):
+            self.writes = []
+        def write(self, text):
+            self.writes.append(text)
+
+    stream = Stream()
+    previous = combat_system.set_battle_log_sink(combat_system.BatchedLogSink(stream))
+    try:
+        char = character_manager.create_character("Batch", "Warrior")
+        result, battle = run_scalar(char, combat_system.create_enemy("orc"))
+    finally:
+        combat_system.set_battle_log_sink(previous)
+
+    assert len(stream.writes) == 1
+    lines = stream.writes[0].splitlines()
+    assert lines[0] == ">>> Batch hits for 12 damage."
+    assert len(lines) == battle.turn_count * 2 - (result['winner'] == 'player')
+
+# ============================================================================
+# BATTLE REPLAY TESTS
+# ============================================================================
+
+def test_replay_round_trip_matches_battle(tmp_path):
+    """Test that a recorded battle replays to the same result"""
+    char = character_manager.create_character("Replay", "Rogue")
+    enemy = combat_system.create_enemy("orc")
+    record = combat_system.BattleRecord()
+    battle = combat_system.SimpleBattle(char, enemy, recorder=record)
+
+    battle.turn_count = 1
+    random.seed(3)
+    battle.special_ability()
+    battle.attempt_escape()
+    battle.combat_active = True
+    battle.turn_count = 0
+    result = battle.start_battle()
+
+    path = tmp_path / "battle.replay"
+    combat_system.save_replay(record, path)
+    # Header plus a few bytes per event (rolls only where something was drawn)
+    assert path.stat().st_size <= 25 + 5 * len(record)
+    loaded = combat_system.load_replay(path)
+
+    sink = combat_system.RingBufferLogSink()
+    previous = combat_system.set_battle_log_sink(sink)
+    try:
+        replayed = combat_system.replay_battle(loaded, "Replay", "Orc")
+    finally:
+        combat_system.set_battle_log_sink(previous)
+
+    assert replayed['winner'] == result['winner']
+    assert replayed['turns'] == battle.turn_count
+    assert replayed['character_health'] == char['health']
+    assert replayed['enemy_health'] == enemy['health']
+
+    events = list(loaded.events())
+    assert events[0]['action'] == combat_system.ACTION_CRITICAL_STRIKE
+    assert events[0]['roll'] is not None
+    assert events[1]['action'] == combat_system.ACTION_ESCAPE
+    assert sink.messages()[2] == "Replay hits for 9 damage."
+
+def test_replay_rejects_bad_data():
+    """Test corrupted and tampered replays"""
+    with pytest.raises(CorruptedDataError):
+        combat_system.BattleRecord.from_bytes(b"nope")
+
+    record = combat_system.BattleRecord()
+    char = character_manager.create_character("Cheat", "Warrior")
+    combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"), recorder=record)
+    record.add(combat_system.ACTOR_PLAYER, combat_system.ACTION_ATTACK, 5, 0)
+    data = combat_system.BattleRecord.from_bytes(record.to_bytes())
+    with pytest.raises(CorruptedDataError):
+        combat_system.replay_battle(data)
+    with pytest.raises(CorruptedDataError):
+        combat_system.BattleRecord.from_bytes(record.to_bytes()[:-1])
+
+    # A byte flipped in the stored amount no longer matches the final health
+    record = combat_system.BattleRecord()
+    combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"), recorder=record)
+    record.add(combat_system.ACTOR_PLAYER, combat_system.ACTION_ATTACK, 5, 45)
+    tampered = bytearray(record.to_bytes())
+    tampered[-1] = 6
+    with pytest.raises(CorruptedDataError):
+        combat_system.replay_battle(combat_system.BattleRecord.from_bytes(bytes(tampered)))
+
+def test_replay_keeps_long_battles():
+    """Test that turn numbers past 16 bits survive a round trip"""
+    record = combat_system.BattleRecord()
+    record.character_health = 100
+    record.enemy_health = 100
+    record.final_health = [100, 100]
+    for turn in (1, 70000, 70000, 5):
+        record.turn = turn
+        record.add(combat_system.ACTOR_PLAYER, combat_system.ACTION_HEAL, 0, 100)
+
+    loaded = combat_system.BattleRecord.from_bytes(record.to_bytes())
+    assert [e['turn'] for e in loaded.events()] == [1, 70000, 70000, 5]
+
+# ============================================================================
+# BATTLE RNG TESTS
+# ============================================================================
+
+def escape_rolls(rng, count=20):
+    """Try to escape `count` fresh battles and return the outcomes"""
+    outcomes = []
+    for _ in range(count):
+        char = character_manager.create_character("Runner", "Rogue")
+        battle = combat_system.SimpleBattle(char, combat_system.create_enemy("goblin"), rng=rng)
+        outcomes.append(battle.attempt_escape())
+    return outcomes
+
+def test_battle_rng_is_reproducible(capsys):
+    """Test that the same stream gives the same escapes and crits"""
+    first = escape_rolls(combat_system.make_battle_rng(42, 0))
+    random.random()  # global state must not matter
+    second = escape_rolls(combat_system.make_battle_rng(42, 0))
+    assert first == second
+
+    enemy_a = {'health': 500}
+    enemy_b = {'health': 500}
+    char = {'name': 'Rogue', 'strength': 10}
+    combat_system.rogue_critical_strike(char, enemy_a, rng=random.Random(5))
+    combat_system.rogue_critical_strike(char, enemy_b, rng=random.Random(5))
+    assert enemy_a == enemy_b
+
+def test_split_seed_streams_are_distinct():
+    """Test that sub-streams differ from each other and are stable"""
+    seeds = {combat_system.split_seed(1, worker) for worker in range(100)}
+    assert len(seeds) == 100
+    assert combat_system.split_seed(1, 3, 7) == combat_system.split_seed(1, 3, 7)
+    assert combat_system.split_seed(1, 3, 7) != combat_system.split_seed(1, 37)
+
+def test_split_seed_paths_do_not_collide():
+    """Test that paths which join to the same text still get their own seeds"""
+    split_seed = combat_system.split_seed
+    assert split_seed(0, "a:b") != split_seed(0, "a", "b")
+    assert split_seed(0, 1) != split_seed(0, "1")
+    assert split_seed("0:1") != split_seed(0, 1)
+    assert split_seed(0, "ab", "c") != split_seed(0, "a", "bc")
+
+# ============================================================================
+# TOURNAMENT TESTS
+# ============================================================================
+
+def test_tournament_results_do_not_depend_on_workers():
+    """Test that the same seed gives the same grid in-process and pooled"""
+    inline = tournament.run_tournament(max_level=2, trials=30, workers=1, chunk_size=7, seed=9)
+    pooled = tournament.run_tournament(max_level=2, trials=30, workers=2, chunk_size=7, seed=9)
+    assert inline == pooled
+    assert len(inline) == len(character_manager.VALID_CLASSES) * len(combat_system.ENEMY_STATS) * 2
+    assert all(cell['battles'] == 30 for cell in inline.values())
+
+def test_tournament_csv_output(capsys):
+    """Test the CLI writes one CSV row per cell"""
+    tournament.main(["--levels", "1", "--trials", "5", "--workers", "1"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == ",".join(tournament.CSV_FIELDS)
+    assert len(lines) == 1 + len(character_manager.VALID_CLASSES) * len(combat_system.ENEMY_STATS)
+
+def test_tournament_uses_enemy_data_file(tmp_path, capsys):
+    """Test that the tournament fights the enemies from the data file"""
+    path = tmp_path / "enemies.txt"
+    path.write_text(
+        "ENEMY_ID: slime\nNAME: Slime\nHEALTH: 5\nSTRENGTH: 1\nMAGIC: 0\n"
+        "XP_REWARD: 1\nGOLD_REWARD: 1\nSPAWN: 1+:1\n"
+    )
+    before = dict(combat_system.ENEMY_STATS)
+    tournament.main(["--levels", "1", "--trials", "3", "--workers", "1", "--enemies", str(path)])
+    rows = capsys.readouterr().out.splitlines()[1:]
+    assert {row.split(",")[1] for row in rows} == {"slime"}
+    assert combat_system.ENEMY_STATS == before
+
+    enemy_data = game_data.load_enemies(str(path))
+    pooled = tournament.run_tournament(max_level=1, trials=3, workers=2, enemy_data=enemy_data)
+    assert {enemy for _, enemy, _ in pooled} == {"slime"}
+
+# ============================================================================
+# ABILITY COOLDOWN TESTS
+# ============================================================================
+
+def test_special_ability_cooldown_in_battle(capsys):
+    """Test that abilities can't be used again until the cooldown ends"""
+    char = character_manager.create_character("Cooler", "Warrior")
+    enemy = combat_system.create_enemy("dragon")
+    battle = combat_system.SimpleBattle(char, enemy)
+    battle.turn_count = 1
+
+    battle.special_ability()
+    assert not battle.ability_ready()
+    with pytest.raises(AbilityOnCooldownError):
+        battle.special_ability()
+
+    battle.turn_count = 1 + combat_system.ABILITY_COOLDOWNS["Warrior"]
+    assert battle.ability_ready()
+    battle.special_ability()
+
+def test_cooldown_scheduler_expiry():
+    """Test that advance only returns the cooldowns that ended"""
+    scheduler = combat_system.CooldownScheduler()
+    for i in range(100):
+        scheduler.start(("goblin", i), 0, 1 + i % 10)
+    scheduler.start(("goblin", 0), 0, 5)  # restarted; old entry is stale
+
+    assert scheduler.advance(0) == []
+    assert sorted(scheduler.advance(1)) == [("goblin", i) for i in range(10, 100, 10)]
+    assert sorted(scheduler.advance(2)) == [("goblin", i) for i in range(1, 100, 10)]
+    assert scheduler.remaining(("goblin", 0), 2) == 3
+    assert len(scheduler) == 81
+    scheduler.advance(10)
+    assert len(scheduler) == 0
+    assert scheduler.is_ready(("goblin", 9), 10)
+
+# ============================================================================
+# ENCOUNTER TESTS
+# ============================================================================
+
+def make_party(count, health=100, strength=12):
+    return [{'name': f"Hero{i}", 'health': health, 'strength': strength} for i in range(count)]
+
+def test_encounter_lowest_health_targeting(capsys):
+    """Test that attacks focus the weakest living opponent"""
+    party = make_party(1, strength=30)
+    goblins = [combat_system.create_enemy("goblin") for _ in range(3)]
+    goblins[1]['health'] = 10
+    goblins[2]['health'] = 40
+
+    encounter = combat_system.Encounter(party, goblins)
+    encounter.attack(0)
+    assert goblins[1]['health'] == 0
+    assert encounter.alive_count(combat_system.ENEMIES) == 2
+    encounter.attack(0)
+    assert goblins[2]['health'] == 12
+    encounter.attack(0)
+    assert goblins[2]['health'] == 0
+    assert goblins[0]['health'] == 50
+
+def test_encounter_speed_initiative_and_rewards(capsys):
+    """Test that faster combatants act more often and rewards add up"""
+    fast = {'name': 'Fast', 'health': 1000, 'strength': 1, 'speed': 20}
+    slow = {'name': 'Slow', 'health': 1000, 'strength': 1, 'speed': 10}
+    dummy = {'name': 'Dummy', 'health': 1000, 'strength': 0, 'speed': 1}
+    encounter = combat_system.Encounter([fast, slow], [dummy])
+    assert encounter.run_round() == 3
+    assert dummy['health'] == 997
+
+    party = make_party(3, strength=40)
+    enemies = [combat_system.create_enemy("goblin") for _ in range(4)]
+    result = combat_system.Encounter(party, enemies, targeting="random",
+                                     rng=random.Random(1)).run()
+    assert result['winner'] == 'party'
+    assert result['enemies_alive'] == 0
+    assert result['xp_gained'] == 4 * 25
+    assert result['gold_gained'] == 4 * 10
+
+def test_encounter_errors():
+    """Test invalid encounters"""
+    with pytest.raises(CharacterDeadError):
+        combat_system.Encounter(make_party(2, health=0), [combat_system.create_enemy("orc")])
+    with pytest.raises(InvalidTargetError):
+        combat_system.Encounter(make_party(2), [])
+    with pytest.raises(ValueError):
+        combat_system.Encounter(make_party(2), [combat_system.create_enemy("orc")], targeting="first")
+
+# ============================================================================
+# ENEMY SPAWN TESTS
+# ============================================================================
+
+def test_alias_table_matches_weights():
+    """Test that draws follow the weights"""
+    table = combat_system.AliasTable(["a", "b", "c", "never"], [1, 3, 6, 0])
+    rng = random.Random(4)
+    counts = {"a": 0, "b": 0, "c": 0}
+    for _ in range(20000):
+        counts[table.sample(rng)] += 1
+    assert abs(counts["a"] / 20000 - 0.1) < 0.01
+    assert abs(counts["b"] / 20000 - 0.3) < 0.015
+    assert abs(counts["c"] / 20000 - 0.6) < 0.015
+
+def test_spawn_table_levels():
+    """Test level ranges, open-ended ranges and empty levels"""
+    spawn = combat_system.SpawnTable({
+        'rat': {'spawn': ((2, 3, 1),)},
+        'bear': {'spawn': ((3, None, 1),)},
+    })
+    with pytest.raises(InvalidTargetError):
+        spawn.sample(1)
+    assert spawn.sample(2) == 'rat'
+    assert set(spawn.table_for(3).choices) == {'rat', 'bear'}
+    assert spawn.sample(50) == 'bear'
+
+def test_load_enemies_and_random_enemies():
+    """Test the enemy data file drives get_random_enemy_for_level"""
+    enemies = game_data.load_enemies("data/enemies.txt")
+    assert set(enemies) == {'goblin', 'orc', 'dragon'}
+    assert enemies['orc']['spawn'] == ((1, 2, 20), (3, 5, 60), (6, None, 40))
+
+    saved = dict(combat_system.ENEMY_STATS)
+    try:
+        combat_system.set_enemy_types(enemies)
+        rng = random.Random(2)
+        seen = {combat_system.get_random_enemy_for_level(1, rng)['name'] for _ in range(200)}
+        assert seen == {'Goblin', 'Orc'}
+        seen = {combat_system.get_random_enemy_for_level(9, rng)['name'] for _ in range(200)}
+        assert seen == {'Orc', 'Dragon'}
+    finally:
+        combat_system.set_enemy_types(saved)
+
+def test_bad_spawn_weights():
+    """Test that malformed SPAWN lines are rejected"""
+    for bad in ("1-2", "3-1:5", "x:5", "1:-1"):
+        with pytest.raises(InvalidDataFormatError):
+            game_data.parse_spawn_weights(bad)
+    assert game_data.parse_spawn_weights("NONE") == ()
+
+def test_enemy_file_must_cover_every_level(tmp_path):
+    """Test that spawn ranges leaving a level uncovered are rejected at load"""
+    block = ("ENEMY_ID: {0}\nNAME: {0}\nHEALTH: 10\nSTRENGTH: 1\nMAGIC: 0\n"
+             "XP_REWARD: 1\nGOLD_REWARD: 1\nSPAWN: {1}\n")
+    cases = {
+        "1-2:80": 3,                 # no open-ended tail
+        "2+:5": 1,                   # level 1 missing
+        "1-2:5, 4+:5": 3,            # gap in the middle
+        "1-2:5, 3+:0": 3,            # tail only has zero weight
+    }
+    for spawn, level in cases.items():
+        path = tmp_path / "enemies.txt"
+        path.write_text(block.format("gap", spawn))
+        with pytest.raises(InvalidDataFormatError, match=f"level {level}"):
+            game_data.load_enemies(str(path))
+
+    path.write_text(block.format("low", "1-2:80") + "\n" + block.format("high", "3+:1"))
+    assert set(game_data.load_enemies(str(path))) == {"low", "high"}
+
+def test_explore_survives_levels_without_enemies(monkeypatch, capsys):
+    """Test that exploring where nothing spawns prints a message instead of crashing"""
+    import main
+    enemies = {'rat': {'name': 'Rat', 'health': 5, 'strength': 1, 'magic': 0,
+                       'xp_reward': 1, 'gold_reward': 1, 'spawn': ((1, 2, 80),)}}
+    char = character_manager.create_character("Wanderer", "Warrior")
+    char['level'] = 3
+    monkeypatch.setattr(main, "current_character", char)
+
+    saved = dict(combat_system.ENEMY_STATS)
+    try:
+        combat_system.set_enemy_types(enemies)
+        main.explore()
+    finally:
+        combat_system.set_enemy_types(saved)
+    assert "no enemies roam" in capsys.readouterr().out
+    assert char['health'] == char['max_health']
+
+def test_default_enemy_file_has_every_enemy(tmp_path, monkeypatch):
+    """Test that generated defaults match the shipped enemy data"""
+    monkeypatch.chdir(tmp_path)
+    game_data.create_default_data_files()
+    shipped = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "data", "enemies.txt")
+    assert game_data.load_enemies("data/enemies.txt") == game_data.load_enemies(shipped)
+
+# ============================================================================
+# ENEMY TEMPLATE TESTS
+# ============================================================================
+
+def test_enemies_share_template_but_not_health():
+    """Test the flyweight enemy still reads like a dictionary"""
+    a = combat_system.create_enemy("goblin")
+    b = combat_system.create_enemy("Goblin")
+    assert a.template is b.template
+
+    a['health'] -= 20
+    assert a['health'] == 30 and b['health'] == 50
+    assert a['name'] == "Goblin" and a['strength'] == 8 and a['xp_reward'] == 25
+    assert dict(b) == {
+        'name': 'Goblin', 'health': 50, 'max_health': 50, 'strength': 8,
+        'magic': 2, 'xp_reward': 25, 'gold_reward': 10,
+    }
+    assert b == dict(b)
+
+    with pytest.raises(TypeError):
+        a.template['strength'] = 99
+
+def test_enemy_overrides_and_copies():
+    """Test per-enemy extra stats, status effects and copying"""
+    import copy
+    import pickle
+
+    orc = combat_system.create_enemy("orc")
+    orc['strength'] = 1
+    orc['poisoned'] = True
+    assert orc['strength'] == 1
+    assert combat_system.create_enemy("orc")['strength'] == 12
+    assert 'poisoned' in orc and len(orc) == 8
+
+    del orc['poisoned']
+    with pytest.raises(KeyError):
+        del orc['name']
+
+    for clone in (copy.deepcopy(orc), pickle.loads(pickle.dumps(orc))):
+        assert clone == orc
+        clone['health'] = 1
+        assert orc['health'] == 80
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,442 @@
+"""
+Test Inventory System Extensions
+Tests for the counted-stack inventory and shop extensions
+"""
+
+import pytest
+import sys
+import os
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_exceptions import *
+import character_manager
+import inventory_system
+import game_data
+
+# ============================================================================
+# COUNTED INVENTORY TESTS
+# ============================================================================
+
+def test_inventory_counts_and_removal():
+    """Test that stacked items are counted and removed one at a time"""
+    char = character_manager.create_character("StackTest", "Warrior")
+
+    for _ in range(3):
+        inventory_system.add_item_to_inventory(char, "health_potion")
+    inventory_system.add_item_to_inventory(char, "iron_sword")
+
+    assert inventory_system.count_item(char, "health_potion") == 3
+    assert inventory_system.get_inventory_space_remaining(char) == \
+        inventory_system.MAX_INVENTORY_SIZE - 4
+
+    inventory_system.remove_item_from_inventory(char, "iron_sword")
+    assert not inventory_system.has_item(char, "iron_sword")
+    assert len(char['inventory']) == 3
+
+def test_old_list_inventory_is_converted():
+    """Test that plain list inventories still work with every function"""
+    char = {'inventory': ['a', 'b', 'a'], 'gold': 0}
+
+    assert inventory_system.count_item(char, 'a') == 2
+    assert isinstance(char['inventory'], inventory_system.Inventory)
+    assert char['inventory'] == ['a', 'a', 'b']
+
+def test_inventory_save_format_round_trip(tmp_path):
+    """Test that counted inventories still save as comma-separated ids"""
+    char = character_manager.create_character("StackSave", "Mage")
+    char['inventory'].extend(["health_potion", "health_potion", "iron_sword"])
+
+    character_manager.save_character(char, str(tmp_path))
+    with open(tmp_path / "StackSave_save.txt") as f:
+        assert "INVENTORY: health_potion,health_potion,iron_sword\n" in f.read()
+
+    loaded = character_manager.load_character("StackSave", str(tmp_path))
+    assert inventory_system.count_item(loaded, "health_potion") == 2
+
+# ============================================================================
+# PRE-PARSED ITEM EFFECT TESTS
+# ============================================================================
+
+def test_loaded_items_have_parsed_effects():
+    """Test that load_items stores effects as (stat, value) pairs"""
+    items = game_data.load_items("data/items.txt")
+
+    assert items['health_potion']['effects'] == (('health', 20),)
+    assert items['iron_sword']['effects'] == (('strength', 5),)
+
+def test_malformed_effect_fails_at_load(tmp_path):
+    """Test that a bad effect string is rejected when items are loaded"""
+    path = tmp_path / "items.txt"
+    path.write_text(
+        "ITEM_ID: bad\nNAME: Bad\nTYPE: consumable\n"
+        "EFFECT: health:lots\nCOST: 5\nDESCRIPTION: Broken\n"
+    )
+
+    with pytest.raises(InvalidDataFormatError):
+        game_data.load_items(str(path))
+
+def test_hand_built_items_use_the_load_parser():
+    """Test that effect strings on hand-built items follow load_items' rules"""
+    effects = inventory_system.get_item_effects({'effect': 'health:20, magic:5'})
+    assert effects == game_data.parse_item_effects('health:20, magic:5')
+
+    for bad in (':5', 'health:lots', 'health'):
+        with pytest.raises(InvalidItemTypeError):
+            inventory_system.get_item_effects({'effect': bad})
+
+def test_multi_effect_items():
+    """Test that items with several effects apply and remove all of them"""
+    char = character_manager.create_character("MultiTest", "Cleric")
+    char['health'] = 50
+    strength = char['strength']
+    magic = char['magic']
+
+    potion = {'type': 'consumable', 'effects': (('health', 20), ('magic', 5))}
+    inventory_system.add_item_to_inventory(char, "elixir")
+    inventory_system.use_item(char, "elixir", potion)
+
+    assert char['health'] == 70
+    assert char['magic'] == magic + 5
+
+    blade = {'type': 'weapon', 'effect': 'strength:4,magic:2'}
+    inventory_system.add_item_to_inventory(char, "rune_blade")
+    inventory_system.equip_weapon(char, "rune_blade", blade)
+    assert char['strength'] == strength + 4
+    assert char['magic'] == magic + 7
+
+    inventory_system.unequip_weapon(char)
+    assert char['strength'] == strength
+    assert char['magic'] == magic + 5
+
+# ============================================================================
+# EQUIPMENT SLOT TESTS
+# ============================================================================
+
+def test_equipment_bonus_cache_and_base_stats():
+    """Test that bonuses are cached per stat and base stats stay recoverable"""
+    char = character_manager.create_character("SlotTest", "Warrior")
+    base_strength = char['strength']
+
+    ring = {'type': 'ring', 'effect': 'strength:2'}
+    for ring_id in ("ring_a", "ring_b"):
+        inventory_system.add_item_to_inventory(char, ring_id)
+        inventory_system.equip_item(char, ring_id, ring)
+    inventory_system.add_item_to_inventory(char, "iron_sword")
+    inventory_system.equip_weapon(char, "iron_sword", {'type': 'weapon', 'effect': 'strength:5'})
+
+    assert inventory_system.get_equipped_item(char, "ring_left") == "ring_a"
+    assert inventory_system.get_equipped_item(char, "ring_right") == "ring_b"
+    assert char['equipment_bonuses'] == {'strength': 9}
+    assert char['strength'] == base_strength + 9
+    assert inventory_system.get_base_stat(char, 'strength') == base_strength
+
+    assert inventory_system.unequip_slot(char, "ring_left") == "ring_a"
+    assert char['equipment_bonuses'] == {'strength': 7}
+    assert "ring_a" in char['inventory']
+
+def test_equip_swaps_and_rejects_wrong_slot():
+    """Test swapping an occupied slot and equipping into the wrong slot"""
+    char = character_manager.create_character("SwapTest", "Mage")
+    weapon = {'type': 'weapon', 'effect': 'strength:5'}
+    inventory_system.add_item_to_inventory(char, "sword_a")
+    inventory_system.add_item_to_inventory(char, "sword_b")
+
+    inventory_system.equip_weapon(char, "sword_a", weapon)
+    inventory_system.equip_weapon(char, "sword_b", weapon)
+
+    assert char['equipped_weapon'] == "sword_b"
+    assert "sword_a" in char['inventory']
+    assert char['equipment_bonuses'] == {'strength': 5}
+
+    with pytest.raises(InvalidItemTypeError):
+        inventory_system.equip_item(char, "sword_a", weapon, "helm")
+
+def test_equipment_survives_save_and_load(tmp_path):
+    """Test that equipped items and bonuses are restored from a save"""
+    char = character_manager.create_character("GearSave", "Rogue")
+    inventory_system.add_item_to_inventory(char, "leather_armor")
+    inventory_system.equip_armor(char, "leather_armor", {'type': 'armor', 'effect': 'max_health:10'})
+
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("GearSave", str(tmp_path))
+
+    assert loaded['equipped_armor'] == "leather_armor"
+    assert loaded['equipment_bonuses'] == {'max_health': 10}
+    assert loaded['max_health'] == char['max_health']
+
+    inventory_system.unequip_armor(loaded)
+    assert loaded['max_health'] == char['max_health'] - 10
+    assert loaded['health'] <= loaded['max_health']
+
+BASELINE_SAVE = """NAME: Oldtimer
+CLASS: Warrior
+LEVEL: 1
+HEALTH: 120
+MAX_HEALTH: 120
+STRENGTH: 20
+MAGIC: 5
+EXPERIENCE: 0
+GOLD: 0
+INVENTORY: health_potion
+ACTIVE_QUESTS: 
+COMPLETED_QUESTS: 
+EQUIPPED_WEAPON: iron_sword
+EQUIPPED_WEAPON_STAT: strength
+EQUIPPED_WEAPON_BONUS: 5
+EQUIPPED_ARMOR: None
+EQUIPPED_ARMOR_STAT: None
+EQUIPPED_ARMOR_BONUS: 0
+"""
+
+def test_baseline_save_without_equipment_line_loads(tmp_path):
+    """Test that saves from before equipment slots keep their gear"""
+    (tmp_path / "Oldtimer_save.txt").write_text(BASELINE_SAVE)
+    char = character_manager.load_character("Oldtimer", str(tmp_path))
+
+    assert inventory_system.get_equipped_item(char, "weapon") == "iron_sword"
+    assert char['equipped_weapon'] == "iron_sword"
+    assert char['equipped_armor'] is None
+    assert inventory_system.get_base_stat(char, "strength") == 15
+    assert not any(key.endswith(("_stat", "_bonus")) for key in char)
+
+    assert inventory_system.unequip_weapon(char) == "iron_sword"
+    assert char['strength'] == 15
+
+    # The legacy fields don't come back once the save is rewritten
+    text = character_manager.format_save_data(char)
+    assert "EQUIPPED_WEAPON_STAT" not in text
+
+    # Armor is rebuilt from the same stat/bonus pair as weapons
+    equipment = inventory_system.parse_legacy_equipment({
+        'equipped_armor': 'mage_robe',
+        'equipped_armor_stat': 'magic',
+        'equipped_armor_bonus': '3',
+    })
+    assert equipment == {'armor': {'item_id': 'mage_robe', 'effects': (('magic', 3),)}}
+
+# ============================================================================
+# BULK SHOP TESTS
+# ============================================================================
+
+SHOP_ITEMS = {
+    'health_potion': {'item_id': 'health_potion', 'type': 'consumable', 'cost': 25},
+    'iron_sword': {'item_id': 'iron_sword', 'type': 'weapon', 'cost': 100},
+}
+
+def test_bulk_purchase_and_sell_receipts():
+    """Test that bulk orders apply every line and return a receipt"""
+    char = character_manager.create_character("BulkTest", "Rogue")
+    char['gold'] = 500
+
+    receipt = inventory_system.purchase_items(
+        char, [('health_potion', 3), ('iron_sword', 1), ('health_potion', 1)], SHOP_ITEMS
+    )
+
+    assert receipt['total_gold'] == 200
+    assert receipt['gold_remaining'] == 300
+    assert receipt['lines'][0] == {
+        'item_id': 'health_potion', 'qty': 4, 'unit_price': 25, 'total': 100
+    }
+    assert inventory_system.count_item(char, 'health_potion') == 4
+
+    receipt = inventory_system.sell_items(char, [('health_potion', 4)], SHOP_ITEMS)
+    assert receipt['total_gold'] == 48
+    assert char['gold'] == 348
+    assert not inventory_system.has_item(char, 'health_potion')
+
+def test_bulk_orders_are_all_or_nothing():
+    """Test that a failing order leaves gold and inventory unchanged"""
+    char = character_manager.create_character("AtomicTest", "Cleric")
+    char['gold'] = 120
+
+    with pytest.raises(InsufficientResourcesError):
+        inventory_system.purchase_items(char, [('health_potion', 1), ('iron_sword', 1)], SHOP_ITEMS)
+    with pytest.raises(InventoryFullError):
+        inventory_system.purchase_items(
+            char, [('health_potion', inventory_system.MAX_INVENTORY_SIZE + 1)],
+            {'health_potion': {'cost': 0}}
+        )
+    with pytest.raises(ItemNotFoundError):
+        inventory_system.sell_items(char, [('health_potion', 1)], SHOP_ITEMS)
+
+    assert char['gold'] == 120
+    assert len(char['inventory']) == 0
+
+# ============================================================================
+# SHOP INDEX TESTS
+# ============================================================================
+
+def test_shop_index_range_queries():
+    """Test cost-range and type queries against the real item catalog"""
+    items = game_data.load_items("data/items.txt")
+    index = inventory_system.ShopIndex(items)
+
+    weapons = index.find("weapon", max_cost=100)
+    expected = sorted(
+        (d['cost'], i) for i, d in items.items()
+        if d['type'] == 'weapon' and d['cost'] <= 100
+    )
+    assert weapons == [i for _, i in expected]
+
+    char = {'gold': 0}
+    assert index.find_affordable(char) == [i for i, d in items.items() if d['cost'] == 0]
+
+    all_ids = index.find()
+    assert sorted(all_ids) == sorted(items)
+    assert [items[i]['cost'] for i in all_ids] == sorted(d['cost'] for d in items.values())
+
+def test_shop_pages():
+    """Test that pages are sliced and clamped to the last page"""
+    results = list(range(25))
+
+    assert inventory_system.get_page(results, 0, 10) == (list(range(10)), 3)
+    assert inventory_system.get_page(results, 7, 10) == ([20, 21, 22, 23, 24], 3)
+    assert inventory_system.get_page([], 0, 10) == ([], 1)
+
+def test_shop_index_pages_match_full_results():
+    """Test that find_page slices the same pages as paging find()"""
+    items = game_data.load_items("data/items.txt")
+    index = inventory_system.ShopIndex(items)
+
+    for item_type, max_cost in ((None, None), ("weapon", None), (None, 50), ("armor", 10**6)):
+        results = index.find(item_type, max_cost=max_cost)
+        for page in range(-1, 4):
+            assert index.find_page(page, 2, item_type, max_cost=max_cost) == \
+                inventory_system.get_page(results, page, 2)
+
+    item_ids, lo, hi = index.find_bounds("weapon", max_cost=100)
+    assert item_ids[lo:hi] == index.find("weapon", max_cost=100)
+    assert index.find_page(0, 10, "no_such_type") == ([], 1)
+
+# ============================================================================
+# SHARED VENDOR TESTS
+# ============================================================================
+
+def test_vendor_never_oversells_under_contention():
+    """Test that many threads buying one item can't exceed its stock"""
+    vendor = inventory_system.Vendor({'health_potion': 50})
+    item = SHOP_ITEMS['health_potion']
+    players = [{'gold': 10000, 'inventory': []} for _ in range(8)]
+
+    def buy_until_sold_out(char):
+        while True:
+            try:
+                vendor.purchase(char, 'health_potion', item)
+            except (InsufficientResourcesError, InventoryFullError):
+                return
+
+    threads = [threading.Thread(target=buy_until_sold_out, args=(c,)) for c in players]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(len(c['inventory']) for c in players) == 50
+    assert vendor.get_stock('health_potion') == 0
+
+def test_vendor_bulk_purchase_and_sell_back():
+    """Test that bulk orders respect stock and sales restock the vendor"""
+    vendor = inventory_system.Vendor({'health_potion': 3, 'iron_sword': 1})
+    char = {'gold': 1000, 'inventory': []}
+
+    with pytest.raises(InsufficientResourcesError):
+        vendor.purchase_many(char, [('health_potion', 2), ('iron_sword', 2)], SHOP_ITEMS)
+    assert vendor.get_stock('health_potion') == 3
+    assert char['gold'] == 1000
+
+    vendor.purchase_many(char, [('health_potion', 2), ('iron_sword', 1)], SHOP_ITEMS)
+    assert vendor.get_stock('health_potion') == 1
+    assert vendor.get_stock('iron_sword') == 0
+
+    vendor.sell(char, 'iron_sword', SHOP_ITEMS['iron_sword'])
+    assert vendor.get_stock('iron_sword') == 1
+
+# ============================================================================
+# ITEM REGISTRY TESTS
+# ============================================================================
+
+def test_loaded_items_get_dense_codes():
+    """Test that every loaded item has a unique registry code"""
+    items = game_data.load_items("data/items.txt")
+    codes = [item['code'] for item in items.values()]
+
+    assert len(set(codes)) == len(codes)
+    for item_id, item in items.items():
+        assert game_data.ITEM_REGISTRY.item_id_of(item['code']) == item_id
+
+def test_inventory_shares_canonical_ids_and_codes_round_trip():
+    """Test that stack keys are shared strings and code form round-trips"""
+    parsed_a = "health_potion,iron_sword".split(",")
+    parsed_b = "health_potion".split(",")
+    inv_a = inventory_system.Inventory(parsed_a)
+    inv_b = inventory_system.Inventory(parsed_b)
+
+    assert list(inv_a.stacks())[0][0] is list(inv_b.stacks())[0][0]
+
+    codes, counts = inv_a.to_codes()
+    assert inventory_system.Inventory.from_codes(codes, counts) == inv_a
+
+# ============================================================================
+# CHANGE JOURNAL TESTS
+# ============================================================================
+
+def test_journal_undoes_a_failed_batch():
+    """Test that an exception inside a journal rolls back every step"""
+    char = character_manager.create_character("JournalTest", "Warrior")
+    char['gold'] = 300
+    sword = {'type': 'weapon', 'effect': 'strength:5', 'cost': 100}
+    strength = char['strength']
+
+    with pytest.raises(InsufficientResourcesError):
+        with inventory_system.ChangeJournal(char):
+            inventory_system.purchase_item(char, "iron_sword", sword)
+            inventory_system.equip_weapon(char, "iron_sword", sword)
+            inventory_system.purchase_items(char, [('health_potion', 1)], {'health_potion': {'cost': 999}})
+
+    assert char['gold'] == 300
+    assert char['strength'] == strength
+    assert len(char['inventory']) == 0
+    assert char.get('equipment', {}) == {}
+    assert 'equipped_weapon' not in char
+
+def test_journal_commit_summary_and_nesting():
+    """Test commit summaries and that inner commits can still be undone"""
+    char = character_manager.create_character("NestTest", "Mage")
+    potion = {'type': 'consumable', 'effect': 'health:20', 'cost': 25}
+
+    outer = inventory_system.ChangeJournal(char).open()
+    with inventory_system.ChangeJournal(char) as inner:
+        inventory_system.purchase_item(char, "health_potion", potion)
+        inventory_system.purchase_item(char, "health_potion", potion)
+        summary = inner.summarize()
+
+    assert summary == {'fields': {'gold': 50}, 'inventory': {'health_potion': 2}}
+    assert char['gold'] == 50
+
+    outer.undo()
+    assert char['gold'] == 100
+    assert inventory_system.count_item(char, "health_potion") == 0
+
+def test_journal_summary_reports_nested_equipment_changes():
+    """Test that slot changes show up under the equipment field"""
+    char = character_manager.create_character("RingTest", "Mage")
+    ring = {'type': 'ring', 'effect': 'magic:5', 'cost': 10}
+    inventory_system.get_equipment(char)
+    inventory_system.get_equipment_bonuses(char)
+    inventory_system.add_item_to_inventory(char, "ring_y")
+
+    with inventory_system.ChangeJournal(char) as journal:
+        inventory_system.equip_item(char, "ring_y", ring)
+        summary = journal.summarize()
+
+    assert summary['inventory'] == {'ring_y': -1}
+    assert summary['fields']['magic'] == 25
+    assert summary['fields']['equipment'] == {
+        'ring_left': {'item_id': 'ring_y', 'effects': (('magic', 5),)}
+    }
+    assert summary['fields']['equipment_bonuses'] == {'magic': 5}
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
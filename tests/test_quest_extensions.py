@@ -0,0 +1,264 @@
+"""
+Test Quest Handler Extensions
+Tests for the prerequisite graph, availability tracking and quest stats
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_exceptions import *
+import character_manager
+import quest_handler
+import game_data
+
+def make_quest(quest_id, prerequisite='NONE', level=1, xp=10, gold=5):
+    """Build a minimal quest dictionary for tests"""
+    return {
+        'quest_id': quest_id,
+        'title': quest_id.title(),
+        'description': 'Test quest',
+        'reward_xp': xp,
+        'reward_gold': gold,
+        'required_level': level,
+        'prerequisite': prerequisite,
+    }
+
+# ============================================================================
+# PREREQUISITE GRAPH TESTS
+# ============================================================================
+
+def test_prerequisite_chain_and_topological_order():
+    """Test chains and ordering on the real quest file"""
+    quests = game_data.load_quests("data/quests.txt")
+    graph = quest_handler.get_quest_graph(quests)
+
+    position = {qid: i for i, qid in enumerate(graph.topological_order)}
+    assert sorted(position) == sorted(quests)
+    for qid, prereq in graph.prerequisite_of.items():
+        if prereq is not None:
+            assert position[prereq] < position[qid]
+
+    chain = quest_handler.get_quest_prerequisite_chain('goblin_hunter', quests)
+    assert chain == ['first_steps', 'goblin_hunter']
+
+def test_prerequisite_cycle_is_detected():
+    """Test that a prerequisite loop raises instead of hanging"""
+    quests = {
+        'a': make_quest('a', 'c'),
+        'b': make_quest('b', 'a'),
+        'c': make_quest('c', 'b'),
+        'd': make_quest('d'),
+    }
+
+    with pytest.raises(QuestPrerequisiteCycleError):
+        quest_handler.validate_quest_prerequisites(quests)
+    with pytest.raises(QuestPrerequisiteCycleError):
+        quest_handler.get_quest_prerequisite_chain('d', quests)
+
+def test_chain_to_missing_prerequisite_raises():
+    """Test that chains through a missing quest raise QuestNotFoundError"""
+    quests = {'b': make_quest('b', 'ghost')}
+
+    with pytest.raises(QuestNotFoundError):
+        quest_handler.get_quest_prerequisite_chain('b', quests)
+
+# ============================================================================
+# AVAILABLE QUEST TRACKING TESTS
+# ============================================================================
+
+def brute_force_available(char, quests):
+    """The original scan-everything definition of available quests"""
+    return [
+        quests[qid] for qid in quests
+        if quest_handler.can_accept_quest(char, qid, quests)
+    ]
+
+def test_available_quests_follow_completion_and_level_ups():
+    """Test that tracked availability matches a full scan after each step"""
+    quests = {
+        'intro': make_quest('intro', xp=100),
+        'sequel': make_quest('sequel', 'intro'),
+        'veteran': make_quest('veteran', level=2),
+        'finale': make_quest('finale', 'sequel', level=2),
+    }
+    char = character_manager.create_character("TrackTest", "Warrior")
+
+    assert quest_handler.get_available_quests(char, quests) == [quests['intro']]
+
+    quest_handler.accept_quest(char, 'intro', quests)
+    assert quest_handler.get_available_quests(char, quests) == []
+
+    # Completing intro unlocks sequel, and its XP levels us up to 2
+    quest_handler.complete_quest(char, 'intro', quests)
+    assert char['level'] == 2
+    available = quest_handler.get_available_quests(char, quests)
+    assert available == brute_force_available(char, quests)
+    assert [q['quest_id'] for q in available] == ['sequel', 'veteran']
+
+    quest_handler.accept_quest(char, 'sequel', quests)
+    quest_handler.abandon_quest(char, 'sequel')
+    assert quest_handler.get_available_quests(char, quests) == brute_force_available(char, quests)
+
+def test_available_quests_notice_outside_changes():
+    """Test that editing quest lists directly doesn't leave stale results"""
+    quests = {
+        'first_quest': make_quest('first_quest'),
+        'second_quest': make_quest('second_quest', 'first_quest'),
+    }
+    char = character_manager.create_character("StaleTest", "Rogue")
+    quest_handler.get_available_quests(char, quests)
+
+    char['completed_quests'].append('first_quest')
+
+    assert quest_handler.get_available_quests(char, quests) == [quests['second_quest']]
+
+def test_availability_cache_is_not_saved(tmp_path):
+    """Test that the runtime availability cache stays out of save files"""
+    char = character_manager.create_character("CacheSave", "Mage")
+    quest_handler.get_available_quests(char, {'q': make_quest('q')})
+
+    character_manager.save_character(char, str(tmp_path))
+    loaded = character_manager.load_character("CacheSave", str(tmp_path))
+
+    assert not any(key.startswith('_') for key in loaded)
+
+# ============================================================================
+# QUEST ID LIST TESTS
+# ============================================================================
+
+def test_quest_id_list_keeps_list_behaviour():
+    """Test the list-style API and ordering of QuestIdList"""
+    ids = character_manager.QuestIdList(['a', 'b'])
+    ids.append('c')
+    ids.append('a')
+
+    assert ids == ['a', 'b', 'c']
+    assert len(ids) == 3 and ids[-1] == 'c'
+
+    ids.remove('b')
+    assert 'b' not in ids
+    with pytest.raises(ValueError):
+        ids.remove('b')
+
+def test_quest_lists_save_and_convert():
+    """Test quest lists in saves and conversion of plain lists"""
+    char = {'level': 1, 'active_quests': ['x'], 'completed_quests': []}
+    assert quest_handler.is_quest_active(char, 'x')
+    assert isinstance(char['active_quests'], character_manager.QuestIdList)
+
+    hero = character_manager.create_character("QuestListSave", "Cleric")
+    hero['completed_quests'].extend(['one', 'two'])
+    text = character_manager.format_save_data(hero)
+    assert "COMPLETED_QUESTS: one,two\n" in text
+
+# ============================================================================
+# LEVEL INDEX TESTS
+# ============================================================================
+
+def test_quests_by_level_uses_sorted_index():
+    """Test level range results and their order"""
+    quests = {
+        'late': make_quest('late', level=5),
+        'early': make_quest('early', level=1),
+        'mid_a': make_quest('mid_a', level=3),
+        'mid_b': make_quest('mid_b', level=3),
+    }
+
+    result = quest_handler.get_quests_by_level(quests, 2, 5)
+    assert [q['quest_id'] for q in result] == ['mid_a', 'mid_b', 'late']
+    assert quest_handler.get_quests_by_level(quests, 6, 10) == []
+
+def test_level_index_follows_reloaded_catalog():
+    """Test that a new catalog object gets a fresh level index"""
+    first = {'a': make_quest('a', level=1)}
+    assert len(quest_handler.get_quests_by_level(first, 1, 1)) == 1
+
+    reloaded = {'a': make_quest('a', level=4), 'b': make_quest('b', level=1)}
+    result = quest_handler.get_quests_by_level(reloaded, 1, 1)
+    assert [q['quest_id'] for q in result] == ['b']
+
+# ============================================================================
+# QUEST STATISTICS TESTS
+# ============================================================================
+
+def test_quest_stats_are_maintained_by_complete_quest():
+    """Test that totals update on completion without a rescan"""
+    quests = {
+        'a': make_quest('a', xp=10, gold=3),
+        'b': make_quest('b', xp=20, gold=4),
+    }
+    char = character_manager.create_character("StatsTest", "Warrior")
+    char['completed_quests'].append('retired_quest')  # not in the catalog
+
+    stats = quest_handler.get_quest_stats(char, quests)
+    assert stats.completed_count == 0
+
+    quest_handler.accept_quest(char, 'a', quests)
+    quest_handler.complete_quest(char, 'a', quests)
+
+    assert quest_handler.get_quest_stats(char, quests) is stats
+    assert quest_handler.get_total_quest_rewards_earned(char, quests) == \
+        {'total_xp': 10, 'total_gold': 3}
+    assert quest_handler.get_quest_completion_percentage(char, quests) == 50.0
+
+def test_quest_stats_recompute_for_new_catalog_and_edits():
+    """Test the repair path after a reload or a direct list edit"""
+    char = character_manager.create_character("RepairTest", "Mage")
+    quests = {'a': make_quest('a', xp=10, gold=3)}
+    quest_handler.get_quest_stats(char, quests)
+
+    char['completed_quests'].append('a')
+    assert quest_handler.get_total_quest_rewards_earned(char, quests)['total_xp'] == 10
+
+    reloaded = {'a': make_quest('a', xp=99, gold=1)}
+    assert quest_handler.get_total_quest_rewards_earned(char, reloaded) == \
+        {'total_xp': 99, 'total_gold': 1}
+
+# ============================================================================
+# CATALOG EDIT TESTS
+# ============================================================================
+
+def test_in_place_catalog_edits_after_mark_changed():
+    """Test that same-size edits are picked up once the catalog is marked"""
+    quests = {
+        'a': make_quest('a', level=1),
+        'b': make_quest('b', level=2),
+    }
+    char = character_manager.create_character("EditTest", "Rogue")
+    assert [q['quest_id'] for q in quest_handler.get_quests_by_level(quests, 2, 2)] == ['b']
+
+    quests['a']['required_level'] = 5
+    del quests['b']
+    quests['c'] = make_quest('c', level=1)
+    quest_handler.mark_quest_catalog_changed(quests)
+
+    assert quest_handler.get_quests_by_level(quests, 2, 2) == []
+    assert [q['quest_id'] for q in quest_handler.get_quests_by_level(quests, 5, 5)] == ['a']
+    assert quest_handler.get_available_quests(char, quests) == [quests['c']]
+
+def test_main_restore_refreshes_quest_indexes():
+    """Test that restoring a snapshot doesn't leave a stale quest graph"""
+    import main
+
+    quests = {'a': make_quest('a'), 'b': make_quest('b')}
+    old = (main.current_character, main.all_quests, main.all_items)
+    main.current_character = character_manager.create_character("RestoreTest", "Mage")
+    main.all_quests = quests
+    main.all_items = {}
+    try:
+        snapshot = main.snapshot_game_state()
+        del quests['b']
+        quests['c'] = make_quest('c', level=3)
+        quest_handler.get_quests_by_level(quests, 1, 3)
+
+        main.restore_game_state(snapshot)
+        levels = quest_handler.get_quests_by_level(quests, 1, 3)
+        assert sorted(q['quest_id'] for q in levels) == ['a', 'b']
+    finally:
+        main.current_character, main.all_quests, main.all_items = old
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,238 @@
+"""
+COMP 163 - Project 3: Quest Chronicles
+Tournament Runner
+
+Name: Bryant Clarke
+
+AI Usage: AI helped with syntax formatting and error checking
+
+Plays every class in character_manager.VALID_CLASSES against every enemy
+in the game's enemy data (data/enemies.txt, the same file main loads) at
+every level (with special abilities) and writes the win rates as CSV.
+The (class, enemy, level) grid is split into chunks of battles that run
+on a process pool.
+
+Run: python tournament.py --levels 10 --trials 1000 --output balance.csv
+"""
+
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import character_manager
+import combat_system
+import game_data
+from custom_exceptions import MissingDataFileError
+
+# Battles still going after this many turns count as losses
+MAX_TURNS = 1000
+
+CSV_FIELDS = ["class", "enemy", "level", "battles", "wins", "win_rate", "avg_turns"]
+
+# ============================================================================
+# SINGLE BATTLES
+# ============================================================================
+
+def create_character_at_level(character_class, level):
+    """
+    Create a character and level it up with the normal XP rules
+    """
+    character = character_manager.create_character(f"{character_class}{level}", character_class)
+    # Reaching level L takes 100 + 200 + ... + 100 * (L - 1) XP
+    character_manager.gain_experience(character, 100 * level * (level - 1) // 2)
+    return character
+
+def fight(character, enemy, rng):
+    """
+    Play one battle to the end, using the class ability whenever it is
+    off cooldown and basic attacks otherwise
+
+    Returns: (player_won, turns)
+    """
+    battle = combat_system.SimpleBattle(character, enemy, rng=rng)
+    while battle.turn_count < MAX_TURNS:
+        battle.turn_count += 1
+
+        if battle.ability_ready():
+            battle.special_ability()
+        else:
+            battle.player_turn()
+        if battle.check_battle_end() is not None:
+            break
+
+        battle.enemy_turn()
+        if battle.check_battle_end() is not None:
+            break
+
+    return battle.check_battle_end() == "player", battle.turn_count
+
+# ============================================================================
+# WORK UNITS
+# ============================================================================
+
+def build_work_units(max_level, trials, chunk_size, enemy_types=None):
+    """
+    Split the grid into (class, enemy, level, chunk_index, battles) units
+
+    Chunks depend only on trials and chunk_size, not on the worker count,
+    so a given seed always produces the same results.
+    """
+    if enemy_types is None:
+        enemy_types = list(combat_system.ENEMY_STATS)
+
+    units = []
+    for character_class in character_manager.VALID_CLASSES:
+        for enemy_type in enemy_types:
+            for level in range(1, max_level + 1):
+                for chunk_index, start in enumerate(range(0, trials, chunk_size)):
+                    units.append((character_class, enemy_type, level, chunk_index,
+                                  min(chunk_size, trials - start)))
+    return units
+
+def run_work_unit(unit, seed):
+    """
+    Run one chunk of battles (in a worker process)
+
+    Returns: (class, enemy, level, wins, total_turns)
+    """
+    character_class, enemy_type, level, chunk_index, battles = unit
+    rng = combat_system.make_battle_rng(seed, character_class, enemy_type, level, chunk_index)
+    template = create_character_at_level(character_class, level)
+
+    combat_system.set_battle_log_sink(combat_system.NullLogSink())
+    wins = 0
+    total_turns = 0
+    for _ in range(battles):
+        won, turns = fight(dict(template), combat_system.create_enemy(enemy_type), rng)
+        wins += won
+        total_turns += turns
+    return character_class, enemy_type, level, wins, total_turns
+
+def run_work_units(units, seed):
+    """Run a batch of units in one worker call (fewer round trips)"""
+    return [run_work_unit(unit, seed) for unit in units]
+
+# ============================================================================
+# TOURNAMENT
+# ============================================================================
+
+def run_tournament(max_level=10, trials=200, workers=None, chunk_size=100, seed=0,
+                   progress=None, enemy_data=None):
+    """
+    Play the whole grid and merge the chunk results
+
+    Args:
+        max_level: Highest character level to test (levels 1..max_level)
+        trials: Battles per (class, enemy, level) cell
+        workers: Process count (None = one per core, 1 = run in this process)
+        chunk_size: Battles per work unit
+        seed: Top-level seed; every chunk gets its own stream from it
+        progress: Optional callback(done_units, total_units)
+        enemy_data: Enemy types to fight (game_data.load_enemies output);
+                    None uses whatever combat_system.ENEMY_STATS holds
+
+    Returns: Dictionary of (class, enemy, level) -> {"battles", "wins", "turns"}
+    """
+    enemy_types = [e.lower() for e in enemy_data] if enemy_data is not None else None
+    units = build_work_units(max_level, trials, chunk_size, enemy_types)
+    results = {}
+    for character_class, enemy_type, level, _, battles in units:
+        cell = results.setdefault((character_class, enemy_type, level),
+                                  {"battles": 0, "wins": 0, "turns": 0})
+        cell["battles"] += battles
+
+    def merge(rows):
+        for character_class, enemy_type, level, wins, turns in rows:
+            cell = results[(character_class, enemy_type, level)]
+            cell["wins"] += wins
+            cell["turns"] += turns
+
+    done = 0
+    if workers == 1:
+        previous = combat_system.get_battle_log_sink()
+        previous_enemies = dict(combat_system.ENEMY_STATS)
+        try:
+            if enemy_data is not None:
+                combat_system.set_enemy_types(enemy_data)
+            for unit in units:
+                merge([run_work_unit(unit, seed)])
+                done += 1
+                if progress:
+                    progress(done, len(units))
+        finally:
+            combat_system.set_battle_log_sink(previous)
+            if enemy_data is not None:
+                combat_system.set_enemy_types(previous_enemies)
+        return results
+
+    # Workers load the same enemy types before running any units
+    pool_options = {}
+    if enemy_data is not None:
+        pool_options = {"initializer": combat_system.set_enemy_types, "initargs": (enemy_data,)}
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, **pool_options) as pool:
+        # Hand each worker a few units at a time so the pool stays busy
+        # without a round trip per unit
+        per_call = max(1, len(units) // (workers * 8))
+        batches = [units[i:i + per_call] for i in range(0, len(units), per_call)]
+        futures = [pool.submit(run_work_units, batch, seed) for batch in batches]
+        for future in as_completed(futures):
+            rows = future.result()
+            merge(rows)
+            done += len(rows)
+            if progress:
+                progress(done, len(units))
+    return results
+
+def write_csv(results, stream):
+    """Write tournament results as CSV rows sorted by class, enemy, level"""
+    writer = csv.writer(stream)
+    writer.writerow(CSV_FIELDS)
+    for (character_class, enemy_type, level), cell in sorted(results.items()):
+        battles = cell["battles"]
+        writer.writerow([
+            character_class,
+            enemy_type,
+            level,
+            battles,
+            cell["wins"],
+            f"{cell['wins'] / battles:.4f}",
+            f"{cell['turns'] / battles:.2f}",
+        ])
+
+def show_progress(done, total):
+    """Progress line on stderr (keeps stdout clean for CSV)"""
+    print(f"\r{done}/{total} work units", end="" if done < total else "\n",
+          file=sys.stderr, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Class vs enemy balance tournament")
+    parser.add_argument("--levels", type=int, default=10, help="highest level to test")
+    parser.add_argument("--trials", type=int, default=200, help="battles per cell")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunk", type=int, default=100, help="battles per work unit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="CSV file (default: stdout)")
+    parser.add_argument("--enemies", default="data/enemies.txt",
+                        help="enemy data file (default: data/enemies.txt)")
+    args = parser.parse_args(argv)
+
+    try:
+        enemy_data = game_data.load_enemies(args.enemies)
+    except MissingDataFileError:
+        print(f"{args.enemies} not found; using built-in enemy stats.", file=sys.stderr)
+        enemy_data = None
+
+    results = run_tournament(args.levels, args.trials, args.workers, args.chunk,
+                             args.seed, progress=show_progress, enemy_data=enemy_data)
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_csv(results, f)
+    else:
+        write_csv(results, sys.stdout)
+
+if __name__ == "__main__":
+    main()